@@ -1,11 +1,25 @@
 from api.utils import custom_response
 from rest_framework import status
 from functools import wraps
+from asgiref.sync import iscoroutinefunction
 
 
 def permit_if_role_in(roles=[]):
 
     def wrapper(decorated_function):
+        if iscoroutinefunction(decorated_function):
+
+            @wraps(decorated_function)
+            async def check_permission_async(self, request, *args, **kwargs):
+                if request.user.role in roles:
+                    return await decorated_function(self, request, *args, **kwargs)
+                return custom_response(
+                    message="You don't have the permission to access this endpoint.",
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
+
+            return check_permission_async
+
         @wraps(decorated_function)
         def check_permission(self, request, *args, **kwargs):
             if request.user.role in roles:
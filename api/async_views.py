@@ -0,0 +1,156 @@
+import json
+from asgiref.sync import sync_to_async
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
+from api.api_permission import permit_if_role_in
+from api.authentication import ClaimsJWTAuthentication
+from api.cache import ENDPOINT_SCOPES, acached_payload
+from api.conditional import (
+    alist_validators,
+    aaggregate_etag,
+    etag_matches,
+    not_modified_since,
+    not_modified,
+    set_validators,
+)
+from api.models import UserRoles
+from api.replicas import areplica_reads
+from api.visibility import avisible_project_ids, visibility_key
+from api.renderers import FastJSONRenderer
+from api.utils import custom_response
+from api.views import ProjectView, TaskView, MilestoneView, AssignTasks
+
+
+class AsyncAPIView(View):
+    # DRF's APIView only dispatches synchronously, so these views authenticate
+    # and render the usual custom_response envelope themselves.
+    authentication_class = ClaimsJWTAuthentication
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            authenticated = await self.authentication_class().aauthenticate(request)
+        except AuthenticationFailed as e:
+            return self.finalize_response(
+                custom_response(message=e.detail, status=status.HTTP_401_UNAUTHORIZED)
+            )
+        if authenticated is None:
+            return self.finalize_response(
+                custom_response(
+                    message="Authentication credentials were not provided.",
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
+            )
+        request.user, request.auth = authenticated
+        response = await super().dispatch(request, *args, **kwargs)
+        return self.finalize_response(response)
+
+    def finalize_response(self, response):
+        if isinstance(response, Response):
+            response.accepted_renderer = FastJSONRenderer()
+            response.accepted_media_type = FastJSONRenderer.media_type
+            response.renderer_context = {}
+            response.render()
+        return response
+
+    def get_data(self, request):
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            raise ValidationError("Request body must be valid JSON.")
+
+
+class AsyncListView(AsyncAPIView):
+    endpoint = None
+    list_view = None
+    message = ""
+
+    def drf_request(self, request):
+        drf_request = Request(request)
+        drf_request.user = request.user
+        return drf_request
+
+    async def get_list_payload(self, request, project_ids):
+        # Cursor pagination is DRF code, so a cache miss builds the page with
+        # the sync view on the request's worker thread.
+        build = self.list_view().get_list_payload
+        return await sync_to_async(build)(self.drf_request(request), project_ids)
+
+    async def aggregate_etag(self, request, project_ids):
+        queryset = self.list_view().get_queryset(self.drf_request(request), project_ids)
+        return await aaggregate_etag(queryset, request)
+
+    @permit_if_role_in([UserRoles.MEMBER])
+    async def get(self, request, *args, **kwargs):
+        try:
+            project_ids = await avisible_project_ids(request.user)
+            scope = visibility_key(project_ids)
+            # Versions first, as in views.list_response().
+            versions, etag, last_modified = await alist_validators(
+                self.endpoint, request, scope
+            )
+            async with areplica_reads(request.user, ENDPOINT_SCOPES[self.endpoint]):
+                if etag is None:
+                    etag = await self.aggregate_etag(request, project_ids)
+                if etag_matches(request, etag) or not_modified_since(
+                    request, last_modified
+                ):
+                    return not_modified(etag, last_modified)
+                payload = await acached_payload(
+                    self.endpoint,
+                    request,
+                    lambda: self.get_list_payload(request, project_ids),
+                    scope,
+                    versions,
+                )
+            response = custom_response(
+                data=payload["data"],
+                message=self.message,
+                status=status.HTTP_200_OK,
+                pagination=payload["pagination"],
+            )
+            return set_validators(response, etag, last_modified)
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncProjectView(AsyncListView):
+    endpoint = "projects"
+    list_view = ProjectView
+    message = "Showing all the Projects."
+
+
+class AsyncTaskView(AsyncListView):
+    endpoint = "tasks"
+    list_view = TaskView
+    message = "Showing all the Tasks."
+
+
+class AsyncMilestoneView(AsyncListView):
+    endpoint = "milestones"
+    list_view = MilestoneView
+    message = "Showing all the milestones."
+
+
+class AsyncAssignTasks(AsyncAPIView):
+    @permit_if_role_in([UserRoles.ADMIN, UserRoles.MANAGER])
+    async def put(self, request, *args, **kwargs):
+        try:
+            data = self.get_data(request)
+            # The write needs a transaction, which the async ORM cannot open.
+            if isinstance(data, list):
+                return await sync_to_async(AssignTasks().put_many)(data)
+            return await sync_to_async(AssignTasks().put_one)(data)
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,170 @@
+import logging
+import time
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from api.models import User
+
+logger = logging.getLogger(__name__)
+
+ROLE_CLAIM = "role"
+ROLE_AT_CLAIM = "role_at"
+USER_CHANGED_KEY = "auth:user-changed:{user_id}"
+
+_local_changes = OrderedDict()
+
+
+def add_role_claims(token, user):
+    # role_at is when the role was read from the database; access tokens made
+    # from a refresh token copy it, so a later role change still invalidates them.
+    token[ROLE_CLAIM] = user.role
+    token[ROLE_AT_CLAIM] = int(time.time())
+    return token
+
+
+def mark_user_changed(user_id, changed_at=None):
+    if changed_at is None:
+        changed_at = time.time()
+    _local_changes.pop(user_id, None)
+    try:
+        cache.set(
+            USER_CHANGED_KEY.format(user_id=user_id),
+            int(changed_at),
+            timeout=int(settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds()),
+        )
+    except Exception as e:
+        logger.warning("Could not mark user %s as changed: %s", user_id, e)
+
+
+def _remember(user_id, changed_at, now):
+    _local_changes[user_id] = (changed_at, now)
+    _local_changes.move_to_end(user_id)
+    while len(_local_changes) > settings.AUTH_USER_STATE_LOCAL_SIZE:
+        _local_changes.popitem(last=False)
+
+
+def _local_changed_at(user_id, now):
+    local = _local_changes.get(user_id)
+    if local is not None and now - local[1] < settings.AUTH_USER_STATE_LOCAL_TTL:
+        return local[0]
+    return None
+
+
+def _load_changed_at(user_id):
+    # The cache only mirrors User.role_changed_at, so an evicted marker is
+    # read back from the row instead of being taken as "never changed".
+    rows = User.objects.filter(pk=user_id).values_list("role_changed_at", flat=True)
+    if not rows:
+        # A deleted user: whatever the token says is stale.
+        return int(time.time())
+    changed_at = int(rows[0].timestamp()) if rows[0] else 0
+    cache.add(
+        USER_CHANGED_KEY.format(user_id=user_id),
+        changed_at,
+        timeout=int(settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds()),
+    )
+    return changed_at
+
+
+def _changed_at(user_id):
+    now = time.monotonic()
+    changed_at = _local_changed_at(user_id, now)
+    if changed_at is not None:
+        return changed_at
+    changed_at = cache.get(USER_CHANGED_KEY.format(user_id=user_id))
+    if changed_at is None:
+        changed_at = _load_changed_at(user_id)
+    _remember(user_id, changed_at, now)
+    return changed_at
+
+
+async def _achanged_at(user_id):
+    now = time.monotonic()
+    changed_at = _local_changed_at(user_id, now)
+    if changed_at is not None:
+        return changed_at
+    changed_at = await cache.aget(USER_CHANGED_KEY.format(user_id=user_id))
+    if changed_at is None:
+        changed_at = await sync_to_async(_load_changed_at)(user_id)
+    _remember(user_id, changed_at, now)
+    return changed_at
+
+
+def claims_are_current(user_id, role_at):
+    try:
+        return _changed_at(user_id) < role_at
+    except Exception as e:
+        logger.warning("Cache unavailable, loading user %s: %s", user_id, e)
+        return False
+
+
+async def aclaims_are_current(user_id, role_at):
+    try:
+        return await _achanged_at(user_id) < role_at
+    except Exception as e:
+        logger.warning("Cache unavailable, loading user %s: %s", user_id, e)
+        return False
+
+
+class TokenClaimsUser(SimpleLazyObject):
+    # Answers id and role from the token; anything else, is_active included,
+    # loads the user row.
+    def __init__(self, user_id, role):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__["_claims"] = {"id": user_id, "role": role}
+
+    @property
+    def id(self):
+        return self.__dict__["_claims"]["id"]
+
+    pk = id
+
+    @property
+    def role(self):
+        return self.__dict__["_claims"]["role"]
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def __bool__(self):
+        return True
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_claims(self, validated_token):
+        claims = (
+            validated_token.get(api_settings.USER_ID_CLAIM),
+            validated_token.get(ROLE_CLAIM),
+            validated_token.get(ROLE_AT_CLAIM),
+        )
+        return None if None in claims else claims
+
+    def get_user(self, validated_token):
+        claims = self.get_claims(validated_token)
+        if claims is None or not claims_are_current(claims[0], claims[2]):
+            return super().get_user(validated_token)
+        return TokenClaimsUser(claims[0], claims[1])
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        claims = self.get_claims(validated_token)
+        if claims is None or not await aclaims_are_current(claims[0], claims[2]):
+            user = await sync_to_async(super().get_user)(validated_token)
+        else:
+            user = TokenClaimsUser(claims[0], claims[1])
+        return user, validated_token
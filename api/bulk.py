@@ -0,0 +1,91 @@
+from collections import defaultdict
+from rest_framework import serializers, status
+from api.models import Project
+
+BULK_MAX_ITEMS = 1000
+
+
+def get_items(data):
+    if not isinstance(data, list) or not data:
+        raise serializers.ValidationError("Expected a non-empty list of items.")
+    if len(data) > BULK_MAX_ITEMS:
+        raise serializers.ValidationError(
+            f"At most {BULK_MAX_ITEMS} items can be sent in one request."
+        )
+    if not all(isinstance(item, dict) for item in data):
+        raise serializers.ValidationError("Every item must be an object.")
+    return data
+
+
+def get_ids(values):
+    if isinstance(values, str):
+        values = values.split(",")
+    try:
+        ids = [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise serializers.ValidationError("ids must be a list of integers.")
+    if not ids:
+        raise serializers.ValidationError("ids is required.")
+    if len(ids) > BULK_MAX_ITEMS:
+        raise serializers.ValidationError(
+            f"At most {BULK_MAX_ITEMS} items can be sent in one request."
+        )
+    return ids
+
+
+def preload_related(serializer_class, items):
+    # One in_bulk() query per related model referenced by the items.
+    wanted = defaultdict(set)
+    for name, field in serializer_class().fields.items():
+        if field.read_only:
+            continue
+        if isinstance(field, serializers.ManyRelatedField):
+            model = field.child_relation.get_queryset().model
+            for item in items:
+                values = item.get(name) or []
+                wanted[model].update(values if isinstance(values, list) else [])
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            model = field.get_queryset().model
+            wanted[model].update(item.get(name) for item in items)
+
+    preloaded = {}
+    for model, values in wanted.items():
+        ids = set()
+        for value in values:
+            try:
+                ids.add(int(value))
+            except (TypeError, ValueError):
+                pass
+        preloaded[model] = model.objects.in_bulk(ids)
+    return preloaded
+
+
+def membership_rows(pairs):
+    return Project.members.through.objects.filter(
+        project_id__in={project_id for project_id, _ in pairs},
+        user_id__in={user_id for _, user_id in pairs},
+    ).values_list("project_id", "user_id")
+
+
+def load_memberships(pairs):
+    pairs = {(project_id, user_id) for project_id, user_id in pairs}
+    if not pairs:
+        return set()
+    return set(membership_rows(pairs)) & pairs
+
+
+def taken_names(model, names, exclude_ids=()):
+    return set(
+        model.objects.filter(name__in=set(names))
+        .exclude(pk__in=exclude_ids)
+        .values_list("name", flat=True)
+    )
+
+
+def results_status(results, success_status):
+    failed = sum(1 for result in results if result["status"] >= 400)
+    if not failed:
+        return success_status
+    if failed == len(results):
+        return status.HTTP_400_BAD_REQUEST
+    return status.HTTP_207_MULTI_STATUS
@@ -0,0 +1,284 @@
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from api.models import Notification as NotificationModel
+from api.metrics import record_cache
+from api.replicas import mark_written
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "api:version:{scope}"
+MODIFIED_KEY = "api:modified:{scope}"
+PAYLOAD_KEY = "api:payload:{endpoint}:{versions}:{digest}"
+STATS_KEY = "api:stats:{endpoint}:{outcome}"
+
+ENDPOINT_SCOPES = {
+    "projects": ("project", "user"),
+    "tasks": ("task", "project", "user"),
+    "milestones": ("milestone", "project"),
+}
+
+
+def _initial_version():
+    # Seeded from the clock so an evicted counter never restarts at a value
+    # that older payloads were stored under.
+    return int(time.time() * 1000)
+
+
+def _get_seeded(defaults):
+    # defaults maps each key to the function giving its first value.
+    values = cache.get_many(defaults)
+    for key, initial in defaults.items():
+        if key not in values:
+            cache.add(key, initial(), timeout=None)
+            values[key] = cache.get(key)
+    return values
+
+
+async def _aget_seeded(defaults):
+    values = await cache.aget_many(defaults)
+    for key, initial in defaults.items():
+        if key not in values:
+            await cache.aadd(key, initial(), timeout=None)
+            values[key] = await cache.aget(key)
+    return values
+
+
+def _version_defaults(scopes, modified):
+    defaults = {VERSION_KEY.format(scope=scope): _initial_version for scope in scopes}
+    if modified:
+        # A scope never written since the cache was emptied counts as written
+        # now, which only costs clients a full response.
+        defaults.update(
+            {MODIFIED_KEY.format(scope=scope): time.time for scope in scopes}
+        )
+    return defaults
+
+
+def _split(scopes, values, modified):
+    versions = [values[VERSION_KEY.format(scope=scope)] for scope in scopes]
+    if not modified:
+        return versions
+    return versions, [values[MODIFIED_KEY.format(scope=scope)] for scope in scopes]
+
+
+def get_versions(scopes, modified=False):
+    # With modified=True, also returns when each scope was last written, read
+    # in the same round trip.
+    values = _get_seeded(_version_defaults(scopes, modified))
+    return _split(scopes, values, modified)
+
+
+async def aget_versions(scopes, modified=False):
+    values = await _aget_seeded(_version_defaults(scopes, modified))
+    return _split(scopes, values, modified)
+
+
+def _bump(key):
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
+    except Exception as e:
+        logger.warning("Could not bump cache version %s: %s", key, e)
+
+
+def bump_versions(*scopes):
+    # Marked first: a reader that sees a new version must also see the mark,
+    # or it could build the new version's payload from a lagging replica.
+    mark_written(scopes)
+    for scope in scopes:
+        _bump(VERSION_KEY.format(scope=scope))
+    # Stamped after the bump: a reader must never see the new time with the
+    # old version, or a payload built before the write would be served as
+    # "not modified" since it.
+    try:
+        cache.set_many(
+            {MODIFIED_KEY.format(scope=scope): time.time() for scope in scopes},
+            timeout=None,
+        )
+    except Exception as e:
+        logger.warning("Could not stamp %s as modified: %s", ", ".join(scopes), e)
+
+
+_pending = ContextVar("version_bumps", default=None)
+
+
+def bump_on_commit(*scopes):
+    # For writes made in a transaction, e.g. from signals: the scopes are
+    # bumped once it commits.
+    if not scopes:
+        return
+    pending = _pending.get()
+    if pending is not None:
+        pending.update(scopes)
+    else:
+        transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+@contextmanager
+def collect_version_bumps():
+    # Scopes bumped inside the block (e.g. per row of a queryset delete) are
+    # bumped together, once each, when its transaction commits.
+    scopes = set()
+    token = _pending.set(scopes)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    if scopes:
+        scopes = sorted(scopes)
+        transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+def project_scopes(project_ids):
+    return [f"project:{project_id}" for project_id in set(project_ids) if project_id]
+
+
+def _record(endpoint, outcome):
+    record_cache(outcome)
+    key = STATS_KEY.format(endpoint=endpoint, outcome=outcome)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+    except Exception as e:
+        logger.warning("Could not record cache %s for %s: %s", outcome, endpoint, e)
+
+
+async def _arecord(endpoint, outcome):
+    record_cache(outcome)
+    key = STATS_KEY.format(endpoint=endpoint, outcome=outcome)
+    try:
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aadd(key, 1, timeout=None)
+    except Exception as e:
+        logger.warning("Could not record cache %s for %s: %s", outcome, endpoint, e)
+
+
+def get_stats(endpoints=None):
+    endpoints = endpoints or ENDPOINT_SCOPES.keys()
+    keys = {
+        (endpoint, outcome): STATS_KEY.format(endpoint=endpoint, outcome=outcome)
+        for endpoint in endpoints
+        for outcome in ("hit", "miss")
+    }
+    values = cache.get_many(keys.values())
+    return {
+        endpoint: {
+            outcome: values.get(keys[(endpoint, outcome)], 0)
+            for outcome in ("hit", "miss")
+        }
+        for endpoint in endpoints
+    }
+
+
+def make_key(endpoint, request, versions, scope=""):
+    digest = hashlib.md5(f"{request.build_absolute_uri()}|{scope}".encode()).hexdigest()
+    return PAYLOAD_KEY.format(
+        endpoint=endpoint,
+        versions=".".join(str(version) for version in versions),
+        digest=digest,
+    )
+
+
+def cached_payload(endpoint, request, build, scope="", versions=None):
+    # versions, when given, are those the caller decided where to read from
+    # by; the payload is stored under them even if they have moved on since.
+    try:
+        if versions is None:
+            versions = get_versions(ENDPOINT_SCOPES[endpoint])
+        key = make_key(endpoint, request, versions, scope)
+        payload = cache.get(key)
+    except Exception as e:
+        logger.warning(
+            "Cache unavailable, serving %s from the database: %s", endpoint, e
+        )
+        return build()
+
+    if payload is not None:
+        _record(endpoint, "hit")
+        return payload
+
+    _record(endpoint, "miss")
+    payload = build()
+    try:
+        cache.set(key, payload, timeout=settings.API_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning("Could not cache %s payload: %s", endpoint, e)
+    return payload
+
+
+async def acached_payload(endpoint, request, build, scope="", versions=None):
+    try:
+        if versions is None:
+            versions = await aget_versions(ENDPOINT_SCOPES[endpoint])
+        key = make_key(endpoint, request, versions, scope)
+        payload = await cache.aget(key)
+    except Exception as e:
+        logger.warning(
+            "Cache unavailable, serving %s from the database: %s", endpoint, e
+        )
+        return await build()
+
+    if payload is not None:
+        await _arecord(endpoint, "hit")
+        return payload
+
+    await _arecord(endpoint, "miss")
+    payload = await build()
+    try:
+        await cache.aset(key, payload, timeout=settings.API_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning("Could not cache %s payload: %s", endpoint, e)
+    return payload
+
+
+UNREAD_COUNT_KEY = "notifications:unread:{user_id}:{version}"
+
+
+def inbox_scope(user_id):
+    return f"inbox:{user_id}"
+
+
+def get_unread_count(user_id):
+    # Keyed by the inbox version, so a count taken before a concurrent write
+    # is stored under a version that the write has already retired.
+    try:
+        [version] = get_versions([inbox_scope(user_id)])
+        key = UNREAD_COUNT_KEY.format(user_id=user_id, version=version)
+        count = cache.get(key)
+    except Exception as e:
+        logger.warning("Cache unavailable, counting unread notifications: %s", e)
+        count = None
+        key = None
+    if count is None:
+        count = NotificationModel.objects.filter(user_id=user_id, is_read=False).count()
+        if key is not None:
+            cache.add(key, count, timeout=settings.UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def bump_inboxes(user_ids):
+    # Called after notifications are written, read or pruned.
+    for user_id in set(user_ids):
+        _bump(VERSION_KEY.format(scope=inbox_scope(user_id)))
+
+
+def visibility_scope(user_id):
+    return f"visibility:{user_id}"
+
+
+def bump_visibility(user_ids):
+    # Called after the users' project memberships change.
+    for user_id in set(user_ids):
+        _bump(VERSION_KEY.format(scope=visibility_scope(user_id)))
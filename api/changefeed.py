@@ -0,0 +1,154 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+from api.models import ChangeLog, ChangeModels, Milestone, Project, Task
+
+CHANGE_MODELS = {
+    Project: ChangeModels.PROJECT,
+    Task: ChangeModels.TASK,
+    Milestone: ChangeModels.MILESTONE,
+}
+
+_batch = ContextVar("changefeed_entries", default=None)
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def change_entry(instance, deleted=False, project_id=None):
+    model = CHANGE_MODELS[type(instance)]
+    if project_id is None:
+        project_id = (
+            instance.pk if model == ChangeModels.PROJECT else instance.project_id
+        )
+    return ChangeLog(
+        model=model, object_id=instance.pk, project_id=project_id, deleted=deleted
+    )
+
+
+def _write(entries):
+    batch = _batch.get()
+    if batch is not None:
+        batch.extend(entries)
+    elif entries:
+        ChangeLog.objects.bulk_create(entries)
+
+
+def log_changes(instances, deleted=False):
+    # Must run inside the writing transaction so the entry commits (or rolls
+    # back) with the row it describes.
+    _write([change_entry(instance, deleted) for instance in instances])
+
+
+def log_moves(moves):
+    # moves are (instance, project id it was stored with) pairs. A row moved
+    # to another project is also logged under the one it left, so members who
+    # only see that one are told to drop it.
+    _write(
+        [
+            change_entry(instance, project_id=project_id)
+            for instance, project_id in moves
+            if project_id is not None and project_id != instance.project_id
+        ]
+    )
+
+
+def log_project_changes(project_ids, removed_user_ids=()):
+    # Members removed from the projects get an entry each, read by their id.
+    _write(
+        [
+            ChangeLog(
+                model=ChangeModels.PROJECT,
+                object_id=project_id,
+                project_id=project_id,
+                user_id=user_id,
+            )
+            for project_id in set(project_ids)
+            for user_id in set(removed_user_ids) or [None]
+        ]
+    )
+
+
+@contextmanager
+def collect_changes():
+    # Entries logged inside the block (e.g. per row of a queryset delete) are
+    # written with one INSERT when it exits.
+    entries = []
+    token = _batch.set(entries)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+    _write(entries)
+
+
+def current_cursor():
+    return ChangeLog.objects.order_by("-seq").values_list("seq", flat=True).first() or 0
+
+
+def _unsettled_from(since, oldest, through):
+    # A sequence value is taken at INSERT but becomes visible at COMMIT, so a
+    # gap followed by a recent entry may be a transaction still in flight.
+    # Returns the first missing seq of such a gap; the gap is checked over the
+    # whole log, as the missing entry may belong to any project.
+    settle = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+    recent = list(
+        ChangeLog.objects.filter(seq__gt=since, seq__lte=through, created_at__gt=settle)
+        .order_by("seq")
+        .values_list("seq", flat=True)
+    )
+    floor = since if since else (oldest or 1) - 1
+    logged = set(recent)
+    followed = [seq for seq in recent if seq - 1 > floor and seq - 1 not in logged]
+    if not followed:
+        return None
+    present = set(
+        ChangeLog.objects.filter(seq__in=[seq - 1 for seq in followed]).values_list(
+            "seq", flat=True
+        )
+    )
+    for seq in followed:
+        if seq - 1 not in present:
+            return seq - 1
+    return None
+
+
+def read_changes(since, limit, project_ids=None, user_id=None):
+    """
+    Return (latest entry per object, cursor, has_more) for up to limit entries
+    after since. When project_ids is given, only the entries logged under
+    those projects or for user_id are read; the cursor moves past the entries
+    of other projects too.
+    """
+    bounds = ChangeLog.objects.aggregate(oldest=Min("seq"), head=Max("seq"))
+    oldest, head = bounds["oldest"], bounds["head"] or 0
+    if since and oldest is not None and since < oldest - 1:
+        raise CursorExpired()
+    log = ChangeLog.objects.filter(seq__gt=since, seq__lte=head)
+    if project_ids is not None:
+        visible = Q(project_id__in=project_ids)
+        if user_id is not None:
+            visible |= Q(user_id=user_id)
+        log = log.filter(visible)
+    entries = list(
+        log.order_by("seq").values("seq", "model", "object_id", "deleted")[: limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    cursor = entries[-1]["seq"] if has_more else max(head, since)
+    if cursor > since:
+        # Stop before a possible in-flight entry; the next read picks it up
+        # once it settles.
+        unsettled = _unsettled_from(since, oldest, cursor)
+        if unsettled is not None:
+            entries = [entry for entry in entries if entry["seq"] < unsettled]
+            cursor = unsettled - 1
+            has_more = True
+    latest = {}
+    for entry in entries:
+        latest[(entry["model"], entry["object_id"])] = entry
+    return list(latest.values()), cursor, has_more
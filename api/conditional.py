@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import time
+from django.db.models import Count, Max, Q
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from api.cache import (
+    ENDPOINT_SCOPES,
+    get_versions,
+    aget_versions,
+    inbox_scope,
+    project_scopes,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def make_etag(*parts):
+    digest = hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def versions_etag(versions, *parts):
+    # A cache that does not keep values (DummyCache) returns no versions, and a
+    # tag built from those would never change.
+    if any(version is None for version in versions):
+        return None
+    return make_etag(*parts, *versions)
+
+
+def http_modified(times):
+    # HTTP dates have whole seconds, so a write earlier in the current second
+    # cannot be told from a later one; Last-Modified waits for it to pass.
+    if not times or any(modified is None for modified in times):
+        return None
+    latest = int(max(times))
+    return latest if latest < int(time.time()) else None
+
+
+def list_validators(endpoint, request, scope=""):
+    """
+    Return the endpoint's cache versions with the ETag and Last-Modified they
+    give: the ETag changes exactly when the payload cached under them would
+    be rebuilt, and Last-Modified is when the newest was bumped. Costs no
+    query; all three are None when the cache is unavailable.
+    """
+    try:
+        versions, modified = get_versions(ENDPOINT_SCOPES[endpoint], modified=True)
+    except Exception as e:
+        logger.warning(
+            "Cache unavailable, tagging %s from the database: %s", endpoint, e
+        )
+        return None, None, None
+    etag = versions_etag(versions, endpoint, request.get_full_path(), scope)
+    return versions, etag, http_modified(modified)
+
+
+async def alist_validators(endpoint, request, scope=""):
+    try:
+        versions, modified = await aget_versions(
+            ENDPOINT_SCOPES[endpoint], modified=True
+        )
+    except Exception as e:
+        logger.warning(
+            "Cache unavailable, tagging %s from the database: %s", endpoint, e
+        )
+        return None, None, None
+    etag = versions_etag(versions, endpoint, request.get_full_path(), scope)
+    return versions, etag, http_modified(modified)
+
+
+def project_etag(project_id, request):
+    # Changes whenever the project, its members, tasks or milestones, or any
+    # user is written; see the project scope bumps in api.signals.
+    try:
+        versions = get_versions(project_scopes([project_id]) + ["user"])
+    except Exception as e:
+        logger.warning("Cache unavailable, not tagging project %s: %s", project_id, e)
+        return None
+    return versions_etag(versions, request.get_full_path())
+
+
+def aggregate_etag(queryset, request):
+    # Fallback when the cache is down: one aggregate over the filtered rows.
+    # Changes to related rows (a renamed project in the task list) only show
+    # up once the rows themselves change.
+    row = queryset.order_by().aggregate(last=Max("updated_at"), count=Count("pk"))
+    return make_etag(request.get_full_path(), row["last"], row["count"])
+
+
+async def aaggregate_etag(queryset, request):
+    row = await queryset.order_by().aaggregate(
+        last=Max("updated_at"), count=Count("pk")
+    )
+    return make_etag(request.get_full_path(), row["last"], row["count"])
+
+
+def inbox_etag(user_id, queryset, request):
+    # The inbox version is bumped whenever the user's notifications are
+    # written, marked read or pruned.
+    try:
+        versions = get_versions([inbox_scope(user_id)])
+    except Exception as e:
+        logger.warning(
+            "Cache unavailable, tagging inbox %s from the database: %s", user_id, e
+        )
+        versions = [None]
+    etag = versions_etag(versions, request.get_full_path(), user_id)
+    if etag is not None:
+        return etag
+    # Notifications are only ever added, marked read or pruned, so the newest
+    # id and the two counts identify the inbox state.
+    inbox = queryset.aggregate(
+        last=Max("id"), count=Count("id"), unread=Count("id", filter=Q(is_read=False))
+    )
+    return make_etag(
+        request.get_full_path(), user_id, inbox["last"], inbox["count"], inbox["unread"]
+    )
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if etag is None or not header:
+        return False
+    etags = [tag.removeprefix("W/") for tag in parse_etags(header)]
+    return "*" in etags or etag in etags
+
+
+def not_modified_since(request, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since.
+    if last_modified is None or request.headers.get("If-None-Match"):
+        return False
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return since is not None and int(last_modified) <= since
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag is not None:
+        response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def not_modified(etag=None, last_modified=None):
+    return set_validators(HttpResponseNotModified(), etag, last_modified)
@@ -0,0 +1,160 @@
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+from api.models import Status
+
+TRUE_VALUES = {"true", "1", "yes"}
+FALSE_VALUES = {"false", "0", "no"}
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError({name: "A valid integer is required."})
+
+
+def _date_param(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise serializers.ValidationError({name: "Date must be in YYYY-MM-DD format."})
+    return parsed
+
+
+def _bool_param(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise serializers.ValidationError({name: "Must be true or false."})
+
+
+def _page_size_param(params, default, maximum):
+    page_size = _int_param(params, "page_size") or default
+    if page_size < 1:
+        raise serializers.ValidationError({"page_size": "Must be positive."})
+    return min(page_size, maximum)
+
+
+def sync_params(params, default_page_size, max_page_size):
+    since = _int_param(params, "since")
+    if since is not None and since < 0:
+        raise serializers.ValidationError({"since": "Must not be negative."})
+    return since, _page_size_param(params, default_page_size, max_page_size)
+
+
+def search_params(params, kinds, default_page_size, max_page_size):
+    query = (params.get("q") or "").strip()
+    if not query:
+        raise serializers.ValidationError({"q": "A search query is required."})
+    selected = [kind.strip() for kind in (params.get("kind") or "").split(",")]
+    selected = [kind for kind in selected if kind]
+    unknown = [kind for kind in selected if kind not in kinds]
+    if unknown:
+        raise serializers.ValidationError(
+            {
+                "kind": f"Unknown kinds {', '.join(unknown)}; choose from {', '.join(kinds)}."
+            }
+        )
+    page = _int_param(params, "page") or 1
+    if page < 1:
+        raise serializers.ValidationError({"page": "Must be positive."})
+    return {
+        "query": query,
+        "kinds": selected,
+        "project": _int_param(params, "project"),
+        "page": page,
+        "page_size": _page_size_param(params, default_page_size, max_page_size),
+    }
+
+
+def fields_param(params, name, allowed, default):
+    value = params.get(name)
+    if value in (None, ""):
+        return list(default)
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise serializers.ValidationError(
+            {
+                name: f"Unknown fields {', '.join(unknown)}; choose from {', '.join(allowed)}."
+            }
+        )
+    return fields
+
+
+def _filter_project_and_user(queryset, params):
+    project = _int_param(params, "project")
+    if project is not None:
+        queryset = queryset.filter(project_id=project)
+    assigned_to = _int_param(params, "assigned_to")
+    if assigned_to is not None:
+        queryset = queryset.filter(assigned_to_id=assigned_to)
+    return queryset
+
+
+def _filter_due_date(queryset, params):
+    due_date_from = _date_param(params, "due_date_from")
+    if due_date_from is not None:
+        queryset = queryset.filter(due_date__gte=due_date_from)
+    due_date_to = _date_param(params, "due_date_to")
+    if due_date_to is not None:
+        queryset = queryset.filter(due_date__lte=due_date_to)
+    return queryset
+
+
+def filter_projects(queryset, params):
+    member = _int_param(params, "member")
+    if member is not None:
+        queryset = queryset.filter(members__id=member)
+    owner = _int_param(params, "owner")
+    if owner is not None:
+        queryset = queryset.filter(owner_id=owner)
+    return queryset
+
+
+def filter_tasks(queryset, params):
+    queryset = _filter_project_and_user(queryset, params)
+    queryset = _filter_due_date(queryset, params)
+    task_status = params.get("status")
+    if task_status:
+        if task_status not in Status.values:
+            raise serializers.ValidationError(
+                {"status": f"Must be one of {', '.join(Status.values)}."}
+            )
+        queryset = queryset.filter(status=task_status)
+    return queryset
+
+
+def filter_milestones(queryset, params):
+    queryset = _filter_project_and_user(queryset, params)
+    queryset = _filter_due_date(queryset, params)
+    is_achieved = _bool_param(params, "is_achieved")
+    if is_achieved is not None:
+        queryset = queryset.filter(is_achieved=is_achieved)
+    return queryset
+
+
+def filter_notifications(queryset, params):
+    is_read = _bool_param(params, "is_read")
+    if is_read is not None:
+        queryset = queryset.filter(is_read=is_read)
+    return queryset
+
+
+def filter_project_summaries(queryset, params):
+    project = _int_param(params, "project")
+    if project is not None:
+        queryset = queryset.filter(project_id=project)
+    return queryset
@@ -0,0 +1,176 @@
+import json
+import math
+import time
+import tracemalloc
+from collections import Counter
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import User, UserRoles, Project, Task
+
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the list and assign-task endpoints through the Django test client and "
+        "write latency percentiles, query counts and peak memory as JSON. "
+        "Run it against a seeded database (see seed_data); assign-task writes to it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument(
+            "--no-cache", action="store_true", help="Bypass the payload cache."
+        )
+        parser.add_argument(
+            "--skip-writes", action="store_true", help="Do not benchmark assign-task."
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        settings_overrides = {"ALLOWED_HOSTS": ["testserver"]}
+        if options["no_cache"]:
+            settings_overrides["CACHES"] = NO_CACHE
+        with override_settings(**settings_overrides):
+            report = self.run(options)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stdout.write(
+                self.style.SUCCESS(f"Report written to {options['output']}.")
+            )
+        else:
+            self.stdout.write(output)
+
+    def client_for(self, role):
+        user = User.objects.filter(role=role, is_active=True).order_by("id").first()
+        if user is None:
+            raise CommandError(f"No active {role} user; run seed_data first.")
+        return Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+    def run(self, options):
+        member = self.client_for(UserRoles.MEMBER)
+        page_size = options["page_size"]
+        project = Project.objects.order_by("id").first()
+        cases = [
+            ("projects", member, "get", f"/api/projects/?page_size={page_size}"),
+            ("tasks", member, "get", f"/api/tasks/?page_size={page_size}"),
+            ("milestones", member, "get", f"/api/milestones/?page_size={page_size}"),
+        ]
+        if project is not None:
+            cases.append(
+                (
+                    "tasks_filtered",
+                    member,
+                    "get",
+                    f"/api/tasks/?page_size={page_size}&project={project.id}&status=IN_PROGRESS",
+                )
+            )
+        endpoints = {}
+        for name, client, method, path in cases:
+            endpoints[name] = self.measure(
+                options, lambda: getattr(client, method)(path)
+            )
+        if not options["skip_writes"]:
+            endpoints["assign_task"] = self.measure_assign(options)
+        return {
+            "meta": {
+                "vendor": connection.vendor,
+                "requests": options["requests"],
+                "warmup": options["warmup"],
+                "page_size": page_size,
+                "cache": not options["no_cache"],
+                "rows": {
+                    "users": User.objects.count(),
+                    "projects": Project.objects.count(),
+                    "tasks": Task.objects.count(),
+                },
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            },
+            "endpoints": endpoints,
+        }
+
+    def measure_assign(self, options):
+        manager = self.client_for(UserRoles.MANAGER)
+        total = options["warmup"] + options["requests"]
+        assignments = []
+        tasks = Task.objects.order_by("id").values_list("id", "project_id")[: total * 5]
+        members = {}
+        for task_id, project_id in tasks:
+            if project_id not in members:
+                members[project_id] = list(
+                    Project.members.through.objects.filter(
+                        project_id=project_id
+                    ).values_list("user_id", flat=True)[:5]
+                )
+            if members[project_id]:
+                user_id = members[project_id][
+                    len(assignments) % len(members[project_id])
+                ]
+                assignments.append({"task": task_id, "assigned_to": user_id})
+            if len(assignments) == total:
+                break
+        if not assignments:
+            return {"skipped": "No task belongs to a project with members."}
+        payloads = iter(assignments * (total // len(assignments) + 1))
+        return self.measure(
+            options,
+            lambda: manager.put(
+                "/api/assign-task/",
+                data=json.dumps(next(payloads)),
+                content_type="application/json",
+            ),
+        )
+
+    def measure(self, options, send):
+        for _ in range(options["warmup"]):
+            send()
+        latencies = []
+        queries = []
+        statuses = Counter()
+        sizes = []
+        tracemalloc.start()
+        try:
+            for _ in range(options["requests"]):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = send()
+                    latencies.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+                statuses[response.status_code] += 1
+                sizes.append(len(response.content))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            "requests": len(latencies),
+            "status_codes": {str(code): count for code, count in statuses.items()},
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies), 3),
+                "p50": round(percentile(latencies, 50), 3),
+                "p90": round(percentile(latencies, 90), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "max": round(max(latencies), 3),
+            },
+            "queries": {
+                "mean": round(sum(queries) / len(queries), 2),
+                "max": max(queries),
+            },
+            "response_bytes": {"mean": round(sum(sizes) / len(sizes))},
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
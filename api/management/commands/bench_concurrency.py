@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import add_role_claims
+from api.management.commands.bench_api import NO_CACHE, percentile
+from api.models import User, UserRoles
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the same list request from many concurrent clients, once through the "
+        "sync view on a fixed pool of WSGI-style worker threads and once through the "
+        "async view on one event loop, and report throughput and latency percentiles. "
+        "The sync-only debug toolbar middleware is left out of both runs. "
+        "Run it against a seeded database (see seed_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=20, help="Per client.")
+        parser.add_argument(
+            "--workers", type=int, default=4, help="WSGI worker threads."
+        )
+        parser.add_argument("--endpoint", default="tasks")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument(
+            "--query-delay-ms",
+            type=float,
+            default=0,
+            help="Sleep before every query to stand in for a remote database.",
+        )
+        parser.add_argument(
+            "--no-cache", action="store_true", help="Bypass the payload cache."
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(role=UserRoles.MEMBER, is_active=True)
+            .order_by("id")
+            .first()
+        )
+        if user is None:
+            raise CommandError("No active MEMBER user; run seed_data first.")
+        token = add_role_claims(AccessToken.for_user(user), user)
+        self.authorization = f"Bearer {token}"
+        query = f"?page_size={options['page_size']}"
+        settings_overrides = {
+            "ALLOWED_HOSTS": ["testserver"],
+            # A sync-only middleware makes every async request hop to a thread.
+            "MIDDLEWARE": [
+                middleware
+                for middleware in settings.MIDDLEWARE
+                if not middleware.startswith("debug_toolbar.")
+            ],
+        }
+        if options["no_cache"]:
+            settings_overrides["CACHES"] = NO_CACHE
+
+        delay = options["query_delay_ms"] / 1000
+
+        def slow_execute(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            if slow_execute not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_execute)
+
+        if delay:
+            connections.close_all()
+            connection_created.connect(add_delay)
+        try:
+            with override_settings(**settings_overrides):
+                report = {
+                    "meta": {
+                        "vendor": connection.vendor,
+                        "endpoint": options["endpoint"],
+                        "clients": options["clients"],
+                        "requests_per_client": options["requests"],
+                        "workers": options["workers"],
+                        "query_delay_ms": options["query_delay_ms"],
+                        "cache": not options["no_cache"],
+                        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    },
+                    "wsgi": self.run_wsgi(
+                        f"/api/{options['endpoint']}/{query}", options
+                    ),
+                    "asgi": asyncio.run(
+                        self.run_asgi(
+                            f"/api/async/{options['endpoint']}/{query}", options
+                        )
+                    ),
+                }
+        finally:
+            connection_created.disconnect(add_delay)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stdout.write(
+                self.style.SUCCESS(f"Report written to {options['output']}.")
+            )
+        else:
+            self.stdout.write(output)
+
+    def run_wsgi(self, path, options):
+        # Each client waits for a free worker, as it would behind a WSGI server
+        # with a fixed number of threads.
+        def serve():
+            try:
+                started = time.perf_counter()
+                response = Client(HTTP_AUTHORIZATION=self.authorization).get(path)
+                return response.status_code, time.perf_counter() - started
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as workers:
+
+            def client():
+                results = []
+                for _ in range(options["requests"]):
+                    started = time.perf_counter()
+                    status_code, _ = workers.submit(serve).result()
+                    results.append((status_code, time.perf_counter() - started))
+                return results
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["clients"]) as clients:
+                futures = [clients.submit(client) for _ in range(options["clients"])]
+                results = [result for future in futures for result in future.result()]
+            elapsed = time.perf_counter() - started
+        return self.summarize(results, elapsed)
+
+    async def run_asgi(self, path, options):
+        client = AsyncClient()
+        headers = {"Authorization": self.authorization}
+
+        async def serve():
+            results = []
+            for _ in range(options["requests"]):
+                # Like the ASGI handler, give each request its own sync thread.
+                async with ThreadSensitiveContext():
+                    started = time.perf_counter()
+                    response = await client.get(path, headers=headers)
+                    results.append(
+                        (response.status_code, time.perf_counter() - started)
+                    )
+            return results
+
+        started = time.perf_counter()
+        batches = await asyncio.gather(*(serve() for _ in range(options["clients"])))
+        elapsed = time.perf_counter() - started
+        return self.summarize(
+            [result for batch in batches for result in batch], elapsed
+        )
+
+    def summarize(self, results, elapsed):
+        latencies = [duration * 1000 for _, duration in results]
+        statuses = {}
+        for status_code, _ in results:
+            statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+        return {
+            "requests": len(results),
+            "status_codes": statuses,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(results) / elapsed, 1),
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies), 3),
+                "p50": round(percentile(latencies, 50), 3),
+                "p90": round(percentile(latencies, 90), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "max": round(max(latencies), 3),
+            },
+        }
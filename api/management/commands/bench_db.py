@@ -0,0 +1,223 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import add_role_claims
+from api.management.commands.bench_api import NO_CACHE, percentile
+from api.models import Project, Task, User, UserRoles
+
+# Connection settings compared per database vendor.
+MODES = {
+    "sqlite": {
+        "per-request": {"CONN_MAX_AGE": 0, "journal_mode": "DELETE"},
+        "persistent": {"CONN_MAX_AGE": 600, "journal_mode": "DELETE"},
+        "persistent-wal": {"CONN_MAX_AGE": 600, "journal_mode": "WAL"},
+    },
+    "postgresql": {
+        "per-request": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False},
+        "persistent": {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": False},
+        "persistent-health-checks": {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True},
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Send list requests from a fixed pool of WSGI-style worker threads once per "
+        "database connection mode (per-request connections, persistent connections "
+        "and, on SQLite, WAL; on PostgreSQL, health checks) and report requests/sec "
+        "and latency percentiles for each. Run it against a seeded database (see "
+        "seed_data); --write-every adds assign-task writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=100, help="Per worker.")
+        parser.add_argument("--endpoint", default="projects")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument(
+            "--write-every",
+            type=int,
+            default=0,
+            help="Make every Nth request of each worker an assign-task write.",
+        )
+        parser.add_argument(
+            "--modes", nargs="+", help="Modes to run; all of this vendor's by default."
+        )
+        parser.add_argument(
+            "--cache",
+            action="store_true",
+            help="Serve lists through the payload cache instead of the database.",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        modes = MODES.get(connection.vendor)
+        if modes is None:
+            raise CommandError(f"No connection modes for {connection.vendor}.")
+        selected = options["modes"] or list(modes)
+        unknown = set(selected) - set(modes)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}.")
+        self.member = self.authorization(UserRoles.MEMBER)
+        self.manager = None
+        self.assignment = None
+        if options["write_every"]:
+            self.manager = self.authorization(UserRoles.MANAGER)
+            self.assignment = self.find_assignment()
+
+        settings_overrides = {
+            "ALLOWED_HOSTS": ["testserver"],
+            "MIDDLEWARE": [
+                middleware
+                for middleware in settings.MIDDLEWARE
+                if not middleware.startswith("debug_toolbar.")
+            ],
+        }
+        if not options["cache"]:
+            settings_overrides["CACHES"] = NO_CACHE
+        path = f"/api/{options['endpoint']}/?page_size={options['page_size']}"
+        report = {
+            "meta": {
+                "vendor": connection.vendor,
+                "endpoint": options["endpoint"],
+                "workers": options["workers"],
+                "requests_per_worker": options["requests"],
+                "write_every": options["write_every"],
+                "cache": options["cache"],
+                "rows": {"tasks": Task.objects.count()},
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            },
+            "modes": {},
+        }
+        database = connections.settings[DEFAULT_DB_ALIAS]
+        saved = {
+            key: database.get(key) for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS")
+        }
+        try:
+            with override_settings(**settings_overrides):
+                for name in selected:
+                    report["modes"][name] = self.run_mode(
+                        database, modes[name], path, options
+                    )
+        finally:
+            database.update(saved)
+            connections.close_all()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stdout.write(
+                self.style.SUCCESS(f"Report written to {options['output']}.")
+            )
+        else:
+            self.stdout.write(output)
+
+    def authorization(self, role):
+        user = User.objects.filter(role=role, is_active=True).order_by("id").first()
+        if user is None:
+            raise CommandError(f"No active {role} user; run seed_data first.")
+        return f"Bearer {add_role_claims(AccessToken.for_user(user), user)}"
+
+    def find_assignment(self):
+        membership = (
+            Project.members.through.objects.filter(
+                project__in=Task.objects.values("project_id")
+            )
+            .order_by("project_id")
+            .first()
+        )
+        if membership is None:
+            raise CommandError("No task belongs to a project with members.")
+        task = (
+            Task.objects.filter(project_id=membership.project_id).order_by("id").first()
+        )
+        return json.dumps({"task": task.id, "assigned_to": membership.user_id})
+
+    def run_mode(self, database, mode, path, options):
+        # Connections only pick up new settings when they are opened, and the
+        # journal mode can only change while nothing else has the file open.
+        connections.close_all()
+        for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS"):
+            if key in mode:
+                database[key] = mode[key]
+        journal = {}
+        if "journal_mode" in mode:
+            journal["SQLITE_JOURNAL_MODE"] = mode["journal_mode"]
+
+        opened = []
+        lock = threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            with lock:
+                opened.append(connection.alias)
+
+        def worker():
+            member = Client(HTTP_AUTHORIZATION=self.member)
+            manager = self.manager and Client(HTTP_AUTHORIZATION=self.manager)
+            results = []
+            try:
+                for number in range(1, options["requests"] + 1):
+                    started = time.perf_counter()
+                    if options["write_every"] and number % options["write_every"] == 0:
+                        response = manager.put(
+                            "/api/assign-task/",
+                            data=self.assignment,
+                            content_type="application/json",
+                        )
+                    else:
+                        response = member.get(path)
+                    # The test client leaves connections open; a WSGI handler
+                    # closes the expired ones when each request finishes.
+                    close_old_connections()
+                    results.append(
+                        (response.status_code, time.perf_counter() - started)
+                    )
+            finally:
+                connections.close_all()
+            return results
+
+        with override_settings(**journal):
+            connection.ensure_connection()
+            connections.close_all()
+            connection_created.connect(count_connection)
+            try:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options["workers"]) as workers:
+                    futures = [
+                        workers.submit(worker) for _ in range(options["workers"])
+                    ]
+                    results = [
+                        result for future in futures for result in future.result()
+                    ]
+                elapsed = time.perf_counter() - started
+            finally:
+                connection_created.disconnect(count_connection)
+        return self.summarize(results, elapsed, len(opened))
+
+    def summarize(self, results, elapsed, opened):
+        latencies = [duration * 1000 for _, duration in results]
+        statuses = {}
+        for status_code, _ in results:
+            statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+        return {
+            "requests": len(results),
+            "status_codes": statuses,
+            "connections_opened": opened,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(results) / elapsed, 1),
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies), 3),
+                "p50": round(percentile(latencies, 50), 3),
+                "p90": round(percentile(latencies, 90), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "max": round(max(latencies), 3),
+            },
+        }
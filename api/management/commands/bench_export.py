@@ -0,0 +1,137 @@
+import json
+import os
+import resource
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import add_role_claims
+from api.models import User, UserRoles, Task, Milestone, Project
+from api.serializers import TaskSerializer
+from api.views import TaskExportView
+
+MODELS = {"tasks": Task, "milestones": Milestone, "projects": Project}
+
+
+def current_rss():
+    # Resident set size in bytes; falls back to the peak where /proc is missing.
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream an export endpoint through the Django test client and report rows, "
+        "bytes, elapsed time and resident memory sampled per chunk. With --baseline "
+        "the same rows are also built as one in-memory list, as the JSON envelope "
+        "would, for comparison. Seed the rows first, e.g. "
+        "seed_data --tasks 1000000."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", default="tasks", choices=list(MODELS))
+        parser.add_argument(
+            "--formats", default="csv,ndjson", help="Comma-separated export formats."
+        )
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument(
+            "--baseline",
+            action="store_true",
+            help="Also load every task row into memory at once (tasks only).",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(role=UserRoles.MANAGER, is_active=True)
+            .order_by("id")
+            .first()
+        )
+        if user is None:
+            raise CommandError("No active MANAGER user; run seed_data first.")
+        token = add_role_claims(AccessToken.for_user(user), user)
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        chunk_size = options["chunk_size"] or settings.API_EXPORT_CHUNK_SIZE
+        settings_overrides = {
+            "ALLOWED_HOSTS": ["testserver"],
+            "API_EXPORT_CHUNK_SIZE": chunk_size,
+            # The toolbar records every query of the request in memory.
+            "MIDDLEWARE": [
+                middleware
+                for middleware in settings.MIDDLEWARE
+                if not middleware.startswith("debug_toolbar.")
+            ],
+        }
+        report = {
+            "meta": {
+                "vendor": connection.vendor,
+                "endpoint": options["endpoint"],
+                "rows": MODELS[options["endpoint"]].objects.count(),
+                "chunk_size": chunk_size,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            },
+            "formats": {},
+        }
+        with override_settings(**settings_overrides):
+            for export_format in options["formats"].split(","):
+                report["formats"][export_format] = self.measure_stream(
+                    client,
+                    f"/api/{options['endpoint']}/export/?export_format={export_format}",
+                )
+        if options["baseline"]:
+            report["baseline"] = self.measure_baseline()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stdout.write(
+                self.style.SUCCESS(f"Report written to {options['output']}.")
+            )
+        else:
+            self.stdout.write(output)
+
+    def measure_stream(self, client, path):
+        started_rss = peak_rss = current_rss()
+        started = time.perf_counter()
+        response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f"{path} returned {response.status_code}.")
+        size = lines = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+            peak_rss = max(peak_rss, current_rss())
+        response.close()
+        return self.summarize(time.perf_counter() - started, started_rss, peak_rss) | {
+            "lines": lines,
+            "bytes": size,
+        }
+
+    def measure_baseline(self):
+        started_rss = current_rss()
+        started = time.perf_counter()
+        fields = TaskExportView.export_fields
+        rows = TaskSerializer.values_data(
+            TaskSerializer.values_queryset(Task.objects.order_by("id"), fields), fields
+        )
+        body = json.dumps({"data": rows}, default=str)
+        peak_rss = current_rss()
+        size = len(body)
+        del rows, body
+        return self.summarize(time.perf_counter() - started, started_rss, peak_rss) | {
+            "bytes": size
+        }
+
+    def summarize(self, elapsed, started_rss, peak_rss):
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "rss_start_mb": round(started_rss / 2**20, 1),
+            "rss_peak_mb": round(peak_rss / 2**20, 1),
+            "rss_growth_mb": round((peak_rss - started_rss) / 2**20, 1),
+        }
@@ -0,0 +1,115 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils.http import urlencode
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import add_role_claims
+from api.management.commands.bench_api import percentile
+from api.models import SearchEntry, User, UserRoles
+from api.search import LikeSearchBackend, get_backend, search_terms
+
+# Matched against seed_data names such as "seed task 4242" and descriptions
+# such as "Synthetic task 4242 of seed project 7": a rare exact term, a rare
+# prefix, a common word, a word in every entry and a multi-term query.
+DEFAULT_QUERIES = ["4242", "42424", "milestone", "synthetic", "project 7 task 99"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time /api/search/ through the Django test client for a few queries and "
+        "report latency percentiles and result counts; --baseline also times the "
+        "unindexed LIKE backend on the same queries. Run it against a seeded "
+        "database, e.g. seed_data --tasks 1000000."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--query", action="append", help="Query to time; repeat for more."
+        )
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument(
+            "--role",
+            default=UserRoles.MEMBER,
+            choices=UserRoles.values,
+            help="Members are limited to their projects.",
+        )
+        parser.add_argument("--baseline", action="store_true")
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(role=options["role"], is_active=True)
+            .order_by("id")
+            .first()
+        )
+        if user is None:
+            raise CommandError(
+                f"No active {options['role']} user; run seed_data first."
+            )
+        token = add_role_claims(AccessToken.for_user(user), user)
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        member_id = user.id if user.role == UserRoles.MEMBER else None
+        report = {
+            "meta": {
+                "vendor": connection.vendor,
+                "backend": type(get_backend()).__name__,
+                "entries": SearchEntry.objects.count(),
+                "role": options["role"],
+                "page_size": options["page_size"],
+                "requests": options["requests"],
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            },
+            "queries": {},
+        }
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for query in options["query"] or DEFAULT_QUERIES:
+                path = "/api/search/?" + urlencode(
+                    {"q": query, "page_size": options["page_size"]}
+                )
+                result = {"endpoint": self.measure(options, lambda: client.get(path))}
+                if options["baseline"]:
+                    backend = LikeSearchBackend()
+                    terms = search_terms(query)
+                    result["baseline"] = self.measure(
+                        options,
+                        lambda: backend.search(
+                            terms, options["page_size"], member_id=member_id
+                        ),
+                    )
+                report["queries"][query] = result
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stdout.write(
+                self.style.SUCCESS(f"Report written to {options['output']}.")
+            )
+        else:
+            self.stdout.write(output)
+
+    def measure(self, options, send):
+        for _ in range(options["warmup"]):
+            send()
+        latencies = []
+        for _ in range(options["requests"]):
+            started = time.perf_counter()
+            result = send()
+            latencies.append((time.perf_counter() - started) * 1000)
+        if hasattr(result, "status_code"):
+            if result.status_code != 200:
+                raise CommandError(f"Search returned {result.status_code}.")
+            result = json.loads(result.content)["data"]
+        return {
+            "results": len(result),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 3),
+                "p90": round(percentile(latencies, 90), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "max": round(max(latencies), 3),
+            },
+        }
@@ -0,0 +1,123 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+from api.models import User, Project, Task, Milestone
+from api.renderers import FastJSONRenderer
+from api.serializers import ProjectSerializer, TaskSerializer, MilestoneSerializer
+from api.views import ProjectView, TaskView, MilestoneView
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of the ModelSerializer and values() list serialization paths."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--existing",
+            action="store_true",
+            help="Benchmark the rows already in the database instead of seeding.",
+        )
+
+    def handle(self, *args, **options):
+        if options["existing"]:
+            self.run(options["repeat"])
+            return
+        with transaction.atomic():
+            self.seed(options["rows"])
+            self.run(options["repeat"])
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        user = User.objects.create(
+            email="bench@example.com", username="bench-serializers", role="ADMIN"
+        )
+        projects = Project.objects.bulk_create(
+            Project(name=f"bench project {i}", owner=user, created_by=user)
+            for i in range(max(rows // 100, 1))
+        )
+        Project.members.through.objects.bulk_create(
+            Project.members.through(project_id=project.id, user_id=user.id)
+            for project in projects
+        )
+        Task.objects.bulk_create(
+            Task(
+                project=projects[i % len(projects)],
+                name=f"bench task {i}",
+                description="benchmark task",
+                assigned_to=user,
+                created_by=user,
+            )
+            for i in range(rows)
+        )
+        Milestone.objects.bulk_create(
+            Milestone(
+                project=projects[i % len(projects)],
+                name=f"bench milestone {i}",
+                created_by=user,
+            )
+            for i in range(rows)
+        )
+
+    def run(self, repeat):
+        cases = [
+            (
+                "projects",
+                ProjectSerializer,
+                ProjectView.list_fields,
+                Project.objects.prefetch_related(
+                    Prefetch(
+                        "members", queryset=User.objects.only("id", "username", "email")
+                    )
+                ),
+                Project.objects.all(),
+            ),
+            (
+                "tasks",
+                TaskSerializer,
+                TaskView.list_fields,
+                Task.objects.select_related("project", "assigned_to"),
+                Task.objects.all(),
+            ),
+            (
+                "milestones",
+                MilestoneSerializer,
+                MilestoneView.list_fields,
+                Milestone.objects.select_related("project"),
+                Milestone.objects.all(),
+            ),
+        ]
+        for name, serializer_class, fields, model_queryset, queryset in cases:
+            rows = queryset.count()
+            if not rows:
+                continue
+
+            def serializer_path():
+                data = serializer_class(
+                    model_queryset.all(), many=True, fields=fields
+                ).data
+                return JSONRenderer().render({"data": data})
+
+            def values_path():
+                values = serializer_class.values_queryset(queryset.all(), fields)
+                data = serializer_class.values_data(values, fields)
+                return FastJSONRenderer().render({"data": data})
+
+            before = self.best_of(serializer_path, repeat)
+            after = self.best_of(values_path, repeat)
+            self.stdout.write(
+                f"{name}: {rows} rows, serializer {rows / before:,.0f} rows/s, "
+                f"values {rows / after:,.0f} rows/s ({before / after:.1f}x)"
+            )
+
+    def best_of(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,48 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api.summaries import rebuild_summaries, check_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-project task and milestone counts behind "
+        "/api/projects/stats/ from the Task and Milestone tables. With --check, "
+        "only compare them and fail if any count has drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Report mismatches without writing; exit non-zero if any.",
+        )
+        parser.add_argument(
+            "--project", type=int, action="append", help="Limit to these project ids."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["check"]:
+            mismatches = check_summaries(options["project"], options["batch_size"])
+            for mismatch in mismatches[:100]:
+                self.stdout.write(
+                    "project {project} {column}: expected {expected}, stored {actual}".format(
+                        **mismatch
+                    )
+                )
+            if mismatches:
+                raise CommandError(
+                    f"{len(mismatches)} summary counts are out of date; "
+                    "run rebuild_project_summaries to fix them."
+                )
+            self.stdout.write(self.style.SUCCESS("Project summaries are consistent."))
+            return
+        with transaction.atomic():
+            rebuilt = rebuild_summaries(options["project"], options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {rebuilt} project summaries in {time.perf_counter() - started:.1f}s."
+            )
+        )
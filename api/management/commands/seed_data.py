@@ -0,0 +1,172 @@
+import random
+import time
+from datetime import date, timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from api.cache import bump_versions
+from api.search import rebuild_search_index
+from api.summaries import rebuild_summaries
+from api.models import (
+    User,
+    UserRoles,
+    Project,
+    Task,
+    Milestone,
+    Notification as NotificationModel,
+    Status,
+)
+
+
+class Command(BaseCommand):
+    help = "Seed the database with synthetic users, projects, tasks, milestones and notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--projects", type=int, default=50)
+        parser.add_argument("--members-per-project", type=int, default=10)
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument("--milestones", type=int, default=1000)
+        parser.add_argument("--notifications", type=int, default=10000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix for generated names, so several seeds can coexist.",
+        )
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--random-seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["random_seed"])
+        self.batch_size = options["batch_size"]
+        prefix = options["prefix"]
+        started = time.perf_counter()
+        with transaction.atomic():
+            users = self.seed_users(prefix, options["users"], options["password"])
+            admin = users[0]
+            projects = self.seed_projects(
+                prefix,
+                options["projects"],
+                options["members_per_project"],
+                admin,
+                users,
+            )
+            self.seed_tasks(prefix, options["tasks"], admin, projects)
+            self.seed_milestones(prefix, options["milestones"], admin, projects)
+            self.seed_notifications(options["notifications"], users)
+            # bulk_create sends no signals, so the summaries and the search
+            # index are built in one pass.
+            rebuild_summaries([project.id for project in projects])
+            rebuild_search_index()
+        bump_versions("user", "project", "task", "milestone")
+        self.stdout.write(
+            self.style.SUCCESS(f"Seeded in {time.perf_counter() - started:.1f}s.")
+        )
+
+    def bulk_create(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.stdout.write(f"{model.__name__}: {len(created)}")
+        return created
+
+    def seed_users(self, prefix, count, password):
+        password = make_password(password)
+        roles = [UserRoles.ADMIN, UserRoles.MANAGER] + [UserRoles.MEMBER] * 8
+        return self.bulk_create(
+            User,
+            [
+                User(
+                    email=f"{prefix}-user{i}@example.com",
+                    username=f"{prefix}-user{i}",
+                    password=password,
+                    role=UserRoles.ADMIN if i == 0 else roles[i % len(roles)],
+                )
+                for i in range(max(count, 1))
+            ],
+        )
+
+    def seed_projects(self, prefix, count, members_per_project, admin, users):
+        projects = self.bulk_create(
+            Project,
+            [
+                Project(
+                    name=f"{prefix} project {i}",
+                    description=f"Synthetic project {i}",
+                    owner=admin,
+                    created_by=admin,
+                )
+                for i in range(max(count, 1))
+            ],
+        )
+        memberships = []
+        self.members = {}
+        for project in projects:
+            members = self.random.sample(users, min(members_per_project, len(users)))
+            self.members[project.id] = members
+            memberships.extend(
+                Project.members.through(project_id=project.id, user_id=member.id)
+                for member in members
+            )
+        self.bulk_create(Project.members.through, memberships)
+        return projects
+
+    def random_due_date(self):
+        return date.today() + timedelta(days=self.random.randint(-60, 120))
+
+    def random_assignee(self, project):
+        members = self.members[project.id]
+        if not members or self.random.random() < 0.1:
+            return None
+        return self.random.choice(members)
+
+    def seed_tasks(self, prefix, count, admin, projects):
+        tasks = []
+        for i in range(count):
+            project = self.random.choice(projects)
+            tasks.append(
+                Task(
+                    project=project,
+                    name=f"{prefix} task {i}",
+                    description=f"Synthetic task {i} of {project.name}",
+                    assigned_to=self.random_assignee(project),
+                    status=self.random.choice(Status.values),
+                    due_date=self.random_due_date(),
+                    created_by=admin,
+                )
+            )
+        self.bulk_create(Task, tasks)
+
+    def seed_milestones(self, prefix, count, admin, projects):
+        milestones = []
+        for i in range(count):
+            project = self.random.choice(projects)
+            milestones.append(
+                Milestone(
+                    project=project,
+                    name=f"{prefix} milestone {i}",
+                    description=f"Synthetic milestone {i} of {project.name}",
+                    assigned_to=self.random_assignee(project),
+                    is_achieved=self.random.random() < 0.3,
+                    due_date=self.random_due_date(),
+                    created_by=admin,
+                )
+            )
+        self.bulk_create(Milestone, milestones)
+
+    def seed_notifications(self, count, users):
+        # Marked as emailed so the digest job does not mail synthetic users.
+        now = timezone.now()
+        self.bulk_create(
+            NotificationModel,
+            [
+                NotificationModel(
+                    user=self.random.choice(users),
+                    subject="Synthetic notification.",
+                    body=f"Synthetic notification {i}.",
+                    is_read=self.random.random() < 0.5,
+                    emailed_at=now,
+                )
+                for i in range(count)
+            ],
+        )
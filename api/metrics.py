@@ -0,0 +1,176 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_CAPTURED_SQL = 100
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self, capture_sql=False):
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_time = 0.0
+        self.sql = [] if capture_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper() for the duration of a request.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.query_time += elapsed
+            if self.sql is not None and len(self.sql) < MAX_CAPTURED_SQL:
+                self.sql.append((elapsed, sql))
+
+
+class Registry:
+    # Per-process; each worker exposes its own series.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}
+
+    def observe(self, endpoint, method, status, duration, metrics, response_bytes):
+        key = (endpoint, method, str(status))
+        with self.lock:
+            series = self.requests.get(key)
+            if series is None:
+                series = self.requests[key] = {
+                    "buckets": [0] * len(LATENCY_BUCKETS),
+                    "count": 0,
+                    "duration": 0.0,
+                    "queries": 0,
+                    "query_time": 0.0,
+                    "cache_hits": 0,
+                    "cache_misses": 0,
+                    "serializer_time": 0.0,
+                    "response_bytes": 0,
+                }
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    series["buckets"][index] += 1
+            series["count"] += 1
+            series["duration"] += duration
+            series["queries"] += metrics.queries
+            series["query_time"] += metrics.query_time
+            series["cache_hits"] += metrics.cache_hits
+            series["cache_misses"] += metrics.cache_misses
+            series["serializer_time"] += metrics.serializer_time
+            series["response_bytes"] += response_bytes
+
+    def render(self):
+        counters = [
+            (
+                "api_db_queries_total",
+                "counter",
+                "Database queries run by API requests.",
+                "queries",
+            ),
+            (
+                "api_db_query_seconds_total",
+                "counter",
+                "Time spent in database queries.",
+                "query_time",
+            ),
+            ("api_cache_hits_total", "counter", "Payload cache hits.", "cache_hits"),
+            (
+                "api_cache_misses_total",
+                "counter",
+                "Payload cache misses.",
+                "cache_misses",
+            ),
+            (
+                "api_serializer_seconds_total",
+                "counter",
+                "Time spent serializing responses.",
+                "serializer_time",
+            ),
+            (
+                "api_response_bytes_total",
+                "counter",
+                "Response body bytes.",
+                "response_bytes",
+            ),
+        ]
+        with self.lock:
+            requests = {
+                key: dict(series, buckets=list(series["buckets"]))
+                for key, series in self.requests.items()
+            }
+
+        lines = [
+            "# HELP api_request_duration_seconds API request latency.",
+            "# TYPE api_request_duration_seconds histogram",
+        ]
+        for (endpoint, method, status), series in sorted(requests.items()):
+            labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+            for bound, count in zip(LATENCY_BUCKETS, series["buckets"]):
+                lines.append(
+                    f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}'
+                )
+            lines.append(
+                f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}'
+            )
+            lines.append(
+                f"api_request_duration_seconds_sum{{{labels}}} {series['duration']}"
+            )
+            lines.append(
+                f"api_request_duration_seconds_count{{{labels}}} {series['count']}"
+            )
+        for name, kind, description, field in counters:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (endpoint, method, status), series in sorted(requests.items()):
+                labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+                lines.append(f"{name}{{{labels}}} {series[field]}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def track(capture_sql=False):
+    metrics = RequestMetrics(capture_sql=capture_sql)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def record_cache(outcome):
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if outcome == "hit":
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+@contextmanager
+def serializer_timer():
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
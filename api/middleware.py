@@ -0,0 +1,151 @@
+import logging
+import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from api import metrics
+from api.notifications import collect, acollect
+from api.replicas import replica_alias, user_scope, mark_written, amark_written
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with collect():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with acollect():
+            return await self.get_response(request)
+
+
+class ReplicaMiddleware:
+    # Keeps a user's reads on the primary for a while after they write, so
+    # they see their own changes before the replica does.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if replica_alias() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.wrote(request):
+            mark_written([user_scope(request.user.id)])
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.wrote(request):
+            await amark_written([user_scope(request.user.id)])
+        return response
+
+    def wrote(self, request):
+        # DRF and the async views set request.user to the token's user.
+        user = getattr(request, "user", None)
+        return (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            and user is not None
+            and user.is_authenticated
+        )
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.API_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.slow_request_seconds = None
+        if settings.API_SLOW_REQUEST_MS:
+            self.slow_request_seconds = settings.API_SLOW_REQUEST_MS / 1000
+        self.capture_sql = (
+            self.slow_request_seconds is not None and settings.API_SLOW_REQUEST_SQL
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            request_metrics = stack.enter_context(
+                metrics.track(capture_sql=self.capture_sql)
+            )
+            self.install_wrappers(stack, request_metrics)
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        return self.observe(request, response, duration, request_metrics)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with metrics.track(capture_sql=self.capture_sql) as request_metrics:
+            # The async ORM runs its queries on the request's sync thread, so
+            # the wrappers have to be installed on that thread's connections.
+            stack = ExitStack()
+            await sync_to_async(self.install_wrappers)(stack, request_metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        duration = time.perf_counter() - started
+        return self.observe(request, response, duration, request_metrics)
+
+    def install_wrappers(self, stack, request_metrics):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(request_metrics))
+
+    def observe(self, request, response, duration, request_metrics):
+        match = request.resolver_match
+        endpoint = match.url_name if match and match.url_name else "unmatched"
+        if endpoint == "metrics":
+            return response
+        response_bytes = 0 if response.streaming else len(response.content)
+        metrics.registry.observe(
+            endpoint,
+            request.method,
+            response.status_code,
+            duration,
+            request_metrics,
+            response_bytes,
+        )
+        if (
+            self.slow_request_seconds is not None
+            and duration >= self.slow_request_seconds
+        ):
+            statements = "\n".join(
+                f"  {elapsed * 1000:.1f}ms {sql}"
+                for elapsed, sql in request_metrics.sql or []
+            )
+            logger.warning(
+                "Slow request %s %s took %.1fms with %d queries (%.1fms).\n%s",
+                request.method,
+                request.get_full_path(),
+                duration * 1000,
+                request_metrics.queries,
+                request_metrics.query_time * 1000,
+                statements,
+            )
+        return response
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:12
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_as_emailed(apps, schema_editor):
+    # Rows created before the digest pipeline were emailed one by one already.
+    Notification = apps.get_model("api", "Notification")
+    Notification.objects.update(emailed_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='emailed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_as_emailed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:29
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Count
+
+STATUS_COLUMNS = {
+    "NOT_YET_STARTED": "not_yet_started",
+    "IN_PROGRESS": "in_progress",
+    "COMPLETED": "completed",
+    "ON_HOLD": "on_hold",
+}
+
+
+def build_summaries(apps, schema_editor):
+    Project = apps.get_model("api", "Project")
+    Task = apps.get_model("api", "Task")
+    Milestone = apps.get_model("api", "Milestone")
+    ProjectSummary = apps.get_model("api", "ProjectSummary")
+    counts = defaultdict(dict)
+    for project_id, status, count in (
+        Task.objects.values_list("project_id", "status")
+        .annotate(count=Count("id"))
+        .order_by()
+    ):
+        if status in STATUS_COLUMNS:
+            counts[project_id][STATUS_COLUMNS[status]] = count
+    for project_id, is_achieved, count in (
+        Milestone.objects.values_list("project_id", "is_achieved")
+        .annotate(count=Count("id"))
+        .order_by()
+    ):
+        column = "milestones_achieved" if is_achieved else "milestones_pending"
+        counts[project_id][column] = count
+    ProjectSummary.objects.bulk_create(
+        (
+            ProjectSummary(project_id=project_id, **counts[project_id])
+            for project_id in Project.objects.values_list("id", flat=True)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_notification_is_read"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectSummary",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="api.project",
+                    ),
+                ),
+                ("not_yet_started", models.IntegerField(default=0)),
+                ("in_progress", models.IntegerField(default=0)),
+                ("completed", models.IntegerField(default=0)),
+                ("on_hold", models.IntegerField(default=0)),
+                ("milestones_achieved", models.IntegerField(default=0)),
+                ("milestones_pending", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "due_date"], name="task_project_due_date_idx"
+            ),
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
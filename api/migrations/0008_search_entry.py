@@ -0,0 +1,118 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:46
+
+from django.db import migrations, models
+
+SOURCES = [
+    ("project", "id", "api_project"),
+    ("task", "project_id", "api_task"),
+    ("milestone", "project_id", "api_milestone"),
+]
+
+# Altering api_searchentry on SQLite remakes the table, which drops these
+# triggers; such a migration must recreate them and rebuild the FTS table.
+SQLITE_INDEX = [
+    "CREATE VIRTUAL TABLE api_searchentry_fts USING fts5("
+    "name, description, content='api_searchentry', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO api_searchentry_fts(api_searchentry_fts) VALUES ('rebuild')",
+    "CREATE TRIGGER api_searchentry_fts_insert AFTER INSERT ON api_searchentry BEGIN "
+    "INSERT INTO api_searchentry_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER api_searchentry_fts_delete AFTER DELETE ON api_searchentry BEGIN "
+    "INSERT INTO api_searchentry_fts(api_searchentry_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER api_searchentry_fts_update AFTER UPDATE ON api_searchentry BEGIN "
+    "INSERT INTO api_searchentry_fts(api_searchentry_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO api_searchentry_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    # Document counts per term, used to skip ranking very common terms.
+    "CREATE VIRTUAL TABLE api_searchentry_fts_vocab USING fts5vocab("
+    "api_searchentry_fts, row)",
+]
+SQLITE_DROP = [
+    "DROP TABLE IF EXISTS api_searchentry_fts_vocab",
+    "DROP TRIGGER IF EXISTS api_searchentry_fts_insert",
+    "DROP TRIGGER IF EXISTS api_searchentry_fts_delete",
+    "DROP TRIGGER IF EXISTS api_searchentry_fts_update",
+    "DROP TABLE IF EXISTS api_searchentry_fts",
+]
+POSTGRES_INDEX = [
+    "CREATE INDEX api_searchentry_document_idx ON api_searchentry USING gin (("
+    "setweight(to_tsvector('simple', name), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')))",
+]
+POSTGRES_DROP = ["DROP INDEX IF EXISTS api_searchentry_document_idx"]
+
+
+def fill_entries(apps, schema_editor):
+    for kind, project_column, table in SOURCES:
+        schema_editor.execute(
+            "INSERT INTO api_searchentry (kind, object_id, project_id, name, description) "
+            f"SELECT %s, id, {project_column}, name, description FROM {table}",
+            [kind],
+        )
+
+
+def create_index(apps, schema_editor):
+    # Other databases are searched without an index; see api.search.
+    statements = {"sqlite": SQLITE_INDEX, "postgresql": POSTGRES_INDEX}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    statements = {"sqlite": SQLITE_DROP, "postgresql": POSTGRES_DROP}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_change_log"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("project", "project"),
+                            ("task", "task"),
+                            ("milestone", "milestone"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("project_id", models.BigIntegerField()),
+                ("name", models.CharField(max_length=255)),
+                ("description", models.TextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="searchentry",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "object_id"), name="search_entry_object_unique"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="searchentry",
+            index=models.Index(fields=["project_id"], name="search_entry_project_idx"),
+        ),
+        migrations.RunPython(fill_entries, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_search_entry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SentReminder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("project", "project"),
+                            ("task", "task"),
+                            ("milestone", "milestone"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "reminder",
+                    models.CharField(
+                        choices=[("due_soon", "due soon"), ("overdue", "overdue")],
+                        max_length=10,
+                    ),
+                ),
+                ("due_date", models.DateField()),
+                ("sent_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="milestone",
+            index=models.Index(
+                condition=models.Q(
+                    ("assigned_to__isnull", False), ("is_achieved", False)
+                ),
+                fields=["due_date", "id"],
+                name="milestone_reminder_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(
+                    ("assigned_to__isnull", False),
+                    models.Q(("status", "COMPLETED"), _negated=True),
+                ),
+                fields=["due_date", "id"],
+                name="task_reminder_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="sentreminder",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sent_reminders",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sentreminder",
+            index=models.Index(fields=["due_date"], name="sent_reminder_due_date_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="sentreminder",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "object_id", "user", "reminder", "due_date"),
+                name="sent_reminder_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_reminders"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailFailure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("notification_ids", models.JSONField()),
+                ("subject", models.CharField(max_length=255)),
+                ("error", models.TextField()),
+                ("attempts", models.IntegerField()),
+                ("failed_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="email_failures",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_email_failure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="role_changed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_user_role_changed_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="changelog",
+            index=models.Index(
+                fields=["project_id", "seq"], name="change_log_project_seq_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="changelog",
+            index=models.Index(fields=["created_at"], name="change_log_created_idx"),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_change_log_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="changelog",
+            name="user_id",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name="changelog",
+            index=models.Index(
+                condition=models.Q(("user_id__isnull", False)),
+                fields=["user_id", "seq"],
+                name="change_log_user_seq_idx",
+            ),
+        ),
+    ]
@@ -41,6 +41,9 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     username = models.CharField(max_length=100, unique=True)
     role = models.CharField(max_length=10, choices=UserRoles.choices)
+    # When role or is_active last changed; tokens issued before it are
+    # re-checked against the row.
+    role_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
@@ -60,6 +63,7 @@ class Project(models.Model):
     created_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="created_projects"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -84,11 +88,32 @@ class Task(models.Model):
         null=True,
         blank=True,
     )
-    status = models.TextField(choices=Status.choices, default=Status.NOT_YET_STARTED)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.NOT_YET_STARTED
+    )
     due_date = models.DateField(blank=True, null=True)
     created_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="created_tasks"
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status"], name="task_status_idx"),
+            models.Index(fields=["due_date"], name="task_due_date_idx"),
+            models.Index(fields=["project", "status"], name="task_project_status_idx"),
+            models.Index(
+                fields=["project", "due_date"], name="task_project_due_date_idx"
+            ),
+            # Open, assigned tasks in the (due_date, id) order the reminder
+            # scan pages through; see api.reminders.
+            models.Index(
+                fields=["due_date", "id"],
+                condition=models.Q(assigned_to__isnull=False)
+                & ~models.Q(status=Status.COMPLETED),
+                name="task_reminder_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -112,11 +137,134 @@ class Milestone(models.Model):
     created_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="created_milestones"
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["due_date"], name="milestone_due_date_idx"),
+            models.Index(
+                fields=["project", "is_achieved"], name="milestone_project_achieved_idx"
+            ),
+            models.Index(
+                fields=["due_date", "id"],
+                condition=models.Q(assigned_to__isnull=False, is_achieved=False),
+                name="milestone_reminder_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class ProjectSummary(models.Model):
+    # Denormalized counts kept in step with Task and Milestone writes by
+    # api.summaries; rebuild_project_summaries recomputes them.
+    project = models.OneToOneField(
+        Project, related_name="summary", on_delete=models.CASCADE, primary_key=True
+    )
+    not_yet_started = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    on_hold = models.IntegerField(default=0)
+    milestones_achieved = models.IntegerField(default=0)
+    milestones_pending = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.project_id} summary"
+
+
+class ChangeModels(models.TextChoices):
+    PROJECT = "project", _("project")
+    TASK = "task", _("task")
+    MILESTONE = "milestone", _("milestone")
+
+
+class ChangeLog(models.Model):
+    # Append-only feed of writes served by the sync endpoint; see api.changefeed.
+    seq = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=20, choices=ChangeModels.choices)
+    object_id = models.BigIntegerField()
+    project_id = models.BigIntegerField(null=True)
+    # Set on the entries of a project a member was removed from, which they
+    # read by their id as they no longer see the project.
+    user_id = models.BigIntegerField(null=True)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # A member's feed, read in seq order from their cursor.
+            models.Index(
+                fields=["project_id", "seq"], name="change_log_project_seq_idx"
+            ),
+            models.Index(
+                fields=["user_id", "seq"],
+                condition=models.Q(user_id__isnull=False),
+                name="change_log_user_seq_idx",
+            ),
+            # The recent entries checked for in-flight gaps, and pruning.
+            models.Index(fields=["created_at"], name="change_log_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.seq} {self.model} {self.object_id}"
+
+
+class SearchEntry(models.Model):
+    # Searchable text of projects, tasks and milestones, kept in step by
+    # api.search and indexed per database (FTS5 on SQLite, GIN on Postgres).
+    kind = models.CharField(max_length=20, choices=ChangeModels.choices)
+    object_id = models.BigIntegerField()
+    project_id = models.BigIntegerField()
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="search_entry_object_unique"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["project_id"], name="search_entry_project_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class Reminders(models.TextChoices):
+    DUE_SOON = "due_soon", _("due soon")
+    OVERDUE = "overdue", _("overdue")
+
+
+class SentReminder(models.Model):
+    # One row per reminder sent, so reruns of the scan skip them; a new due
+    # date or assignee gets its own reminders. See api.reminders.
+    kind = models.CharField(max_length=20, choices=ChangeModels.choices)
+    object_id = models.BigIntegerField()
+    user = models.ForeignKey(
+        User, related_name="sent_reminders", on_delete=models.CASCADE
+    )
+    reminder = models.CharField(max_length=10, choices=Reminders.choices)
+    due_date = models.DateField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id", "user", "reminder", "due_date"],
+                name="sent_reminder_unique",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["due_date"], name="sent_reminder_due_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.reminder} {self.kind} {self.object_id}"
+
+
 class Notification(models.Model):
     user = models.ForeignKey(
         User, related_name="notifications", on_delete=models.CASCADE
@@ -124,6 +272,41 @@ class Notification(models.Model):
     subject = models.CharField(max_length=255)
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    emailed_at = models.DateTimeField(blank=True, null=True)
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "created_at"], name="notification_user_created_idx"
+            ),
+            models.Index(
+                fields=["user", "id"],
+                condition=models.Q(is_read=False),
+                name="notification_unread_user_idx",
+            ),
+            models.Index(
+                fields=["user"],
+                condition=models.Q(emailed_at__isnull=True),
+                name="notification_unsent_user_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username}-{self.subject}"
+
+
+class EmailFailure(models.Model):
+    # Dead letters of api.tasks.send_email: digests that still failed after
+    # EMAIL_MAX_RETRIES retries. Their notifications stay marked as emailed.
+    user = models.ForeignKey(
+        User, related_name="email_failures", on_delete=models.CASCADE
+    )
+    notification_ids = models.JSONField()
+    subject = models.CharField(max_length=255)
+    error = models.TextField()
+    attempts = models.IntegerField()
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user_id} {self.subject}"
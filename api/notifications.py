@@ -0,0 +1,132 @@
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from api.models import Reminders, Notification as NotificationModel
+from api.cache import bump_inboxes
+from api.tasks import send_notification_digests
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SCHEDULED_KEY = "notifications:digest:scheduled"
+
+_collected = ContextVar("collected_notifications", default=None)
+
+
+def task_notification(task, created, update_fields=None):
+    user = task.assigned_to
+    if not user:
+        return None
+    if created or update_fields:
+        subject = "New task assigned."
+        body = f"Hi {user.username}, A new task '{task.name}' has been assigned to you by {task.created_by.username}."
+    else:
+        subject = "Task updated."
+        body = f"Hi {user.username}, task '{task.name}' has been updated."
+    return NotificationModel(user=user, subject=subject, body=body)
+
+
+def milestone_notification(milestone, created):
+    user = milestone.assigned_to
+    if not user:
+        return None
+    if created:
+        subject = "New milestone assigned."
+        body = f"Hi {user.username}, A new milestone '{milestone.name}' has been assigned to you by {milestone.created_by.username}."
+    else:
+        subject = "milestone updated."
+        body = f"Hi {user.username}, milestone '{milestone.name}' has been updated."
+    return NotificationModel(user=user, subject=subject, body=body)
+
+
+def reminder_notification(kind, row, reminder):
+    # row is a values() row from the reminder scan; see api.reminders.
+    if reminder == Reminders.OVERDUE:
+        subject = f"{kind.capitalize()} overdue."
+        body = f"Hi {row['assigned_to__username']}, {kind} '{row['name']}' was due on {row['due_date']:%Y-%m-%d}."
+    else:
+        subject = f"{kind.capitalize()} due soon."
+        body = f"Hi {row['assigned_to__username']}, {kind} '{row['name']}' is due on {row['due_date']:%Y-%m-%d}."
+    return NotificationModel(user_id=row["assigned_to"], subject=subject, body=body)
+
+
+def schedule_digest():
+    # Every notification created within the window is picked up by the same
+    # digest run, so a burst of events becomes one email per user.
+    window = settings.NOTIFICATION_DIGEST_WINDOW
+    try:
+        if not cache.add(DIGEST_SCHEDULED_KEY, 1, timeout=window):
+            return
+    except Exception as e:
+        logger.warning("Could not check the digest schedule: %s", e)
+    try:
+        send_notification_digests.apply_async(countdown=window)
+    except Exception as e:
+        logger.warning("Could not schedule notification digest: %s", e)
+
+
+def _write(notifications):
+    try:
+        NotificationModel.objects.bulk_create(notifications)
+    except Exception as e:
+        logger.warning("Could not store %d notifications: %s", len(notifications), e)
+        return
+    bump_inboxes(notification.user_id for notification in notifications)
+    schedule_digest()
+
+
+def mark_read(user_id, up_to):
+    count = NotificationModel.objects.filter(
+        user_id=user_id, is_read=False, id__lte=up_to
+    ).update(is_read=True)
+    if count:
+        bump_inboxes([user_id])
+    return count
+
+
+def notify(notifications):
+    notifications = [
+        notification for notification in notifications if notification is not None
+    ]
+    if not notifications:
+        return
+    collected = _collected.get()
+    if collected is not None:
+        # Registered in the atomic block that raised them, so they are dropped
+        # with it when it rolls back even if the collecting block commits.
+        transaction.on_commit(lambda: collected.extend(notifications))
+        return
+    # Nothing is written or enqueued for rows that end up rolled back.
+    transaction.on_commit(lambda: _write(notifications))
+
+
+def _flush(collected):
+    if collected:
+        _write(collected)
+
+
+@contextmanager
+def collect():
+    # Holds back every notification raised inside the block and writes them
+    # with a single bulk insert once the surrounding transaction commits.
+    collected = []
+    token = _collected.set(collected)
+    try:
+        yield collected
+    finally:
+        _collected.reset(token)
+        transaction.on_commit(lambda: _flush(collected))
+
+
+@asynccontextmanager
+async def acollect():
+    collected = []
+    token = _collected.set(collected)
+    try:
+        yield collected
+    finally:
+        _collected.reset(token)
+        await sync_to_async(transaction.on_commit)(lambda: _flush(collected))
@@ -0,0 +1,65 @@
+import logging
+import time
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = "ratelimit:{name}"
+# How long a caller that finds the bucket locked should wait before trying
+# again; updates hold the lock for a cache round trip or two.
+LOCK_WAIT = 0.05
+
+
+class TokenBucket:
+    """
+    Token bucket shared through the cache: holds up to capacity tokens and
+    refills at rate tokens per second. Updates are serialized with a short
+    cache.add() lock, which is atomic on Redis and Memcached.
+    """
+
+    def __init__(self, name, rate, capacity):
+        self.key = BUCKET_KEY.format(name=name)
+        self.rate = rate
+        self.capacity = capacity
+
+    def take(self, tokens=1):
+        """Take tokens and return 0, or return the seconds until they are there."""
+        return self._update(tokens)
+
+    def refund(self, tokens=1):
+        # Gives back tokens taken for something that was not done after all.
+        self._update(-tokens)
+
+    def _update(self, tokens):
+        # Waits out other callers holding the lock, which is not a limit.
+        wait = self._try_update(tokens)
+        while wait is None:
+            time.sleep(LOCK_WAIT)
+            wait = self._try_update(tokens)
+        return wait
+
+    def _try_update(self, tokens):
+        # Returns None while another caller holds the lock.
+        lock = f"{self.key}:lock"
+        try:
+            if not cache.add(lock, 1, timeout=1):
+                return None
+        except Exception as e:
+            # Sending without a limit beats not sending at all.
+            logger.warning("Rate limiter unavailable for %s: %s", self.key, e)
+            return 0
+        try:
+            now = time.time()
+            level, updated = cache.get(self.key) or (self.capacity, now)
+            level = min(self.capacity, level + (now - updated) * self.rate)
+            wait = 0
+            if level >= tokens:
+                level = min(self.capacity, level - tokens)
+            else:
+                wait = (tokens - level) / self.rate
+            # Kept until it would have refilled anyway.
+            timeout = int((self.capacity - level) / self.rate) + 1
+            cache.set(self.key, (level, now), timeout=timeout)
+            return wait
+        finally:
+            cache.delete(lock)
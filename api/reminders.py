@@ -0,0 +1,146 @@
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from api.models import (
+    ChangeModels,
+    Milestone,
+    Reminders,
+    SentReminder,
+    Status,
+    Task,
+)
+from api.notifications import collect, notify, reminder_notification
+
+logger = logging.getLogger(__name__)
+
+# Each filter matches the condition of the model's partial reminder index.
+REMINDER_SOURCES = {
+    ChangeModels.TASK: lambda: Task.objects.filter(assigned_to__isnull=False).exclude(
+        status=Status.COMPLETED
+    ),
+    ChangeModels.MILESTONE: lambda: Milestone.objects.filter(
+        assigned_to__isnull=False, is_achieved=False
+    ),
+}
+ROW_FIELDS = ["id", "name", "due_date", "assigned_to", "assigned_to__username"]
+
+
+def due_rows(queryset, start, end, batch_size):
+    """
+    Yield chunks of rows due between start and end (inclusive), walking the
+    (due_date, id) index with a keyset cursor so each query is a short range
+    scan however far the run has got.
+    """
+    queryset = queryset.filter(due_date__gte=start, due_date__lte=end).order_by(
+        "due_date", "id"
+    )
+    after = None
+    while True:
+        chunk = queryset
+        if after is not None:
+            chunk = chunk.filter(
+                Q(due_date__gt=after[0]) | Q(due_date=after[0], id__gt=after[1])
+            )
+        rows = list(chunk.values(*ROW_FIELDS)[:batch_size])
+        if not rows:
+            return
+        yield rows
+        after = (rows[-1]["due_date"], rows[-1]["id"])
+
+
+def sent_keys(kind, ids):
+    return set(
+        SentReminder.objects.filter(kind=kind, object_id__in=ids).values_list(
+            "object_id", "user_id", "reminder", "due_date"
+        )
+    )
+
+
+def remind(kind, rows, today):
+    """
+    Send the reminders in rows that were not sent before; returns how many
+    were sent. The items are locked while their reminders are looked up and
+    recorded, so an overlapping run waits and then finds them sent.
+    """
+    ids = [row["id"] for row in rows]
+    model = REMINDER_SOURCES[kind]().model
+    try:
+        # The reminders and their notifications commit together.
+        with transaction.atomic(), collect():
+            list(
+                model.objects.select_for_update()
+                .filter(pk__in=ids)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            sent = sent_keys(kind, ids)
+            reminders = []
+            notifications = []
+            for row in rows:
+                reminder = (
+                    Reminders.OVERDUE if row["due_date"] < today else Reminders.DUE_SOON
+                )
+                key = (row["id"], row["assigned_to"], reminder, row["due_date"])
+                if key in sent:
+                    continue
+                reminders.append(
+                    SentReminder(
+                        kind=kind,
+                        object_id=row["id"],
+                        user_id=row["assigned_to"],
+                        reminder=reminder,
+                        due_date=row["due_date"],
+                    )
+                )
+                notifications.append(reminder_notification(kind, row, reminder))
+            if reminders:
+                SentReminder.objects.bulk_create(reminders)
+                notify(notifications)
+    except IntegrityError:
+        # Only possible where the database ignores the row locks: another run
+        # recorded some of these first, so this chunk is left to it.
+        logger.warning(
+            "Skipped a chunk of %d %s reminders recorded by another run.",
+            len(rows),
+            kind,
+        )
+        return 0
+    return len(reminders)
+
+
+def send_reminders(batch_size):
+    today = timezone.localdate()
+    start = today - timedelta(days=settings.REMINDER_OVERDUE_DAYS)
+    end = today + timedelta(days=settings.REMINDER_DUE_SOON_DAYS)
+    stats = {"scanned": 0, "sent": 0, "chunks": 0}
+    started = time.perf_counter()
+    for kind, source in REMINDER_SOURCES.items():
+        for rows in due_rows(source(), start, end, batch_size):
+            stats["scanned"] += len(rows)
+            stats["sent"] += remind(kind, rows, today)
+            stats["chunks"] += 1
+    stats["pruned"] = prune_sent_reminders(start, batch_size)
+    logger.info(
+        "Sent %d reminders for %d due items in %d chunks in %.3fs.",
+        stats["sent"],
+        stats["scanned"],
+        stats["chunks"],
+        time.perf_counter() - started,
+    )
+    return stats
+
+
+def prune_sent_reminders(before, batch_size):
+    # Items due before the scan window are never looked at again, so their
+    # records are no longer needed to skip them.
+    expired = SentReminder.objects.filter(due_date__lt=before)
+    deleted = 0
+    while True:
+        ids = list(expired.order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += SentReminder.objects.filter(id__in=ids).delete()[0]
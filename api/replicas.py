@@ -0,0 +1,124 @@
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+logger = logging.getLogger(__name__)
+
+RECENT_WRITE_KEY = "api:recent_write:{scope}"
+
+_read_replica = ContextVar("read_replica", default=False)
+
+
+def replica_alias():
+    alias = settings.DATABASE_REPLICA_ALIAS
+    return alias if alias in settings.DATABASES else None
+
+
+def user_scope(user_id):
+    return f"user_writes:{user_id}"
+
+
+def mark_written(scopes):
+    """
+    Keep reads of the scopes on the primary until the replica has had
+    REPLICA_LAG_SECONDS to catch up. Called with the cache scopes bumped on
+    commit, so a payload cached under the new version is never built from a
+    replica that does not have the write yet, and with user_scope() after a
+    user's write so they read their own writes.
+    """
+    if not scopes or replica_alias() is None:
+        return
+    try:
+        cache.set_many(
+            {RECENT_WRITE_KEY.format(scope=scope): 1 for scope in scopes},
+            timeout=settings.REPLICA_LAG_SECONDS,
+        )
+    except Exception as e:
+        logger.warning("Could not mark %s as written: %s", ", ".join(scopes), e)
+
+
+async def amark_written(scopes):
+    if not scopes or replica_alias() is None:
+        return
+    try:
+        await cache.aset_many(
+            {RECENT_WRITE_KEY.format(scope=scope): 1 for scope in scopes},
+            timeout=settings.REPLICA_LAG_SECONDS,
+        )
+    except Exception as e:
+        logger.warning("Could not mark %s as written: %s", ", ".join(scopes), e)
+
+
+def _keys(user, scopes):
+    return [RECENT_WRITE_KEY.format(scope=scope) for scope in scopes] + [
+        RECENT_WRITE_KEY.format(scope=user_scope(user.id))
+    ]
+
+
+@contextmanager
+def replica_reads(user, scopes):
+    # Without the cache there is no telling what was just written, so reads
+    # stay on the primary.
+    try:
+        use_replica = replica_alias() is not None and not cache.get_many(
+            _keys(user, scopes)
+        )
+    except Exception as e:
+        logger.warning("Cache unavailable, reading from the primary: %s", e)
+        use_replica = False
+    token = _read_replica.set(use_replica)
+    try:
+        yield
+    finally:
+        _read_replica.reset(token)
+
+
+@asynccontextmanager
+async def areplica_reads(user, scopes):
+    try:
+        use_replica = replica_alias() is not None and not await cache.aget_many(
+            _keys(user, scopes)
+        )
+    except Exception as e:
+        logger.warning("Cache unavailable, reading from the primary: %s", e)
+        use_replica = False
+    token = _read_replica.set(use_replica)
+    try:
+        yield
+    finally:
+        _read_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads inside replica_reads() to DATABASE_REPLICA_ALIAS and every
+    write to the primary. Without a replica alias in DATABASES it has no say.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _read_replica.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Rows read from the replica are saved to the primary.
+        if replica_alias() is None:
+            return None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = replica_alias()
+        if alias is None:
+            return None
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, alias}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary.
+        if db == replica_alias():
+            return False
+        return None
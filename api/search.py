@@ -0,0 +1,249 @@
+import re
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+from api.models import ChangeModels, Milestone, Project, SearchEntry, Task
+
+SEARCH_KINDS = {
+    Project: ChangeModels.PROJECT,
+    Task: ChangeModels.TASK,
+    Milestone: ChangeModels.MILESTONE,
+}
+# Saves that touch none of these leave the entry as it is.
+INDEXED_FIELDS = {"name", "description", "project", "project_id"}
+MAX_TERMS = 8
+# Shorter terms match whole words only: a one-letter prefix expands to a large
+# share of the vocabulary and is not covered by the FTS5 prefix index.
+MIN_PREFIX_LENGTH = 2
+# bm25 scores every match before the page is cut, so queries whose rarest
+# term is in more entries than this are returned newest first instead.
+RANK_LIMIT = 20000
+TERM_RE = re.compile(r"\w+")
+
+BACKENDS = {
+    "sqlite": "api.search.SQLiteSearchBackend",
+    "postgresql": "api.search.PostgresSearchBackend",
+}
+RESULT_COLUMNS = ["kind", "id", "project", "name", "description"]
+
+_batch = ContextVar("search_changes", default=None)
+
+
+def search_terms(query):
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+class SearchBackend:
+    source = "api_searchentry e"
+
+    def match(self, terms):
+        """
+        Return (where_sql, where_params, order_sql, order_params); order_sql
+        must be a total order.
+        """
+        raise NotImplementedError
+
+    def filters(self, kinds, project_id, member_id):
+        clauses = []
+        params = []
+        if kinds:
+            clauses.append(f"e.kind IN ({', '.join(['%s'] * len(kinds))})")
+            params.extend(kinds)
+        if project_id is not None:
+            clauses.append("e.project_id = %s")
+            params.append(project_id)
+        if member_id is not None:
+            members_table = Project.members.through._meta.db_table
+            clauses.append(
+                f"e.project_id IN (SELECT project_id FROM {members_table} WHERE user_id = %s)"
+            )
+            params.append(member_id)
+        return clauses, params
+
+    def search(
+        self, terms, limit, offset=0, kinds=None, project_id=None, member_id=None
+    ):
+        where, where_params, order, order_params = self.match(terms)
+        clauses, params = self.filters(kinds, project_id, member_id)
+        sql = (
+            "SELECT e.kind, e.object_id, e.project_id, e.name, e.description "
+            f"FROM {self.source} WHERE {' AND '.join([where] + clauses)} "
+            f"ORDER BY {order} LIMIT %s OFFSET %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, where_params + params + order_params + [limit, offset])
+            return [dict(zip(RESULT_COLUMNS, row)) for row in cursor.fetchall()]
+
+
+class SQLiteSearchBackend(SearchBackend):
+    table = "api_searchentry_fts"
+    vocab = "api_searchentry_fts_vocab"
+    source = f"{table} JOIN api_searchentry e ON e.id = {table}.rowid"
+    # bm25 weights for the name and description columns; lower ranks first.
+    weights = (10.0, 1.0)
+
+    def match(self, terms):
+        query = " ".join(
+            f'"{term}"*' if len(term) >= MIN_PREFIX_LENGTH else f'"{term}"'
+            for term in terms
+        )
+        if self.matches(terms) > RANK_LIMIT:
+            # FTS5 walks the doclists in rowid order, so this stops at the
+            # first page of matches.
+            return f"{self.table} MATCH %s", [query], f"{self.table}.rowid DESC", []
+        rank = f"bm25({self.table}, {', '.join(str(w) for w in self.weights)})"
+        return f"{self.table} MATCH %s", [query], f"{rank}, e.id", []
+
+    def matches(self, terms):
+        # Upper bound on the number of matching entries, from the document
+        # counts of the rarest term (summed over the words it prefixes).
+        counts = []
+        with connection.cursor() as cursor:
+            for term in terms:
+                if len(term) >= MIN_PREFIX_LENGTH:
+                    upper = term[:-1] + chr(ord(term[-1]) + 1)
+                    cursor.execute(
+                        f"SELECT SUM(doc) FROM {self.vocab} WHERE term >= %s AND term < %s",
+                        [term, upper],
+                    )
+                else:
+                    cursor.execute(
+                        f"SELECT doc FROM {self.vocab} WHERE term = %s", [term]
+                    )
+                row = cursor.fetchone()
+                counts.append(row[0] or 0 if row else 0)
+        return min(counts, default=0)
+
+
+class PostgresSearchBackend(SearchBackend):
+    # Must match the expression of api_searchentry_document_idx.
+    document = (
+        "(setweight(to_tsvector('simple', e.name), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(e.description, '')), 'B'))"
+    )
+
+    def match(self, terms):
+        query = " & ".join(
+            f"{term}:*" if len(term) >= MIN_PREFIX_LENGTH else term for term in terms
+        )
+        return (
+            f"{self.document} @@ to_tsquery('simple', %s)",
+            [query],
+            f"ts_rank({self.document}, to_tsquery('simple', %s)) DESC, e.id",
+            [query],
+        )
+
+
+class LikeSearchBackend(SearchBackend):
+    # Unindexed fallback for other databases: every term must appear in the
+    # name or description, newest entries first.
+    def match(self, terms):
+        clauses = []
+        params = []
+        for term in terms:
+            # Terms are word characters, so "_" is the only wildcard to escape.
+            pattern = "%" + term.replace("_", "!_") + "%"
+            clauses.append(
+                "(LOWER(e.name) LIKE %s ESCAPE '!' OR LOWER(e.description) LIKE %s ESCAPE '!')"
+            )
+            params.extend([pattern, pattern])
+        return " AND ".join(clauses), params, "e.id DESC", []
+
+
+def get_backend():
+    path = settings.API_SEARCH_BACKEND or BACKENDS.get(
+        connection.vendor, "api.search.LikeSearchBackend"
+    )
+    return import_string(path)()
+
+
+def search_entry(instance):
+    kind = SEARCH_KINDS[type(instance)]
+    return SearchEntry(
+        kind=kind,
+        object_id=instance.pk,
+        project_id=instance.pk if kind == ChangeModels.PROJECT else instance.project_id,
+        name=instance.name,
+        description=instance.description,
+    )
+
+
+def _new_changes():
+    return {"index": {}, "unindex": defaultdict(set)}
+
+
+def _collect(changes, instances, deleted):
+    for instance in instances:
+        key = (SEARCH_KINDS[type(instance)], instance.pk)
+        if deleted:
+            changes["index"].pop(key, None)
+            changes["unindex"][key[0]].add(key[1])
+        else:
+            changes["index"][key] = search_entry(instance)
+            changes["unindex"][key[0]].discard(key[1])
+
+
+def _apply(changes):
+    for kind, object_ids in changes["unindex"].items():
+        if object_ids:
+            SearchEntry.objects.filter(kind=kind, object_id__in=object_ids).delete()
+    if changes["index"]:
+        SearchEntry.objects.bulk_create(
+            changes["index"].values(),
+            update_conflicts=True,
+            unique_fields=["kind", "object_id"],
+            update_fields=["project_id", "name", "description"],
+        )
+
+
+def index_objects(instances, deleted=False):
+    # Runs in the writing transaction; the database index follows the
+    # entries (triggers on SQLite, the expression index on Postgres).
+    batch = _batch.get()
+    if batch is not None:
+        _collect(batch, instances, deleted)
+        return
+    changes = _new_changes()
+    _collect(changes, instances, deleted)
+    _apply(changes)
+
+
+def unindex_project(project_id):
+    SearchEntry.objects.filter(project_id=project_id).delete()
+
+
+@contextmanager
+def collect_index_changes():
+    # Changes made inside the block are written with one statement per kind
+    # when it exits.
+    changes = _new_changes()
+    token = _batch.set(changes)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+    _apply(changes)
+
+
+def rebuild_search_index():
+    SearchEntry.objects.all().delete()
+    for model, kind in SEARCH_KINDS.items():
+        project_column = "id" if model is Project else "project_id"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {SearchEntry._meta.db_table} "
+                "(kind, object_id, project_id, name, description) "
+                f"SELECT %s, id, {project_column}, name, description "
+                f"FROM {model._meta.db_table}",
+                [kind],
+            )
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {SQLiteSearchBackend.table}({SQLiteSearchBackend.table}) "
+                "VALUES ('optimize')"
+            )
+    return SearchEntry.objects.count()
@@ -1,8 +1,44 @@
+from collections import defaultdict
+from django.db.models import F
 from rest_framework import serializers
-from api.models import User, Project, Task, Milestone
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from api.models import Project, Task, Milestone, Notification, ProjectSummary
+from api.authentication import add_role_claims
+from api.summaries import TASK_STATUS_COLUMNS
+
+
+def is_project_member(project_id, user_id):
+    return Project.members.through.objects.filter(
+        project_id=project_id, user_id=user_id
+    ).exists()
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    # Bulk writes put {model: {pk: instance}} in the context so that each item
+    # resolves its foreign keys without a query of its own.
+    def to_internal_value(self, data):
+        preloaded = self.context.get("preloaded", {}).get(self.get_queryset().model)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return preloaded[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
 
 
 class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+    # Read-only fast path: method fields that can be computed by the database
+    # map to the expression that selects them in .values().
+    value_expressions = {}
+    _field_order_cache = {}
+    _formatters_cache = {}
 
     def __init__(self, *args, **kwargs):
         fields = kwargs.pop("fields", None)
@@ -15,32 +51,97 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
             for field_name in existing - allowed:
                 self.fields.pop(field_name)
 
-
-class UserSerializer(DynamicFieldsModelSerializer):
-    class Meta:
-        model = User
-        fields = "__all__"
-        extra_kwargs = {"password": {"write_only": True}}
+    @classmethod
+    def field_order(cls, fields=None):
+        key = (cls, None if fields is None else tuple(fields))
+        if key not in cls._field_order_cache:
+            cls._field_order_cache[key] = list(cls(fields=fields).fields)
+        return cls._field_order_cache[key]
+
+    @classmethod
+    def values_queryset(cls, queryset, fields):
+        columns = []
+        expressions = {}
+        for field in cls.field_order(fields):
+            if field in cls.value_expressions:
+                if cls.value_expressions[field] is not None:
+                    expressions[field] = cls.value_expressions[field]
+            else:
+                columns.append(field)
+        return queryset.values(*columns, **expressions)
+
+    @classmethod
+    def extend_values(cls, rows, fields):
+        pass
+
+    @classmethod
+    def value_formatters(cls, fields=None):
+        # Dates and datetimes go through their serializer field, so both paths
+        # render them the same way ("Z" rather than "+00:00").
+        key = (cls, None if fields is None else tuple(fields))
+        if key not in cls._formatters_cache:
+            cls._formatters_cache[key] = {
+                name: field.to_representation
+                for name, field in cls(fields=fields).fields.items()
+                if isinstance(field, (serializers.DateTimeField, serializers.DateField))
+            }
+        return cls._formatters_cache[key]
+
+    @classmethod
+    def format_values(cls, rows, fields):
+        formatters = cls.value_formatters(fields)
+        if formatters:
+            for row in rows:
+                for field, formatter in formatters.items():
+                    if row.get(field) is not None:
+                        row[field] = formatter(row[field])
+
+    @classmethod
+    def values_data(cls, rows, fields):
+        rows = list(rows)
+        cls.extend_values(rows, fields)
+        cls.format_values(rows, fields)
+        order = cls.field_order(fields)
+        return [{field: row[field] for field in order} for row in rows]
 
 
 class ProjectSerializer(DynamicFieldsModelSerializer):
     member_details = serializers.SerializerMethodField()
+    value_expressions = {"member_details": None}
 
     class Meta:
         model = Project
         fields = "__all__"
 
+    @classmethod
+    def extend_values(cls, rows, fields):
+        if "member_details" not in fields:
+            return
+        members = defaultdict(list)
+        memberships = Project.members.through.objects.filter(
+            project_id__in=[row["id"] for row in rows]
+        ).values_list("project_id", "user_id", "user__username", "user__email")
+        for project_id, user_id, username, email in memberships:
+            members[project_id].append(
+                {"id": user_id, "username": username, "email": email}
+            )
+        for row in rows:
+            row["member_details"] = members[row["id"]]
+
     def get_member_details(self, obj):
-        queryset = obj.members.all()
-        serializer = UserSerializer(
-            queryset, many=True, fields=["id", "username", "email"]
-        )
-        return serializer.data
+        return [
+            {"id": member.id, "username": member.username, "email": member.email}
+            for member in obj.members.all()
+        ]
 
 
 class TaskSerializer(DynamicFieldsModelSerializer):
     project_name = serializers.SerializerMethodField()
     assigned_user = serializers.SerializerMethodField()
+    value_expressions = {
+        "project_name": F("project__name"),
+        "assigned_user": F("assigned_to__username"),
+    }
 
     class Meta:
         model = Task
@@ -50,20 +151,37 @@ class TaskSerializer(DynamicFieldsModelSerializer):
         return obj.project.name
 
     def get_assigned_user(self, obj):
+        if obj.assigned_to is None:
+            return None
         return obj.assigned_to.username
 
     def validate(self, attrs):
-        members = attrs.get("project").members.all()
-        if attrs.get("assigned_to"):
-            if attrs.get("assigned_to") not in members:
+        if attrs.get("project"):
+            project_id = attrs["project"].id
+        else:
+            project_id = getattr(self.instance, "project_id", None)
+        assigned_to = attrs.get("assigned_to")
+        if project_id and assigned_to:
+            memberships = self.context.get("memberships")
+            if memberships is not None:
+                is_member = (project_id, assigned_to.id) in memberships
+            else:
+                is_member = is_project_member(project_id, assigned_to.id)
+            if not is_member:
                 raise serializers.ValidationError(
                     "This user not belong to the parent project."
                 )
         return attrs
 
 
+class TaskBulkSerializer(TaskSerializer):
+    class Meta(TaskSerializer.Meta):
+        extra_kwargs = {"name": {"validators": []}}
+
+
 class MilestoneSerializer(DynamicFieldsModelSerializer):
     project_name = serializers.SerializerMethodField()
+    value_expressions = {"project_name": F("project__name")}
 
     class Meta:
         model = Milestone
@@ -71,3 +189,66 @@ class MilestoneSerializer(DynamicFieldsModelSerializer):
 
     def get_project_name(self, obj):
         return obj.project.name
+
+
+class MilestoneBulkSerializer(MilestoneSerializer):
+    class Meta(MilestoneSerializer.Meta):
+        extra_kwargs = {"name": {"validators": []}}
+
+
+class ProjectDetailSerializer(ProjectSerializer):
+    # Expects tasks and milestones to be prefetched and the nested field lists
+    # in the context under "task_fields" and "milestone_fields".
+    tasks = serializers.SerializerMethodField()
+    milestones = serializers.SerializerMethodField()
+
+    def get_tasks(self, obj):
+        return TaskSerializer(
+            obj.tasks.all(), many=True, fields=self.context["task_fields"]
+        ).data
+
+    def get_milestones(self, obj):
+        return MilestoneSerializer(
+            obj.milestones.all(), many=True, fields=self.context["milestone_fields"]
+        ).data
+
+
+class NotificationSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = Notification
+        fields = "__all__"
+
+
+class ProjectSummarySerializer(serializers.ModelSerializer):
+    project_name = serializers.CharField(source="project.name", read_only=True)
+    tasks = serializers.SerializerMethodField()
+    overdue_tasks = serializers.SerializerMethodField()
+    milestones = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProjectSummary
+        fields = ["project", "project_name", "tasks", "overdue_tasks", "milestones"]
+
+    def get_tasks(self, obj):
+        counts = {
+            status: getattr(obj, column)
+            for status, column in TASK_STATUS_COLUMNS.items()
+        }
+        counts["total"] = sum(counts.values())
+        return counts
+
+    def get_overdue_tasks(self, obj):
+        return self.context.get("overdue", {}).get(obj.project_id, 0)
+
+    def get_milestones(self, obj):
+        return {
+            "achieved": obj.milestones_achieved,
+            "pending": obj.milestones_pending,
+            "total": obj.milestones_achieved + obj.milestones_pending,
+        }
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_role_claims(super().get_token(user), user)
@@ -1,21 +1,67 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    post_init,
+    pre_save,
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
 from django.dispatch import receiver
-from api.models import Task, Milestone, Notification as NotificationModel
-from api.tasks import send_email
+from django.utils import timezone
+from api.models import (
+    User,
+    Project,
+    Task,
+    Milestone,
+    ProjectSummary,
+    Notification as NotificationModel,
+)
+from api.cache import bump_on_commit, project_scopes
+from api.authentication import mark_user_changed
+from api.summaries import (
+    STATE_ATTR,
+    UNKNOWN,
+    remember_state,
+    load_state,
+    record_changes,
+)
+from api.changefeed import log_changes, log_moves, log_project_changes
+from api.search import INDEXED_FIELDS, index_objects, unindex_project
+from api.visibility import forget_visible_projects
+from api.notifications import (
+    task_notification,
+    milestone_notification,
+    notify,
+    schedule_digest,
+)
+
+
+def deleted_with_project(origin):
+    return isinstance(origin, Project) or getattr(origin, "model", None) is Project
+
+
+# The fields a user's token claims depend on, as they were loaded or last saved.
+AUTH_FIELDS = ("role", "is_active")
+AUTH_STATE_ATTR = "_auth_state"
+
+# Project a task or milestone was stored under before a save that moves it.
+MOVED_FROM_ATTR = "_moved_from_project_id"
+
+CACHE_SCOPES = {
+    User: "user",
+    Project: "project",
+    Task: "task",
+    Milestone: "milestone",
+}
 
 
 @receiver(post_save, sender=Task)
 def task_signal(sender, instance, created, update_fields, **kwargs):
     try:
-        user = instance.assigned_to
-        if (created and user) or user and update_fields:
-            subject = "New task assigned."
-            body = f"Hi {user.username}, A new task '{instance.name}' has been assigned to you by {instance.created_by.username}."
-            NotificationModel.objects.create(user=user, subject=subject, body=body)
-        elif user:
-            subject = "Task updated."
-            body = f"Hi {user.username}, task '{instance.name}' has been updated."
-            NotificationModel.objects.create(user=user, subject=subject, body=body)
+        notify([task_notification(instance, created, update_fields)])
     except Exception as e:
         print(str(e))
 
@@ -23,16 +69,7 @@ def task_signal(sender, instance, created, update_fields, **kwargs):
 @receiver(post_save, sender=Milestone)
 def milestone_signal(sender, instance, created, **kwargs):
     try:
-        user = instance.assigned_to
-        subject = ""
-        body = ""
-        if created:
-            subject = "New milestone assigned."
-            body = f"Hi {user.username}, A new milestone '{instance.name}' has been assigned to you by {instance.created_by.username}."
-        else:
-            subject = "milestone updated."
-            body = f"Hi {user.username}, milestone '{instance.name}' has been updated."
-        NotificationModel.objects.create(user=user, subject=subject, body=body)
+        notify([milestone_notification(instance, created)])
     except Exception as e:
         print(str(e))
 
@@ -41,10 +78,204 @@ def milestone_signal(sender, instance, created, **kwargs):
 def notification_signal(sender, instance, created, **kwargs):
     try:
         if created:
-            send_email.delay(
-                subject=instance.subject,
-                message=instance.body,
-                recipient_list=[instance.user.email],
-            )
+            schedule_digest()
     except Exception as e:
         print(str(e))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Milestone)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Milestone)
+def cache_version_signal(sender, **kwargs):
+    bump_on_commit(CACHE_SCOPES[sender])
+
+
+def auth_state(instance):
+    # Deferred fields are left out, so they only count as changed once set.
+    return tuple(instance.__dict__.get(field, UNKNOWN) for field in AUTH_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def user_auth_state_signal(sender, instance, **kwargs):
+    instance.__dict__[AUTH_STATE_ATTR] = auth_state(instance)
+
+
+@receiver(post_save, sender=User)
+def user_auth_signal(sender, instance, created, **kwargs):
+    old = instance.__dict__.get(AUTH_STATE_ATTR)
+    new = instance.__dict__[AUTH_STATE_ATTR] = auth_state(instance)
+    if created or old == new:
+        return
+    changed_at = timezone.now()
+    User.objects.filter(pk=instance.pk).update(role_changed_at=changed_at)
+    transaction.on_commit(
+        lambda: mark_user_changed(instance.pk, changed_at.timestamp())
+    )
+
+
+@receiver(post_delete, sender=User)
+def user_deleted_signal(sender, instance, **kwargs):
+    transaction.on_commit(lambda: mark_user_changed(instance.pk))
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def project_members_signal(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._cleared_project_ids = list(
+            instance.assigned_projects.values_list("id", flat=True)
+        )
+    if action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            project_ids = [instance.pk]
+        elif action == "post_clear":
+            project_ids = getattr(instance, "_cleared_project_ids", [])
+        else:
+            project_ids = pk_set
+        removed_user_ids = ()
+        if action != "post_add":
+            if reverse:
+                removed_user_ids = [instance.pk]
+            elif action == "post_clear":
+                removed_user_ids = getattr(instance, "_cleared_member_ids", [])
+            else:
+                removed_user_ids = pk_set
+        log_project_changes(project_ids, removed_user_ids)
+        bump_on_commit("project", *project_scopes(project_ids))
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def visible_projects_signal(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and not reverse:
+        instance._cleared_member_ids = list(
+            instance.members.values_list("id", flat=True)
+        )
+    if action in ("post_add", "post_remove", "post_clear"):
+        if reverse:
+            user_ids = [instance.pk]
+        elif action == "post_clear":
+            user_ids = getattr(instance, "_cleared_member_ids", [])
+        else:
+            user_ids = list(pk_set)
+        transaction.on_commit(lambda: forget_visible_projects(user_ids))
+
+
+@receiver(post_save, sender=Project)
+def project_summary_signal(sender, instance, created, **kwargs):
+    if created:
+        ProjectSummary.objects.get_or_create(project=instance)
+
+
+@receiver(post_init, sender=Task)
+@receiver(post_init, sender=Milestone)
+def summary_state_signal(sender, instance, **kwargs):
+    remember_state(instance)
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=Milestone)
+@receiver(pre_delete, sender=Task)
+@receiver(pre_delete, sender=Milestone)
+def summary_load_signal(sender, instance, update_fields=None, origin=None, **kwargs):
+    # Rows collected by a cascade or queryset delete were read by the delete's
+    # own transaction, so only their deferred state is loaded.
+    reload = origin is None or origin is instance
+    load_state(instance, update_fields, reload)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Milestone)
+def summary_save_signal(sender, instance, **kwargs):
+    record_changes([instance])
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Milestone)
+def summary_delete_signal(sender, instance, origin=None, **kwargs):
+    # The summary row goes with the project, so cascades from it are skipped.
+    if deleted_with_project(origin):
+        return
+    record_changes([instance], deleted=True)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Milestone)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Milestone)
+def project_version_signal(sender, instance, **kwargs):
+    project_id = instance.pk if sender is Project else instance.project_id
+    bump_on_commit(*project_scopes([project_id]))
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=Milestone)
+def project_moved_signal(sender, instance, **kwargs):
+    # Runs after summary_load_signal, so the stored project is known here.
+    old = instance.__dict__.get(STATE_ATTR)
+    if old not in (None, UNKNOWN) and old[0] != instance.project_id:
+        # Logged under the project it left once saved; see change_save_signal.
+        instance.__dict__[MOVED_FROM_ATTR] = old[0]
+        bump_on_commit(*project_scopes([old[0]]))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Milestone)
+def change_save_signal(sender, instance, **kwargs):
+    log_changes([instance])
+    moved_from = instance.__dict__.pop(MOVED_FROM_ATTR, None)
+    if moved_from is not None:
+        log_moves([(instance, moved_from)])
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Milestone)
+def change_delete_signal(sender, instance, **kwargs):
+    log_changes([instance], deleted=True)
+
+
+@receiver(pre_delete, sender=User)
+def change_user_deleted_signal(sender, instance, **kwargs):
+    # Assignments are nulled and memberships removed without signals of their own.
+    log_changes(instance.assigned_tasks.only("id", "project_id"))
+    log_changes(instance.assigned_milestones.only("id", "project_id"))
+    log_project_changes(instance.assigned_projects.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Milestone)
+def search_save_signal(sender, instance, update_fields, **kwargs):
+    if update_fields and not INDEXED_FIELDS & set(update_fields):
+        return
+    index_objects([instance])
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Milestone)
+def search_delete_signal(sender, instance, origin=None, **kwargs):
+    # Entries of a deleted project are removed together below.
+    if deleted_with_project(origin):
+        return
+    index_objects([instance], deleted=True)
+
+
+@receiver(post_delete, sender=Project)
+def search_project_deleted_signal(sender, instance, **kwargs):
+    unindex_project(instance.pk)
+
+
+@receiver(connection_created)
+def sqlite_pragmas_signal(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
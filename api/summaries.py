@@ -0,0 +1,255 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from api.models import Project, ProjectSummary, Milestone, Status, Task
+
+TASK_STATUS_COLUMNS = {
+    Status.NOT_YET_STARTED: "not_yet_started",
+    Status.IN_PROGRESS: "in_progress",
+    Status.COMPLETED: "completed",
+    Status.ON_HOLD: "on_hold",
+}
+SUMMARY_COLUMNS = list(TASK_STATUS_COLUMNS.values()) + [
+    "milestones_achieved",
+    "milestones_pending",
+]
+
+# Attribute holding the state an instance was loaded or last saved with.
+STATE_ATTR = "_summary_state"
+UNKNOWN = object()
+
+_batch = ContextVar("summary_changes", default=None)
+
+
+def task_column(project_id, status):
+    return TASK_STATUS_COLUMNS.get(status)
+
+
+def milestone_column(project_id, is_achieved):
+    return "milestones_achieved" if is_achieved else "milestones_pending"
+
+
+STATE_FIELDS = {
+    Task: (("project_id", "status"), task_column),
+    Milestone: (("project_id", "is_achieved"), milestone_column),
+}
+
+
+def current_state(instance):
+    fields, _ = STATE_FIELDS[type(instance)]
+    values = instance.__dict__
+    if any(field not in values for field in fields):
+        return UNKNOWN
+    return tuple(values[field] for field in fields)
+
+
+def remember_state(instance):
+    state = current_state(instance) if instance.pk is not None else None
+    instance.__dict__[STATE_ATTR] = state
+
+
+def _stored_states(model, pks, lock):
+    fields, _ = STATE_FIELDS[model]
+    rows = model.objects.filter(pk__in=pks)
+    if lock:
+        rows = rows.select_for_update()
+    return {
+        row[0]: row[1:]
+        for row in rows.values_list(
+            "pk", *[field.removesuffix("_id") for field in fields]
+        )
+    }
+
+
+def load_state(instance, update_fields=None, reload=True):
+    # Called before a save or delete. The state snapshotted when the row was
+    # loaded may have been changed since by another save (or was left out with
+    # only()/defer()), so the deltas start from the stored row, locked until
+    # commit when the save runs in a transaction.
+    if instance.pk is None:
+        return
+    fields, _ = STATE_FIELDS[type(instance)]
+    if update_fields is not None and not (
+        {field.removesuffix("_id") for field in fields} | set(fields)
+    ) & set(update_fields):
+        # Nothing counted is written, so there is no delta to take.
+        instance.__dict__[STATE_ATTR] = current_state(instance)
+        return
+    if not reload and instance.__dict__.get(STATE_ATTR) is not UNKNOWN:
+        return
+    states = _stored_states(
+        type(instance), [instance.pk], transaction.get_connection().in_atomic_block
+    )
+    instance.__dict__[STATE_ATTR] = states.get(instance.pk)
+
+
+def lock_states(instances):
+    # The bulk_update() counterpart of load_state(), for rows read before the
+    # transaction that updates them. A row deleted meanwhile gets its project
+    # recounted.
+    by_model = defaultdict(list)
+    for instance in instances:
+        by_model[type(instance)].append(instance)
+    for model, group in by_model.items():
+        states = _stored_states(model, [instance.pk for instance in group], True)
+        for instance in group:
+            instance.__dict__[STATE_ATTR] = states.get(instance.pk, UNKNOWN)
+
+
+def _new_changes():
+    return {"deltas": defaultdict(lambda: defaultdict(int)), "stale": set()}
+
+
+def _collect(changes, instances, deleted):
+    for instance in instances:
+        _, column = STATE_FIELDS[type(instance)]
+        old = instance.__dict__.get(STATE_ATTR)
+        new = None if deleted else current_state(instance)
+        instance.__dict__[STATE_ATTR] = new
+        if old is UNKNOWN or new is UNKNOWN:
+            changes["stale"].add(instance.__dict__.get("project_id"))
+            if old not in (None, UNKNOWN):
+                changes["stale"].add(old[0])
+            continue
+        if old == new:
+            continue
+        if old is not None:
+            changes["deltas"][old[0]][column(*old)] -= 1
+        if new is not None:
+            changes["deltas"][new[0]][column(*new)] += 1
+
+
+def _apply(changes):
+    stale = changes["stale"]
+    for project_id, deltas in changes["deltas"].items():
+        updates = {
+            column: F(column) + delta
+            for column, delta in deltas.items()
+            if column is not None and delta
+        }
+        if updates and not ProjectSummary.objects.filter(project_id=project_id).update(
+            **updates
+        ):
+            stale.add(project_id)
+    stale.discard(None)
+    if stale:
+        rebuild_summaries(stale)
+
+
+def record_changes(instances, deleted=False):
+    batch = _batch.get()
+    if batch is not None:
+        _collect(batch, instances, deleted)
+        return
+    changes = _new_changes()
+    _collect(changes, instances, deleted)
+    _apply(changes)
+
+
+@contextmanager
+def batch_changes():
+    # Signals fired inside the block (e.g. per row of a queryset delete) are
+    # folded into one UPDATE per project when it exits.
+    changes = _new_changes()
+    token = _batch.set(changes)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+    _apply(changes)
+
+
+def compute_counts(project_ids=None):
+    counts = defaultdict(lambda: dict.fromkeys(SUMMARY_COLUMNS, 0))
+    tasks = Task.objects.all()
+    milestones = Milestone.objects.all()
+    if project_ids is not None:
+        tasks = tasks.filter(project_id__in=project_ids)
+        milestones = milestones.filter(project_id__in=project_ids)
+    for project_id, status, count in (
+        tasks.values_list("project_id", "status").annotate(count=Count("id")).order_by()
+    ):
+        column = task_column(project_id, status)
+        if column is not None:
+            counts[project_id][column] = count
+    for project_id, is_achieved, count in (
+        milestones.values_list("project_id", "is_achieved")
+        .annotate(count=Count("id"))
+        .order_by()
+    ):
+        counts[project_id][milestone_column(project_id, is_achieved)] = count
+    return counts
+
+
+def _project_id_batches(project_ids, batch_size):
+    projects = Project.objects.order_by("id").values_list("id", flat=True)
+    if project_ids is not None:
+        projects = projects.filter(id__in=project_ids)
+    batch = []
+    for project_id in projects.iterator(chunk_size=batch_size):
+        batch.append(project_id)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild_summaries(project_ids=None, batch_size=1000):
+    rebuilt = 0
+    for batch in _project_id_batches(project_ids, batch_size):
+        counts = compute_counts(batch)
+        existing = ProjectSummary.objects.in_bulk(batch)
+        summaries = []
+        for project_id in batch:
+            summary = existing.get(project_id) or ProjectSummary(project_id=project_id)
+            for column, value in counts[project_id].items():
+                setattr(summary, column, value)
+            summaries.append(summary)
+        ProjectSummary.objects.bulk_update(
+            [summary for summary in summaries if summary.project_id in existing],
+            SUMMARY_COLUMNS,
+        )
+        ProjectSummary.objects.bulk_create(
+            [summary for summary in summaries if summary.project_id not in existing],
+            ignore_conflicts=True,
+        )
+        rebuilt += len(batch)
+    return rebuilt
+
+
+def check_summaries(project_ids=None, batch_size=1000):
+    mismatches = []
+    for batch in _project_id_batches(project_ids, batch_size):
+        counts = compute_counts(batch)
+        stored = ProjectSummary.objects.in_bulk(batch)
+        for project_id in batch:
+            summary = stored.get(project_id)
+            for column, expected in counts[project_id].items():
+                actual = getattr(summary, column) if summary else None
+                if actual != expected:
+                    mismatches.append(
+                        {
+                            "project": project_id,
+                            "column": column,
+                            "expected": expected,
+                            "actual": actual,
+                        }
+                    )
+    return mismatches
+
+
+def overdue_counts(project_ids, today=None):
+    # Overdue depends on the date rather than on writes, so it is counted live
+    # from the (project, due_date) index.
+    today = today or timezone.localdate()
+    return dict(
+        Task.objects.filter(project_id__in=project_ids, due_date__lt=today)
+        .exclude(status=Status.COMPLETED)
+        .values_list("project_id")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
@@ -1,13 +1,326 @@
-from django.core.mail import send_mail
+import hashlib
+import logging
+import random
+import smtplib
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.utils import DNS_NAME
+from django.utils import timezone
 from celery import shared_task
+from api.models import ChangeLog, EmailFailure, Notification as NotificationModel
+from api.cache import bump_inboxes
+from api.ratelimit import TokenBucket
+from api.summaries import check_summaries, rebuild_summaries
 
+logger = logging.getLogger(__name__)
 
-@shared_task
-def send_email(subject, message, recipient_list):
-    send_mail(
+EMAIL_SENT_KEY = "email:sent:{key}"
+EMAIL_SENDING_KEY = "email:sending:{key}"
+# What a refused or dropped SMTP connection raises.
+SEND_ERRORS = (smtplib.SMTPException, OSError)
+
+
+def idempotency_key(notification_ids):
+    ids = ",".join(str(pk) for pk in sorted(notification_ids))
+    return hashlib.md5(ids.encode()).hexdigest()
+
+
+def build_digest(user, notifications):
+    if len(notifications) == 1:
+        subject = notifications[0].subject
+        body = notifications[0].body
+    else:
+        subject = f"You have {len(notifications)} new notifications."
+        body = "\n\n".join(
+            f"{notification.subject}\n{notification.body}"
+            for notification in notifications
+        )
+    # The same notifications always get the same Message-ID, so a mail server
+    # or client can drop a copy that slipped through twice.
+    key = idempotency_key(notification.pk for notification in notifications)
+    return EmailMessage(
         subject=subject,
-        message=message,
-        from_email=None,
-        recipient_list=recipient_list,
-        fail_silently=False,
+        body=body,
+        to=[user.email],
+        headers={"Message-ID": f"<notifications.{key}@{DNS_NAME}>"},
+    )
+
+
+def rate_limit_buckets(address):
+    return (
+        TokenBucket(
+            f"email:{address}",
+            settings.EMAIL_RECIPIENT_RATE_LIMIT / 3600,
+            settings.EMAIL_RECIPIENT_RATE_BURST,
+        ),
+        TokenBucket("email", settings.EMAIL_RATE_LIMIT, settings.EMAIL_RATE_BURST),
+    )
+
+
+def rate_limit_wait(address):
+    """
+    Return 0 when address may be emailed now, else the seconds to wait. A
+    wait leaves both buckets as they were.
+    """
+    recipient, overall = rate_limit_buckets(address)
+    wait = recipient.take()
+    if wait:
+        return wait
+    wait = overall.take()
+    # Waits for the global limit are short enough to sleep off.
+    while 0 < wait <= 1:
+        time.sleep(wait)
+        wait = overall.take()
+    if wait:
+        recipient.refund()
+    return wait
+
+
+def refund_rate_limit(address):
+    # For a recipient that was let through but is not emailed after all.
+    for bucket in rate_limit_buckets(address):
+        bucket.refund()
+
+
+def retry_delay(failures):
+    delay = min(
+        settings.EMAIL_RETRY_BACKOFF * 2**failures, settings.EMAIL_RETRY_BACKOFF_MAX
     )
+    # Jitter keeps a batch that failed together from retrying together.
+    return random.uniform(delay / 2, delay)
+
+
+@shared_task(bind=True, max_retries=None)
+def send_email(self, notification_ids, failures=0, charged=False):
+    """
+    Email one user the digest of notification_ids, which are already marked
+    as emailed. Failed sends are retried with exponential backoff and end up
+    as an EmailFailure after EMAIL_MAX_RETRIES. charged is set once the send
+    has taken its rate-limit tokens, so retries do not take them again.
+    """
+    notifications = list(
+        NotificationModel.objects.filter(pk__in=notification_ids)
+        .select_related("user")
+        .order_by("id")
+    )
+    if not notifications:
+        return "missing"
+    user = notifications[0].user
+    key = idempotency_key(notification.pk for notification in notifications)
+    sent_key = EMAIL_SENT_KEY.format(key=key)
+    sending_key = EMAIL_SENDING_KEY.format(key=key)
+    try:
+        # A retry or a redelivered task must not send what already went out.
+        if cache.get(sent_key):
+            return "duplicate"
+    except Exception as e:
+        logger.warning("Cache unavailable, sending without idempotency key: %s", e)
+        sent_key = sending_key = None
+    if not charged:
+        wait = rate_limit_wait(user.email)
+        if wait:
+            raise self.retry(countdown=wait)
+    # Only held while sending, so a worker that dies mid-send leaves the
+    # mail to a redelivery once it expires instead of losing it.
+    if sending_key is not None and not cache.add(
+        sending_key, 1, timeout=settings.EMAIL_SENDING_TIMEOUT
+    ):
+        refund_rate_limit(user.email)
+        raise self.retry(
+            kwargs={"failures": failures, "charged": False},
+            countdown=settings.EMAIL_SENDING_TIMEOUT,
+        )
+
+    message = build_digest(user, notifications)
+    try:
+        message.send()
+    except SEND_ERRORS as e:
+        if sending_key is not None:
+            cache.delete(sending_key)
+        if failures >= settings.EMAIL_MAX_RETRIES:
+            logger.error("Giving up emailing %s: %s", user.email, e)
+            EmailFailure.objects.create(
+                user=user,
+                notification_ids=[notification.pk for notification in notifications],
+                subject=message.subject,
+                error=repr(e),
+                attempts=failures + 1,
+            )
+            return "failed"
+        logger.warning("Emailing %s failed, retrying: %s", user.email, e)
+        raise self.retry(
+            kwargs={"failures": failures + 1, "charged": True},
+            countdown=retry_delay(failures),
+        )
+    if sent_key is not None:
+        try:
+            cache.set(sent_key, 1, timeout=settings.EMAIL_IDEMPOTENCY_TIMEOUT)
+            cache.delete(sending_key)
+        except Exception as e:
+            logger.warning("Could not record %s as sent: %s", user.email, e)
+    return "sent"
+
+
+def claim(by_user):
+    """
+    Mark the notifications as emailed and return those this run got to
+    first, so concurrent digest runs never email the same notification.
+    """
+    ids = [
+        notification.pk
+        for notifications in by_user.values()
+        for notification in notifications
+    ]
+    if not ids:
+        return {}
+    now = timezone.now()
+    claimed = NotificationModel.objects.filter(
+        pk__in=ids, emailed_at__isnull=True
+    ).update(emailed_at=now)
+    if claimed == len(ids):
+        return by_user
+    mine = set(
+        NotificationModel.objects.filter(pk__in=ids, emailed_at=now).values_list(
+            "pk", flat=True
+        )
+    )
+    by_user = {
+        user: [
+            notification for notification in notifications if notification.pk in mine
+        ]
+        for user, notifications in by_user.items()
+    }
+    return {
+        user: notifications for user, notifications in by_user.items() if notifications
+    }
+
+
+@shared_task
+def send_notification_digests(batch_size=None):
+    batch_size = batch_size or settings.NOTIFICATION_DIGEST_BATCH_SIZE
+    pending = NotificationModel.objects.filter(emailed_at__isnull=True)
+    stats = {"batches": 0, "emails": 0, "notifications": 0, "deferred": 0, "retried": 0}
+    last_user_id = 0
+    with get_connection(fail_silently=False) as connection:
+        while True:
+            started = time.perf_counter()
+            user_ids = list(
+                pending.filter(user_id__gt=last_user_id)
+                .order_by("user_id")
+                .values_list("user_id", flat=True)
+                .distinct()[:batch_size]
+            )
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+            notifications = list(
+                pending.filter(user_id__in=user_ids)
+                .select_related("user")
+                .order_by("user_id", "id")
+            )
+            by_user = {}
+            for notification in notifications:
+                by_user.setdefault(notification.user, []).append(notification)
+            # Users over their rate limit keep their notifications pending,
+            # to be coalesced into a later digest.
+            ready = {
+                user: user_notifications
+                for user, user_notifications in by_user.items()
+                if not rate_limit_wait(user.email)
+            }
+            stats["deferred"] += len(by_user) - len(ready)
+            claimed = claim(ready)
+            # Another run got to these users' notifications first.
+            for user in ready.keys() - claimed.keys():
+                refund_rate_limit(user.email)
+            ready = claimed
+            sent = 0
+            for user, user_notifications in ready.items():
+                try:
+                    connection.send_messages([build_digest(user, user_notifications)])
+                except SEND_ERRORS as e:
+                    logger.warning("Emailing %s failed, retrying: %s", user.email, e)
+                    connection.close()
+                    send_email.apply_async(
+                        ([notification.pk for notification in user_notifications],),
+                        {"failures": 1, "charged": True},
+                        countdown=retry_delay(0),
+                    )
+                    stats["retried"] += 1
+                else:
+                    sent += 1
+
+            elapsed = time.perf_counter() - started
+            stats["batches"] += 1
+            stats["emails"] += sent
+            stats["notifications"] += sum(len(n) for n in ready.values())
+            logger.info(
+                "Sent %d digest emails for %d users in %.3fs (%.1f emails/s).",
+                sent,
+                len(by_user),
+                elapsed,
+                sent / elapsed if elapsed else 0,
+            )
+    return stats
+
+
+@shared_task
+def prune_notifications(batch_size=None):
+    batch_size = batch_size or settings.NOTIFICATION_PRUNE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    expired = NotificationModel.objects.filter(created_at__lt=cutoff)
+    deleted = 0
+    while True:
+        # Small id-ranged chunks keep each DELETE short so writers are not blocked.
+        ids = list(expired.order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        user_ids = set(
+            NotificationModel.objects.filter(id__in=ids).values_list(
+                "user_id", flat=True
+            )
+        )
+        deleted += NotificationModel.objects.filter(id__in=ids).delete()[0]
+        bump_inboxes(user_ids)
+    logger.info("Pruned %d notifications older than %s.", deleted, cutoff)
+    return deleted
+
+
+@shared_task
+def prune_change_log(batch_size=None):
+    batch_size = batch_size or settings.CHANGE_FEED_PRUNE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=settings.CHANGE_FEED_RETENTION_DAYS)
+    expired = ChangeLog.objects.filter(created_at__lt=cutoff)
+    deleted = 0
+    while True:
+        seqs = list(expired.order_by("seq").values_list("seq", flat=True)[:batch_size])
+        if not seqs:
+            break
+        # Always drop a prefix of the feed so the oldest remaining seq tells
+        # sync clients whether their cursor was pruned.
+        deleted += ChangeLog.objects.filter(seq__lte=seqs[-1]).delete()[0]
+    logger.info("Pruned %d change log entries older than %s.", deleted, cutoff)
+    return deleted
+
+
+@shared_task
+def send_due_reminders(batch_size=None):
+    # Imported here because api.notifications imports this module.
+    from api.reminders import send_reminders
+
+    return send_reminders(batch_size or settings.REMINDER_BATCH_SIZE)
+
+
+@shared_task
+def repair_project_summaries():
+    # A save outside a transaction reads its row's stored state without a
+    # lock, so a concurrent save can still skew the deltas; recount whatever
+    # drifted.
+    drifted = {mismatch["project"] for mismatch in check_summaries()}
+    if drifted:
+        logger.warning("Rebuilding %d drifted project summaries.", len(drifted))
+        rebuild_summaries(drifted)
+    return len(drifted)
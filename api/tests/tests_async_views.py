@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import add_role_claims
+from api.metrics import registry
+from api.models import Project, Task, User, Notification
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncViewsTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.project = Project.objects.create(name="Async Project", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+        self.task = Task.objects.create(project=self.project, name="Async Task", created_by=self.admin)
+
+    def headers(self, user):
+        token = add_role_claims(AccessToken.for_user(user), user)
+        return {"Authorization": f"Bearer {token}"}
+
+    async def test_list_matches_sync_view(self):
+        response = await self.async_client.get("/api/async/tasks/", headers=self.headers(self.member))
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["data"][0]["name"], "Async Task")
+        self.assertIn("pagination", body)
+        cached = await self.async_client.get("/api/async/tasks/", headers=self.headers(self.member))
+        self.assertEqual(cached.json()["data"], body["data"])
+
+    async def test_queries_are_counted_by_the_middleware(self):
+        registry.reset()
+        await self.async_client.get("/api/async/tasks/", headers=self.headers(self.member))
+        series = registry.requests[("async_tasks", "GET", "200")]
+        self.assertEqual(series["cache_misses"], 1)
+        self.assertGreaterEqual(series["queries"], 1)
+
+    async def test_requires_authentication_and_role(self):
+        response = await self.async_client.get("/api/async/projects/")
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.put(
+            "/api/async/assign-task/",
+            {"task": self.task.id, "assigned_to": self.member.id},
+            content_type="application/json",
+            headers=self.headers(self.member),
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_assign_task(self):
+        response = await self.async_client.put(
+            "/api/async/assign-task/",
+            {"task": self.task.id, "assigned_to": self.member.id},
+            content_type="application/json",
+            headers=self.headers(self.admin),
+        )
+        self.assertEqual(response.status_code, 200)
+        task = await Task.objects.aget(pk=self.task.id)
+        self.assertEqual(task.assigned_to_id, self.member.id)
+        self.assertEqual(await Notification.objects.filter(user=self.member).acount(), 1)
+
+    async def test_assign_many(self):
+        other = await Task.objects.acreate(project=self.project, name="Other Task", created_by=self.admin)
+        response = await self.async_client.put(
+            "/api/async/assign-task/",
+            [
+                {"task": self.task.id, "assigned_to": self.member.id},
+                {"task": other.id, "assigned_to": self.admin.id},
+            ],
+            content_type="application/json",
+            headers=self.headers(self.admin),
+        )
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result["status"] for result in response.json()["data"]], [200, 400])
@@ -0,0 +1,111 @@
+import time
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import TokenClaimsUser, _local_changes, add_role_claims, claims_are_current
+from api.models import Project, User, Task
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, AUTH_USER_STATE_LOCAL_TTL=0)
+class ClaimsAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.project = Project.objects.create(name="Claims Project", owner=self.member, created_by=self.member)
+        self.project.members.add(self.member)
+        Task.objects.create(project=self.project, name="Claims Task", assigned_to=self.member, created_by=self.member)
+
+    def authenticate(self, user):
+        token = add_role_claims(AccessToken.for_user(user), user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_obtained_token_carries_role_claims(self):
+        response = self.client.post("/api/token/", {"email": "member@example.com", "password": "password"})
+        token = AccessToken(response.data["access"])
+        self.assertEqual(token["role"], "MEMBER")
+        self.assertIn("role_at", token)
+
+    def test_cached_read_runs_no_queries(self):
+        self.authenticate(self.member)
+        self.client.get("/api/tasks/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/tasks/")
+        self.assertEqual(response.data["data"][0]["name"], "Claims Task")
+
+    def test_claims_user_loads_row_lazily(self):
+        user = TokenClaimsUser(self.member.id, "MEMBER")
+        with self.assertNumQueries(0):
+            self.assertEqual(user.role, "MEMBER")
+            self.assertTrue(user.is_authenticated)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "member@example.com")
+
+    def test_role_change_revokes_claims(self):
+        self.authenticate(self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.role = "ADMIN"
+            self.member.save()
+        response = self.client.post("/api/projects/", {"name": "Admin Project", "members": [self.member.id]}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_deactivation_revokes_claims(self):
+        self.authenticate(self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.is_active = False
+            self.member.save(update_fields=["is_active"])
+        response = self.client.get("/api/tasks/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_unrelated_update_keeps_fast_path(self):
+        self.authenticate(self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.last_login = None
+            self.member.save(update_fields=["last_login"])
+        self.client.get("/api/tasks/")
+        with self.assertNumQueries(0):
+            self.client.get("/api/tasks/")
+
+    def test_profile_save_keeps_fast_path(self):
+        self.authenticate(self.member)
+        member = User.objects.get(pk=self.member.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            member.first_name = "Renamed"
+            # Only the row's own UPDATE.
+            with self.assertNumQueries(1):
+                member.save()
+        self.assertIsNone(User.objects.get(pk=self.member.pk).role_changed_at)
+        self.client.get("/api/tasks/")
+        with self.assertNumQueries(0):
+            self.client.get("/api/tasks/")
+
+    def test_role_change_of_a_partly_loaded_user_is_seen(self):
+        member = User.objects.only("id").get(pk=self.member.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            member.role = "ADMIN"
+            member.save()
+        self.assertIsNotNone(User.objects.get(pk=self.member.pk).role_changed_at)
+
+    def test_evicted_marker_is_read_back_from_the_row(self):
+        self.authenticate(self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.is_active = False
+            self.member.save(update_fields=["is_active"])
+        cache.clear()
+        response = self.client.get("/api/tasks/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_claims_user_is_active_comes_from_the_row(self):
+        User.objects.filter(pk=self.member.pk).update(is_active=False)
+        user = TokenClaimsUser(self.member.id, "MEMBER")
+        with self.assertNumQueries(1):
+            self.assertFalse(user.is_active)
+
+    @override_settings(AUTH_USER_STATE_LOCAL_TTL=60, AUTH_USER_STATE_LOCAL_SIZE=2)
+    def test_local_state_is_bounded(self):
+        _local_changes.clear()
+        for user_id in (self.member.id, self.member.id + 1, self.member.id + 2):
+            claims_are_current(user_id, int(time.time()) + 1)
+        self.assertEqual(list(_local_changes), [self.member.id + 1, self.member.id + 2])
@@ -0,0 +1,159 @@
+from unittest import mock
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import User, Project, Task, Milestone, Notification
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TaskBulkViewTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.outsider = User.objects.create_user(email="outsider@example.com", username="outsider", password="password", role="MEMBER")
+        self.project = Project.objects.create(name="Project", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.admin)}")
+
+    def items(self, count, user):
+        return [
+            {"project": self.project.id, "name": f"Task {i}", "assigned_to": user.id}
+            for i in range(count)
+        ]
+
+    def test_bulk_create_uses_constant_queries(self):
+        # Includes the project summary update, the change log and search index
+        # inserts, and the notification bulk insert that runs on commit.
+        with self.assertNumQueries(12), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/tasks/bulk/", self.items(3, self.member), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(12), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/tasks/bulk/",
+                [dict(item, name=f"More {i}") for i, item in enumerate(self.items(30, self.member))],
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.count(), 33)
+        self.assertEqual(Notification.objects.filter(user=self.member).count(), 33)
+
+    def test_bulk_create_reports_per_item_results(self):
+        Task.objects.create(project=self.project, name="Existing", created_by=self.admin)
+        items = self.items(1, self.member) + [
+            {"project": self.project.id, "name": "Outsider task", "assigned_to": self.outsider.id},
+            {"project": self.project.id, "name": "Existing"},
+            {"project": 9999, "name": "Missing project"},
+        ]
+        response = self.client.post("/api/tasks/bulk/", items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result["status"] for result in response.data["data"]], [201, 400, 400, 400]
+        )
+        self.assertTrue(Task.objects.filter(name="Task 0").exists())
+        self.assertFalse(Task.objects.filter(name="Outsider task").exists())
+
+    def test_bulk_update_and_delete(self):
+        self.client.post("/api/tasks/bulk/", self.items(3, self.member), format="json")
+        ids = list(Task.objects.order_by("id").values_list("id", flat=True))
+        response = self.client.put(
+            "/api/tasks/bulk/",
+            [{"id": pk, "status": "COMPLETED"} for pk in ids] + [{"id": 9999, "status": "COMPLETED"}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(Task.objects.filter(status="COMPLETED").count(), 3)
+
+        response = self.client.delete(f"/api/tasks/bulk/?ids={ids[0]},{ids[1]}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Task.objects.values_list("id", flat=True)), [ids[2]])
+
+    def test_bulk_delete_bumps_each_version_once(self):
+        other = Project.objects.create(name="Other", owner=self.admin, created_by=self.admin)
+        tasks = Task.objects.bulk_create(
+            Task(project=[self.project, other][i % 2], name=f"Doomed {i}", created_by=self.admin) for i in range(20)
+        )
+        with mock.patch("api.cache.bump_versions") as bump_versions, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/tasks/bulk/?ids={','.join(str(task.id) for task in tasks)}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        bump_versions.assert_called_once_with(*sorted(["task", f"project:{self.project.id}", f"project:{other.id}"]))
+
+    def test_bulk_assign(self):
+        tasks = Task.objects.bulk_create(
+            Task(project=self.project, name=f"Unassigned {i}", created_by=self.admin) for i in range(3)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                "/api/assign-task/",
+                [{"task": task.id, "assigned_to": self.member.id} for task in tasks]
+                + [{"task": tasks[0].id, "assigned_to": self.outsider.id}],
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(Task.objects.filter(assigned_to=self.member).count(), 3)
+        self.assertEqual(Notification.objects.filter(subject="New task assigned.").count(), 3)
+
+    @mock.patch("api.notifications.send_notification_digests.apply_async")
+    def test_assign_uses_constant_queries(self, apply_async):
+        self.project.members.add(self.admin)
+        tasks = Task.objects.bulk_create(
+            Task(project=self.project, name=f"Unassigned {i}", created_by=self.admin) for i in range(30)
+        )
+        # User, the locked tasks passing the membership check, their UPDATE,
+        # assigned tasks with their users, change log, and the notifications
+        # inserted on commit; plus the savepoint around the write.
+        for count in (2, 30):
+            users = [self.member, self.admin]
+            items = [{"task": task.id, "assigned_to": users[i % 2].id} for i, task in enumerate(tasks[:count])]
+            with self.assertNumQueries(8), self.captureOnCommitCallbacks(execute=True):
+                response = self.client.put("/api/assign-task/", items, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.filter(assigned_to=self.admin).count(), 15)
+        with self.assertNumQueries(8), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put("/api/assign-task/", {"task": tasks[0].id, "assigned_to": self.admin.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.get(pk=tasks[0].id).assigned_to, self.admin)
+
+    def test_assign_reports_each_failure(self):
+        task = Task.objects.create(project=self.project, name="Assigned", assigned_to=self.member, created_by=self.admin)
+        response = self.client.put(
+            "/api/assign-task/",
+            [
+                {"task": task.id, "assigned_to": self.outsider.id},
+                {"task": task.id, "assigned_to": self.member.id},
+                {"task": 9999, "assigned_to": self.member.id},
+                {"task": task.id, "assigned_to": 9999},
+            ],
+            format="json",
+        )
+        self.assertEqual([result["status"] for result in response.data["data"]], [400, 400, 404, 400])
+        self.assertEqual(response.data["data"][0]["errors"], "The user is not assigned to the project that belongs this task.")
+        self.assertEqual(Task.objects.get(pk=task.id).assigned_to, self.member)
+        response = self.client.put("/api/assign-task/", {"task": task.id, "assigned_to": 9999}, format="json")
+        self.assertEqual(response.data["message"], "No user with given id.")
+        response = self.client.put("/api/assign-task/", {"task": 9999, "assigned_to": self.member.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MilestoneBulkViewTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.project = Project.objects.create(name="Project", owner=self.admin, created_by=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.admin)}")
+
+    def test_bulk_create_rejects_duplicate_names_in_payload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/milestones/bulk/",
+                [
+                    {"project": self.project.id, "name": "M1", "assigned_to": self.admin.id},
+                    {"project": self.project.id, "name": "M1"},
+                ],
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(Milestone.objects.count(), 1)
+        self.assertEqual(Notification.objects.filter(user=self.admin).count(), 1)
@@ -0,0 +1,145 @@
+import time
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.cache import ENDPOINT_SCOPES, MODIFIED_KEY, get_stats
+from api.models import Notification, Project, User, Task
+from api.notifications import mark_read
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+DUMMY_CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ListCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.project = Project.objects.create(name="Cached Project", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+        self.task = Task.objects.create(project=self.project, name="Cached Task", assigned_to=self.member, created_by=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.member)}")
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.client.get("/api/tasks/")
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/tasks/")
+        self.assertEqual(response.data["data"][0]["name"], "Cached Task")
+        self.assertEqual(get_stats(["tasks"])["tasks"], {"hit": 1, "miss": 1})
+
+    def test_save_invalidates_cached_payload(self):
+        self.client.get("/api/tasks/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.name = "Renamed Task"
+            self.task.save()
+        response = self.client.get("/api/tasks/")
+        self.assertEqual(response.data["data"][0]["name"], "Renamed Task")
+
+    def test_related_table_changes_invalidate(self):
+        self.client.get("/api/tasks/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.name = "Renamed Project"
+            self.project.save()
+        response = self.client.get("/api/tasks/")
+        self.assertEqual(response.data["data"][0]["project_name"], "Renamed Project")
+
+    def test_member_changes_invalidate(self):
+        response = self.client.get("/api/projects/")
+        self.assertEqual(len(response.data["data"][0]["member_details"]), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.add(self.admin)
+        response = self.client.get("/api/projects/")
+        self.assertEqual(len(response.data["data"][0]["member_details"]), 2)
+
+    def test_rolled_back_write_keeps_cached_payload(self):
+        self.client.get("/api/tasks/")
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.task.name = "Uncommitted"
+            self.task.save()
+        Task.objects.filter(pk=self.task.pk).update(name="Cached Task")
+        self.assertEqual(len(callbacks), 3)
+        self.client.get("/api/tasks/")
+        self.assertEqual(get_stats(["tasks"])["tasks"]["hit"], 1)
+
+    def test_delete_invalidates_cached_payload(self):
+        self.client.get("/api/tasks/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.delete()
+        response = self.client.get("/api/tasks/")
+        self.assertEqual(response.data["data"], [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.project = Project.objects.create(name="Tagged Project", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+        self.task = Task.objects.create(project=self.project, name="Tagged Task", assigned_to=self.member, created_by=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.member)}")
+
+    def test_if_none_match_skips_the_payload(self):
+        etag = self.client.get("/api/tasks/")["ETag"]
+        # Only the user lookup for a token without role claims.
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.name = "Renamed Task"
+            self.task.save()
+        response = self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get("/api/tasks/")["ETag"]
+        response = self.client.get("/api/tasks/?status=COMPLETED", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        # As if the projects and users were last written a minute ago.
+        written = time.time() - 60
+        cache.set_many({MODIFIED_KEY.format(scope=scope): written for scope in ENDPOINT_SCOPES["projects"]}, timeout=None)
+        last_modified = self.client.get("/api/projects/")["Last-Modified"]
+        self.assertEqual(last_modified, http_date(written))
+        # Answered before the payload is built: only the user lookup.
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/projects/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get("/api/projects/", HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.name = "Renamed Project"
+            self.project.save()
+        response = self.client.get("/api/projects/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        # Written within the current second, so no Last-Modified yet.
+        self.assertNotIn("Last-Modified", response)
+
+    @override_settings(CACHES=DUMMY_CACHES)
+    def test_falls_back_to_an_aggregate_without_a_cache(self):
+        etag = self.client.get("/api/milestones/")["ETag"]
+        response = self.client.get("/api/milestones/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        etag = self.client.get("/api/tasks/")["ETag"]
+        Task.objects.create(project=self.project, name="Another Task", created_by=self.admin)
+        response = self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_notification_inbox_etag(self):
+        Notification.objects.create(user=self.member, subject="Hello", body="Hello")
+        etag = self.client.get("/api/notifications/")["ETag"]
+        # Tagged from the inbox version, so a poll runs no aggregate.
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/notifications/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        mark_read(self.member.id, Notification.objects.get(user=self.member).id)
+        response = self.client.get("/api/notifications/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from api.models import User, Project, Task, Milestone, Notification
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SeedAndBenchmarkCommandTest(TestCase):
+    def seed(self):
+        call_command(
+            "seed_data",
+            users=10,
+            projects=3,
+            members_per_project=4,
+            tasks=40,
+            milestones=10,
+            notifications=20,
+            stdout=StringIO(),
+        )
+
+    def test_seed_data(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Project.members.through.objects.count(), 12)
+        self.assertEqual(Task.objects.count(), 40)
+        self.assertEqual(Milestone.objects.count(), 10)
+        self.assertFalse(Notification.objects.filter(emailed_at__isnull=True).exists())
+
+    def test_bench_api_writes_report(self):
+        self.seed()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.json")
+            call_command("bench_api", requests=3, warmup=1, output=path, stdout=StringIO())
+            with open(path) as report_file:
+                report = json.load(report_file)
+        self.assertEqual(
+            set(report["endpoints"]),
+            {"projects", "tasks", "milestones", "tasks_filtered", "assign_task"},
+        )
+        for result in report["endpoints"].values():
+            self.assertEqual(result["status_codes"], {"200": 3})
+            self.assertIn("p99", result["latency_ms"])
@@ -0,0 +1,32 @@
+import os
+import tempfile
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+
+class SQLiteConnectionTest(SimpleTestCase):
+    def connect(self, **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "db.sqlite3")
+        wrapper = DatabaseWrapper({**connection.settings_dict, "NAME": path, "OPTIONS": options}, alias="pragma_test")
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_JOURNAL_MODE="WAL", SQLITE_SYNCHRONOUS="NORMAL")
+    def test_new_connections_use_wal(self):
+        wrapper = self.connect(timeout=20)
+        self.assertEqual(self.pragma(wrapper, "journal_mode"), "wal")
+        # NORMAL is 1.
+        self.assertEqual(self.pragma(wrapper, "synchronous"), 1)
+        self.assertEqual(self.pragma(wrapper, "busy_timeout"), 20000)
+
+    @override_settings(SQLITE_JOURNAL_MODE="DELETE")
+    def test_journal_mode_is_configurable(self):
+        self.assertEqual(self.pragma(self.connect(), "journal_mode"), "delete")
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import add_role_claims
+from api.models import Milestone, Project, Task, User
+from api.serializers import TaskSerializer
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_EXPORT_CHUNK_SIZE=2)
+class ExportTest(APITestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.manager = User.objects.create_user(email="manager@example.com", username="manager", password="password", role="MANAGER")
+        self.project = Project.objects.create(name="Export Project", owner=self.manager, created_by=self.manager)
+        self.project.members.add(self.member)
+        for i in range(5):
+            Task.objects.create(project=self.project, name=f"Export Task {i}", assigned_to=self.member, created_by=self.manager)
+        Milestone.objects.create(project=self.project, name="Export Milestone", due_date="2030-01-01", created_by=self.manager)
+        token = add_role_claims(AccessToken.for_user(self.manager), self.manager)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        cache.clear()
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_streams_every_row(self):
+        # Once the token's claims check is cached, one query, fetched from the
+        # cursor two rows at a time.
+        self.read(self.client.get("/api/milestones/export/"))
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/tasks/export/")
+            content = self.read(response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="tasks.csv"', response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["name"], "Export Task 0")
+        self.assertEqual(rows[0]["assigned_user"], "member")
+        self.assertEqual(rows[0]["project_name"], "Export Project")
+
+    def test_ndjson_export_with_fields_and_filters(self):
+        response = self.client.get("/api/milestones/export/?export_format=ndjson&fields=id,name,due_date")
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(rows, [{"id": rows[0]["id"], "name": "Export Milestone", "due_date": "2030-01-01"}])
+        response = self.client.get(f"/api/tasks/export/?export_format=ndjson&status=COMPLETED&project={self.project.id}")
+        self.assertEqual(self.read(response), "")
+
+    def test_timestamps_match_the_api(self):
+        task = Task.objects.order_by("id").first()
+        expected = TaskSerializer(task).data["updated_at"]
+        self.assertTrue(expected.endswith("Z"))
+        rows = list(csv.DictReader(io.StringIO(self.read(self.client.get("/api/tasks/export/?fields=id,updated_at")))))
+        self.assertEqual(rows[0]["updated_at"], expected)
+        line = self.read(self.client.get("/api/tasks/export/?export_format=ndjson&fields=id,updated_at")).splitlines()[0]
+        self.assertEqual(json.loads(line)["updated_at"], expected)
+
+    def test_project_export_includes_members(self):
+        response = self.client.get("/api/projects/export/?export_format=ndjson")
+        row = json.loads(self.read(response))
+        self.assertEqual(row["member_details"][0]["username"], "member")
+
+    def test_invalid_parameters(self):
+        response = self.client.get("/api/tasks/export/?export_format=xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get("/api/tasks/export/?fields=id,password")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_members_cannot_export(self):
+        token = add_role_claims(AccessToken.for_user(self.member), self.member)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get("/api/tasks/export/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.metrics import registry
+from api.models import User, Project, Task
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_SLOW_REQUEST_MS=0, API_METRICS_TOKEN="secret")
+class MetricsMiddlewareTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        project = Project.objects.create(name="Project", owner=self.member, created_by=self.member)
+        project.members.add(self.member)
+        Task.objects.create(project=project, name="Task", created_by=self.member)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.member)}")
+
+    def test_requests_are_exposed_in_prometheus_format(self):
+        self.client.get("/api/tasks/")
+        self.client.get("/api/tasks/")
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer secret")
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        labels = 'endpoint="tasks",method="GET",status="200"'
+        self.assertIn(f"api_request_duration_seconds_count{{{labels}}} 2", body)
+        self.assertIn(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', body)
+        self.assertIn(f"api_cache_hits_total{{{labels}}} 1", body)
+        self.assertIn(f"api_cache_misses_total{{{labels}}} 1", body)
+        # The JWT user lookup on both requests, plus the member's visible
+        # projects and the list query on the miss.
+        self.assertIn(f"api_db_queries_total{{{labels}}} 4", body)
+        self.assertNotIn('endpoint="metrics"', body)
+
+    def test_metrics_token(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 200)
+
+    @override_settings(API_METRICS_TOKEN="")
+    def test_metrics_without_a_token_are_only_served_in_debug(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 200)
+
+    @override_settings(API_SLOW_REQUEST_MS=0.001)
+    def test_slow_requests_are_logged_without_sql_by_default(self):
+        with self.assertLogs("api.middleware", level="WARNING") as logs:
+            self.client.get("/api/tasks/")
+        self.assertIn("Slow request GET /api/tasks/", logs.output[0])
+        self.assertNotIn("SELECT", logs.output[0])
+
+    @override_settings(API_SLOW_REQUEST_MS=0.001, API_SLOW_REQUEST_SQL=True)
+    def test_slow_requests_are_logged_with_sql(self):
+        with self.assertLogs("api.middleware", level="WARNING") as logs:
+            self.client.get("/api/tasks/")
+        self.assertIn("Slow request GET /api/tasks/", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    @override_settings(API_METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.get("/api/tasks/")
+        self.assertEqual(registry.requests, {})
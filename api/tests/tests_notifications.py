@@ -0,0 +1,89 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.cache import get_unread_count
+from api.models import User, Notification
+from api.notifications import notify
+from api.tasks import prune_notifications
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("api.notifications.send_notification_digests.apply_async")
+class NotificationInboxTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.other = User.objects.create_user(email="other@example.com", username="other", password="password", role="MEMBER")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def notify(self, user, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(Notification(user=user, subject=f"subject {i}", body="body") for i in range(count))
+
+    def test_inbox_lists_only_own_notifications_newest_first(self, apply_async):
+        self.notify(self.user, 5)
+        self.notify(self.other, 2)
+        response = self.client.get("/api/notifications/", {"page_size": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [row["id"] for row in response.data["data"]]
+        response = self.client.get(response.data["pagination"]["next"])
+        ids += [row["id"] for row in response.data["data"]]
+        expected = Notification.objects.filter(user=self.user).order_by("-created_at", "-id")
+        self.assertEqual(ids, list(expected.values_list("id", flat=True)))
+
+    def test_unread_count_is_served_from_cache(self, apply_async):
+        self.notify(self.user, 4)
+        response = self.client.get("/api/notifications/unread-count/")
+        self.assertEqual(response.data["data"]["unread_count"], 4)
+        self.notify(self.user, 2)
+        response = self.client.get("/api/notifications/unread-count/")
+        self.assertEqual(response.data["data"]["unread_count"], 6)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/notifications/unread-count/")
+        self.assertEqual(response.data["data"]["unread_count"], 6)
+
+    def test_count_taken_before_a_write_is_not_kept(self, apply_async):
+        count = QuerySet.count
+
+        def count_then_write(queryset):
+            # A notification commits after the count but before it is cached.
+            result = count(queryset)
+            self.notify(self.user, 1)
+            return result
+
+        with mock.patch.object(QuerySet, "count", count_then_write):
+            self.assertEqual(get_unread_count(self.user.id), 0)
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+    def test_mark_read_up_to(self, apply_async):
+        self.notify(self.user, 4)
+        self.notify(self.other, 1)
+        self.client.get("/api/notifications/unread-count/")
+        third = Notification.objects.filter(user=self.user).order_by("id")[2]
+        response = self.client.put("/api/notifications/", {"up_to": third.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"], {"marked_read": 3, "unread_count": 1})
+        response = self.client.get("/api/notifications/", {"is_read": "false"})
+        self.assertEqual(len(response.data["data"]), 1)
+        self.assertFalse(Notification.objects.get(user=self.other).is_read)
+
+    @override_settings(NOTIFICATION_RETENTION_DAYS=30)
+    def test_prune_removes_expired_rows_in_chunks(self, apply_async):
+        self.notify(self.user, 5)
+        self.client.get("/api/notifications/unread-count/")
+        old = list(Notification.objects.order_by("id")[:3])
+        Notification.objects.filter(id__in=[n.id for n in old]).update(
+            created_at=timezone.now() - timedelta(days=31)
+        )
+        self.assertEqual(prune_notifications(batch_size=2), 3)
+        self.assertEqual(Notification.objects.count(), 2)
+        response = self.client.get("/api/notifications/unread-count/")
+        self.assertEqual(response.data["data"]["unread_count"], 2)
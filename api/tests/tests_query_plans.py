@@ -0,0 +1,95 @@
+import re
+from datetime import date, timedelta
+from django.db import connection
+from django.test import TestCase
+from api.models import User, Project, Task, Milestone, Notification, Status
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        users = User.objects.bulk_create(
+            User(email=f"user{i}@example.com", username=f"user{i}", role="MEMBER") for i in range(20)
+        )
+        projects = Project.objects.bulk_create(
+            Project(name=f"Project {i}", owner=cls.admin, created_by=cls.admin) for i in range(20)
+        )
+        statuses = Status.values
+        Task.objects.bulk_create(
+            Task(
+                project=projects[i % len(projects)],
+                name=f"Task {i}",
+                assigned_to=users[i % len(users)],
+                status=statuses[i % len(statuses)],
+                due_date=date(2024, 1, 1) + timedelta(days=i % 365),
+                created_by=cls.admin,
+            )
+            for i in range(2000)
+        )
+        Milestone.objects.bulk_create(
+            Milestone(
+                project=projects[i % len(projects)],
+                name=f"Milestone {i}",
+                is_achieved=i % 2 == 0,
+                due_date=date(2024, 1, 1) + timedelta(days=i % 365),
+                created_by=cls.admin,
+            )
+            for i in range(500)
+        )
+        Notification.objects.bulk_create(
+            Notification(user=users[i % len(users)], subject="subject", body="body")
+            for i in range(2000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        cls.user = users[0]
+        cls.project = projects[0]
+
+    def explain(self, queryset):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.explain(queryset)
+        self.assertIn(index_name, plan, plan)
+        self.assertNotIn("Seq Scan", plan, plan)
+        table = queryset.model._meta.db_table
+        self.assertIsNone(re.search(rf"\bSCAN {table}\b(?! USING)", plan), plan)
+
+    def test_task_status_filter(self):
+        self.assertUsesIndex(Task.objects.filter(status=Status.ON_HOLD), "task_status_idx")
+
+    def test_task_due_date_range(self):
+        self.assertUsesIndex(
+            Task.objects.filter(due_date__lte=date(2024, 1, 10)), "task_due_date_idx"
+        )
+
+    def test_task_project_status(self):
+        self.assertUsesIndex(
+            Task.objects.filter(project=self.project, status=Status.COMPLETED),
+            "task_project_status_idx",
+        )
+
+    def test_milestone_project_achieved(self):
+        self.assertUsesIndex(
+            Milestone.objects.filter(project=self.project, is_achieved=False),
+            "milestone_project_achieved_idx",
+        )
+
+    def test_notification_inbox(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.user).order_by("-created_at"),
+            "notification_user_created_idx",
+        )
+
+    def test_unsent_notification_scan(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(emailed_at__isnull=True)
+            .order_by("user_id")
+            .values_list("user_id", flat=True)
+            .distinct(),
+            "notification_unsent_user_idx",
+        )
@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from unittest import mock
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api import views
+from api.cache import bump_versions, get_stats
+from api.middleware import ReplicaMiddleware
+from api.models import User, Project, Task
+from api.replicas import ReplicaRouter, replica_reads, mark_written, user_scope
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, REPLICA_LAG_SECONDS=5)
+@mock.patch("api.replicas.replica_alias", return_value="replica")
+class ReplicaRouterTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+
+    def test_routes_reads_inside_replica_reads(self, replica_alias):
+        self.assertIsNone(self.router.db_for_read(Task))
+        with replica_reads(self.member, ["task"]):
+            self.assertEqual(self.router.db_for_read(Task), "replica")
+            self.assertEqual(self.router.db_for_write(Task), DEFAULT_DB_ALIAS)
+        self.assertIsNone(self.router.db_for_read(Task))
+        self.assertFalse(self.router.allow_migrate("replica", "api"))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, "api"))
+
+    def test_recent_writes_stay_on_the_primary(self, replica_alias):
+        mark_written([user_scope(self.member.id)])
+        with replica_reads(self.member, ["task"]):
+            self.assertIsNone(self.router.db_for_read(Task))
+        other = User.objects.create_user(email="other@example.com", username="other", password="password", role="MEMBER")
+        with replica_reads(other, ["task"]):
+            self.assertEqual(self.router.db_for_read(Task), "replica")
+        # A bumped cache scope keeps everyone reading it on the primary, so its
+        # new payloads are not built from a replica that lags behind.
+        bump_versions("task")
+        with replica_reads(other, ["task", "project"]):
+            self.assertIsNone(self.router.db_for_read(Task))
+        with replica_reads(other, ["milestone"]):
+            self.assertEqual(self.router.db_for_read(Task), "replica")
+
+    def test_writes_are_marked_before_versions_move(self, replica_alias):
+        def bump(key):
+            # Whoever reads the new version must already find the mark.
+            with replica_reads(self.member, ["task"]):
+                self.assertIsNone(self.router.db_for_read(Task))
+
+        with mock.patch("api.cache._bump", side_effect=bump) as _bump:
+            bump_versions("task")
+        _bump.assert_called_once()
+
+    def test_reads_stay_on_the_primary_without_a_cache(self, replica_alias):
+        with mock.patch("api.replicas.cache.get_many", side_effect=ConnectionError):
+            with replica_reads(self.member, ["task"]):
+                self.assertIsNone(self.router.db_for_read(Task))
+
+    @mock.patch("api.middleware.replica_alias", return_value="replica")
+    def test_middleware_marks_writers(self, middleware_replica_alias, replica_alias):
+        middleware = ReplicaMiddleware(lambda request: HttpResponse())
+        for method in ("get", "put"):
+            request = getattr(RequestFactory(), method)("/api/tasks/")
+            request.user = self.member
+            middleware(request)
+            with replica_reads(self.member, []):
+                self.assertEqual(self.router.db_for_read(Task), None if method == "put" else "replica")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReplicaListTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.project = Project.objects.create(name="Project", owner=self.member, created_by=self.member)
+        self.project.members.add(self.member)
+        Task.objects.create(project=self.project, name="Task", created_by=self.member)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.member)}")
+
+    def routed_models(self, url):
+        # The test database has no second alias, so "default" stands in for the
+        # replica and the router's answers are recorded.
+        routed = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            if alias is not None:
+                routed.append(model.__name__)
+            return alias
+
+        with mock.patch("api.replicas.replica_alias", return_value=DEFAULT_DB_ALIAS), mock.patch.object(ReplicaRouter, "db_for_read", record):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return routed
+
+    def test_list_and_detail_reads_use_the_replica(self):
+        self.assertIn("Task", self.routed_models("/api/tasks/"))
+        self.assertIn("Task", self.routed_models("/api/async/tasks/?page_size=5"))
+        self.assertIn("Project", self.routed_models(f"/api/projects/{self.project.id}/"))
+        # Authentication is always read from the primary.
+        self.assertNotIn("User", self.routed_models("/api/milestones/"))
+
+    def test_payload_is_stored_under_the_versions_read_before_routing(self):
+        routed_reads = views.replica_reads
+
+        @contextmanager
+        def write_after_routing(user, scopes):
+            with routed_reads(user, scopes):
+                # A write commits once this request has picked the replica.
+                bump_versions("task")
+                yield
+
+        with mock.patch("api.replicas.replica_alias", return_value=DEFAULT_DB_ALIAS):
+            with mock.patch("api.views.replica_reads", write_after_routing):
+                self.client.get("/api/tasks/")
+            # The page built from the replica is not served for the new version.
+            self.client.get("/api/tasks/")
+        self.assertEqual(get_stats(["tasks"])["tasks"], {"hit": 0, "miss": 2})
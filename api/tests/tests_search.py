@@ -0,0 +1,99 @@
+from unittest import mock
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import add_role_claims
+from api.models import Milestone, Project, SearchEntry, Task, User
+from api.search import rebuild_search_index
+
+
+class SearchViewTest(APITestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.project = Project.objects.create(name="Website Redesign", description="New landing pages", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+        self.other = Project.objects.create(name="Internal Tools", owner=self.admin, created_by=self.admin)
+        self.task = Task.objects.create(project=self.project, name="Design review", description="Walk through the mockups", created_by=self.admin)
+        Task.objects.create(project=self.project, name="Copy edits", description="Review the design copy", created_by=self.admin)
+        Milestone.objects.create(project=self.project, name="Design signed off", created_by=self.admin)
+        Task.objects.create(project=self.other, name="Design tokens", created_by=self.admin)
+        self.login(self.admin)
+
+    def login(self, user):
+        token = add_role_claims(AccessToken.for_user(user), user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def search(self, query):
+        response = self.client.get(f"/api/search/?{query}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["data"]
+
+    def test_ranks_name_matches_first_with_prefixes(self):
+        results = self.search("q=desig rev")
+        self.assertEqual([(r["kind"], r["name"]) for r in results], [("task", "Design review"), ("task", "Copy edits")])
+        self.assertEqual(results[0]["id"], self.task.id)
+        self.assertEqual(results[0]["project"], self.project.id)
+
+    @mock.patch("api.search.RANK_LIMIT", 3)
+    def test_common_terms_are_newest_first(self):
+        results = self.search("q=design")
+        self.assertEqual([r["name"] for r in results], ["Design tokens", "Design signed off", "Copy edits", "Design review"])
+        self.assertEqual([r["name"] for r in self.search("q=design rev")], ["Design review", "Copy edits"])
+
+    def test_filters_by_kind_and_project(self):
+        self.assertEqual([r["name"] for r in self.search("q=design&kind=milestone")], ["Design signed off"])
+        self.assertEqual([r["name"] for r in self.search(f"q=design&project={self.other.id}")], ["Design tokens"])
+
+    def test_members_only_find_their_projects(self):
+        self.login(self.member)
+        results = self.search("q=design")
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r["project"] == self.project.id for r in results))
+
+    def test_pagination(self):
+        response = self.client.get("/api/search/?q=design&page_size=3")
+        self.assertEqual(len(response.data["data"]), 3)
+        self.assertIn("page=2", response.data["pagination"]["next"])
+        response = self.client.get(response.data["pagination"]["next"])
+        self.assertEqual(len(response.data["data"]), 1)
+        self.assertIsNone(response.data["pagination"]["next"])
+
+    def test_index_follows_writes(self):
+        self.task.name = "Accessibility audit"
+        self.task.save()
+        self.assertEqual([r["name"] for r in self.search("q=accessib")], ["Accessibility audit"])
+        # Saves that leave the text alone only update the row and the change log.
+        with self.assertNumQueries(2):
+            self.task.assigned_to = self.member
+            self.task.save(update_fields=["assigned_to"])
+        self.task.delete()
+        self.assertEqual(self.search("q=accessibility"), [])
+        self.other.delete()
+        self.assertEqual(self.search("q=tokens"), [])
+        self.assertFalse(SearchEntry.objects.filter(project_id=self.other.id).exists())
+
+    def test_bulk_writes_are_indexed(self):
+        response = self.client.post("/api/tasks/bulk/", [{"project": self.project.id, "name": "Bulk onboarding"}], format="json")
+        task_id = response.data["data"][0]["id"]
+        self.assertEqual([r["id"] for r in self.search("q=onboard")], [task_id])
+        self.client.put("/api/tasks/bulk/", [{"id": task_id, "name": "Bulk offboarding"}], format="json")
+        self.assertEqual(self.search("q=onboard"), [])
+        self.client.delete(f"/api/tasks/bulk/?ids={task_id}")
+        self.assertEqual(self.search("q=offboard"), [])
+
+    def test_rebuild(self):
+        SearchEntry.objects.all().delete()
+        self.assertEqual(self.search("q=design"), [])
+        self.assertEqual(rebuild_search_index(), 6)
+        self.assertEqual(len(self.search("q=design")), 4)
+
+    @override_settings(API_SEARCH_BACKEND="api.search.LikeSearchBackend")
+    def test_like_fallback(self):
+        self.assertCountEqual([r["name"] for r in self.search("q=design review")], ["Design review", "Copy edits"])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get("/api/search/").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get("/api/search/?q=x&kind=user").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.search("q=%22%2A%28"), [])
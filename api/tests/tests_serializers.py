@@ -0,0 +1,127 @@
+import json
+from datetime import date
+from django.db.models import Prefetch
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from api.models import User, Project, Task, Milestone
+from api.renderers import FastJSONRenderer
+from api.serializers import ProjectSerializer, TaskSerializer, MilestoneSerializer
+from api.views import ProjectView, TaskView, MilestoneView
+
+
+class ProjectSerializerQueryTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.members = [
+            User.objects.create_user(email=f"member{i}@example.com", username=f"member{i}", password="password", role="MEMBER")
+            for i in range(5)
+        ]
+
+    def create_projects(self, count):
+        for i in range(count):
+            project = Project.objects.create(name=f"Project {i}", owner=self.admin, created_by=self.admin)
+            project.members.add(*self.members)
+
+    def serialize(self):
+        queryset = Project.objects.prefetch_related(
+            Prefetch("members", queryset=User.objects.only("id", "username", "email"))
+        )
+        return ProjectSerializer(
+            queryset, many=True, fields=["id", "name", "description", "owner", "member_details"]
+        ).data
+
+    def test_list_serialization_uses_constant_queries(self):
+        self.create_projects(2)
+        with self.assertNumQueries(2):
+            self.serialize()
+        Project.objects.all().delete()
+        self.create_projects(20)
+        with self.assertNumQueries(2):
+            data = self.serialize()
+        self.assertEqual(len(data), 20)
+        self.assertEqual(
+            data[0]["member_details"][0],
+            {"id": self.members[0].id, "username": "member0", "email": "member0@example.com"},
+        )
+
+
+class TaskSerializerValidationTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.outsider = User.objects.create_user(email="outsider@example.com", username="outsider", password="password", role="MEMBER")
+        self.project = Project.objects.create(name="Project", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+
+    def task_data(self, user, name="Task"):
+        return {"project": self.project.id, "name": name, "assigned_to": user.id, "created_by": self.admin.id}
+
+    def test_membership_check_is_a_single_query(self):
+        # project, assigned_to and created_by lookups, the unique name check and one EXISTS.
+        with self.assertNumQueries(5):
+            self.assertTrue(TaskSerializer(data=self.task_data(self.member)).is_valid())
+        self.project.members.add(
+            *[
+                User.objects.create_user(email=f"extra{i}@example.com", username=f"extra{i}", password="password", role="MEMBER")
+                for i in range(20)
+            ]
+        )
+        with self.assertNumQueries(5):
+            self.assertTrue(TaskSerializer(data=self.task_data(self.member)).is_valid())
+
+    def test_rejects_non_member(self):
+        serializer = TaskSerializer(data=self.task_data(self.outsider))
+        self.assertFalse(serializer.is_valid())
+
+    def test_partial_update_uses_instance_project(self):
+        task = Task.objects.create(project=self.project, name="Existing", created_by=self.admin)
+        serializer = TaskSerializer(instance=task, data={"assigned_to": self.outsider.id}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        serializer = TaskSerializer(instance=task, data={"assigned_to": self.member.id}, partial=True)
+        self.assertTrue(serializer.is_valid())
+
+    def test_preloaded_relations_reject_booleans(self):
+        preloaded = {Project: {1: self.project, self.project.id: self.project}, User: {self.member.id: self.member, self.admin.id: self.admin}}
+        serializer = TaskSerializer(data=dict(self.task_data(self.member), project=True), context={"preloaded": preloaded})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors["project"][0].code, "incorrect_type")
+        serializer = TaskSerializer(data=dict(self.task_data(self.member), project=str(self.project.id)), context={"preloaded": preloaded})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+
+class ValuesDataTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.project = Project.objects.create(name="Project", description="desc", owner=self.admin, created_by=self.admin)
+        self.empty_project = Project.objects.create(name="Empty", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member, self.admin)
+        Task.objects.create(project=self.project, name="Assigned", assigned_to=self.member, created_by=self.admin)
+        Task.objects.create(project=self.project, name="Unassigned", created_by=self.admin)
+        Milestone.objects.create(project=self.project, name="Milestone", due_date=date(2024, 5, 1), created_by=self.admin)
+
+    def assertSameOutput(self, serializer_class, queryset, fields):
+        expected = serializer_class(queryset.order_by("id"), many=True, fields=fields).data
+        values = serializer_class.values_queryset(queryset, fields).order_by("id")
+        actual = serializer_class.values_data(values, fields)
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_matches_serializer_output(self):
+        self.assertSameOutput(ProjectSerializer, Project.objects.all(), ProjectView.list_fields)
+        self.assertSameOutput(TaskSerializer, Task.objects.all(), TaskView.list_fields)
+        self.assertSameOutput(MilestoneSerializer, Milestone.objects.all(), MilestoneView.list_fields)
+
+    def test_fast_renderer_matches_json_renderer(self):
+        values = TaskSerializer.values_queryset(Task.objects.all(), TaskView.list_fields)
+        data = {"data": TaskSerializer.values_data(values, TaskView.list_fields)}
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data))
+        )
+
+    def test_fast_renderer_formats_datetimes_like_the_serializer(self):
+        fields = TaskSerializer.field_order()
+        values = TaskSerializer.values_queryset(Task.objects.all(), fields).order_by("id")
+        fast = json.loads(FastJSONRenderer().render(TaskSerializer.values_data(values, fields)))
+        expected = json.loads(JSONRenderer().render(TaskSerializer(Task.objects.order_by("id"), many=True).data))
+        self.assertEqual(fast, expected)
+        self.assertTrue(fast[0]["updated_at"].endswith("Z"))
@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import QuerySet
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import Project, ProjectSummary, Task, Milestone, User
+from api.summaries import check_summaries
+from api.tasks import repair_project_summaries
+
+
+class ProjectSummaryTest(APITestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(email="manager@example.com", username="manager", password="password", role="MANAGER")
+        self.project = Project.objects.create(name="Summary Project", owner=self.manager, created_by=self.manager)
+        self.other = Project.objects.create(name="Other Project", owner=self.manager, created_by=self.manager)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.manager)}")
+
+    def summary(self, project):
+        return ProjectSummary.objects.get(project=project)
+
+    def test_counts_follow_saves_and_deletes(self):
+        task = Task.objects.create(project=self.project, name="Task", created_by=self.manager)
+        Milestone.objects.create(project=self.project, name="Milestone", created_by=self.manager)
+        self.assertEqual(self.summary(self.project).not_yet_started, 1)
+        self.assertEqual(self.summary(self.project).milestones_pending, 1)
+
+        task.status = "COMPLETED"
+        task.save()
+        summary = self.summary(self.project)
+        self.assertEqual((summary.not_yet_started, summary.completed), (0, 1))
+
+        task = Task.objects.only("id", "name").get(pk=task.pk)
+        task.project = self.other
+        task.save()
+        self.assertEqual(self.summary(self.project).completed, 0)
+        self.assertEqual(self.summary(self.other).completed, 1)
+
+        Task.objects.get(pk=task.pk).delete()
+        self.assertEqual(self.summary(self.other).completed, 0)
+        self.assertEqual(check_summaries(), [])
+
+    def test_bulk_endpoints_keep_counts(self):
+        admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(admin)}")
+        response = self.client.post(
+            "/api/tasks/bulk/",
+            [{"project": self.project.id, "name": f"Task {i}"} for i in range(3)],
+            format="json",
+        )
+        ids = [result["id"] for result in response.data["data"]]
+        self.client.put("/api/tasks/bulk/", [{"id": ids[0], "status": "ON_HOLD"}], format="json")
+        with self.assertNumQueries(9):
+            self.client.delete(f"/api/tasks/bulk/?ids={ids[1]},{ids[2]}")
+        summary = self.summary(self.project)
+        self.assertEqual((summary.not_yet_started, summary.on_hold), (0, 1))
+        self.assertEqual(check_summaries(), [])
+
+    def test_deleting_project_drops_summary(self):
+        Task.objects.create(project=self.project, name="Task", created_by=self.manager)
+        self.project.delete()
+        self.assertFalse(ProjectSummary.objects.filter(project_id=self.project.id).exists())
+
+    def test_stats_endpoint(self):
+        Task.objects.create(project=self.project, name="Late", due_date=date.today() - timedelta(days=1), created_by=self.manager)
+        Task.objects.create(project=self.project, name="Done", status="COMPLETED", due_date=date.today() - timedelta(days=1), created_by=self.manager)
+        Milestone.objects.create(project=self.project, name="Reached", is_achieved=True, created_by=self.manager)
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/projects/stats/?project={self.project.id}")
+        self.assertEqual(response.status_code, 200)
+        stats = response.data["data"][0]
+        self.assertEqual(stats["tasks"]["NOT_YET_STARTED"], 1)
+        self.assertEqual(stats["tasks"]["total"], 2)
+        self.assertEqual(stats["overdue_tasks"], 1)
+        self.assertEqual(stats["milestones"], {"achieved": 1, "pending": 0, "total": 1})
+
+    def test_rebuild_and_check_command(self):
+        Task.objects.create(project=self.project, name="Task", created_by=self.manager)
+        ProjectSummary.objects.filter(project=self.project).update(not_yet_started=5)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_project_summaries", "--check", stdout=open("/dev/null", "w"))
+        call_command("rebuild_project_summaries", stdout=open("/dev/null", "w"))
+        call_command("rebuild_project_summaries", "--check", stdout=open("/dev/null", "w"))
+        self.assertEqual(self.summary(self.project).not_yet_started, 1)
+
+    def test_stale_instances_count_from_the_stored_row(self):
+        task = Task.objects.create(project=self.project, name="Task", created_by=self.manager)
+        first, second = Task.objects.get(pk=task.pk), Task.objects.get(pk=task.pk)
+        first.status = "COMPLETED"
+        first.save()
+        second.status = "ON_HOLD"
+        second.save()
+        summary = self.summary(self.project)
+        self.assertEqual((summary.not_yet_started, summary.completed, summary.on_hold), (0, 0, 1))
+        self.assertEqual(check_summaries(), [])
+
+    def test_bulk_update_counts_from_the_stored_row(self):
+        task = Task.objects.create(project=self.project, name="Task", created_by=self.manager)
+        in_bulk = QuerySet.in_bulk
+
+        def complete_after_reading(queryset, *args, **kwargs):
+            # Another request completes the task once this one has read it.
+            rows = in_bulk(queryset, *args, **kwargs)
+            completed = Task.objects.get(pk=task.pk)
+            completed.status = "COMPLETED"
+            completed.save()
+            return rows
+
+        with mock.patch.object(QuerySet, "in_bulk", complete_after_reading):
+            response = self.client.put("/api/tasks/bulk/", [{"id": task.id, "status": "ON_HOLD"}], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(check_summaries(), [])
+
+    def test_repair_task_rebuilds_drifted_summaries(self):
+        Task.objects.create(project=self.project, name="Task", created_by=self.manager)
+        ProjectSummary.objects.filter(project=self.project).update(not_yet_started=5)
+        self.assertEqual(repair_project_summaries(), 1)
+        self.assertEqual(check_summaries(), [])
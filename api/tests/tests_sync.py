@@ -0,0 +1,196 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import add_role_claims
+from api.changefeed import current_cursor, read_changes
+from api.models import ChangeLog, Milestone, Project, Task, User
+from api.tasks import prune_change_log
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SyncViewTest(APITestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.project = Project.objects.create(name="Sync Project", owner=self.admin, created_by=self.admin)
+        self.task = Task.objects.create(project=self.project, name="Sync Task", created_by=self.admin)
+        cache.clear()
+        token = add_role_claims(AccessToken.for_user(self.member), self.member)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.cursor = self.client.get("/api/sync/").data["data"]["cursor"]
+
+    def sync(self, since=None, page_size=None):
+        since = self.cursor if since is None else since
+        url = f"/api/sync/?since={since}"
+        if page_size:
+            url += f"&page_size={page_size}"
+        return self.client.get(url)
+
+    def test_returns_upserts_and_tombstones_since_cursor(self):
+        self.task.status = "IN_PROGRESS"
+        self.task.save()
+        self.task.save()
+        self.project.members.add(self.member)
+        milestone_id = Milestone.objects.create(project=self.project, name="Gone", created_by=self.admin).id
+        Milestone.objects.filter(pk=milestone_id).delete()
+        # Visible projects, change log bounds, page and recent entries, projects and their members, tasks.
+        with self.assertNumQueries(7):
+            response = self.sync()
+        data = response.data["data"]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task["status"] for task in data["upserts"]["tasks"]], ["IN_PROGRESS"])
+        self.assertEqual(data["upserts"]["projects"][0]["member_details"][0]["username"], "member")
+        self.assertEqual(data["upserts"]["milestones"], [])
+        self.assertEqual(data["deletes"]["milestones"], [milestone_id])
+        self.assertIsNone(response.data["pagination"]["next"])
+
+        response = self.sync(since=data["cursor"])
+        self.assertEqual(response.data["data"]["upserts"]["tasks"], [])
+        self.assertEqual(response.data["data"]["cursor"], data["cursor"])
+
+    def test_pages_follow_the_cursor(self):
+        self.project.members.add(self.member)
+        self.cursor = self.client.get("/api/sync/").data["data"]["cursor"]
+        for i in range(5):
+            Task.objects.create(project=self.project, name=f"Paged Task {i}", created_by=self.admin)
+        response = self.sync(page_size=2)
+        self.assertEqual(len(response.data["data"]["upserts"]["tasks"]), 2)
+        self.assertIn(f"since={response.data['data']['cursor']}", response.data["pagination"]["next"])
+        seen = []
+        url = f"/api/sync/?since={self.cursor}&page_size=2"
+        while url:
+            response = self.client.get(url)
+            seen += [task["name"] for task in response.data["data"]["upserts"]["tasks"]]
+            url = response.data["pagination"]["next"]
+        self.assertEqual(seen, [f"Paged Task {i}" for i in range(5)])
+
+    def test_bulk_writes_are_recorded(self):
+        self.project.members.add(self.member)
+        admin_token = add_role_claims(AccessToken.for_user(self.admin), self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {admin_token}")
+        response = self.client.post("/api/tasks/bulk/", [{"project": self.project.id, "name": "Bulk Task"}], format="json")
+        task_id = response.data["data"][0]["id"]
+        self.client.delete(f"/api/tasks/bulk/?ids={self.task.id}")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {add_role_claims(AccessToken.for_user(self.member), self.member)}")
+        data = self.sync().data["data"]
+        self.assertEqual([task["id"] for task in data["upserts"]["tasks"]], [task_id])
+        self.assertEqual(data["deletes"]["tasks"], [self.task.id])
+
+    def test_deleting_a_user_records_unassignments(self):
+        self.project.members.add(self.member)
+        self.task.assigned_to = self.member
+        self.task.save()
+        cursor = self.sync().data["data"]["cursor"]
+        other = User.objects.create_user(email="other@example.com", username="other", password="password", role="MEMBER")
+        self.project.members.add(other)
+        self.member.delete()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {add_role_claims(AccessToken.for_user(other), other)}")
+        data = self.sync(since=cursor).data["data"]
+        self.assertIsNone(data["upserts"]["tasks"][0]["assigned_to"])
+        self.assertEqual([user["username"] for user in data["upserts"]["projects"][0]["member_details"]], ["other"])
+
+    def test_only_visible_rows_are_sent(self):
+        other = Project.objects.create(name="Other Project", owner=self.admin, created_by=self.admin)
+        hidden = Task.objects.create(project=other, name="Hidden Task", created_by=self.admin)
+        self.project.members.add(self.member)
+        hidden.status = "IN_PROGRESS"
+        hidden.save()
+        gone_id = Task.objects.create(project=other, name="Hidden Gone", created_by=self.admin).id
+        Task.objects.filter(pk=gone_id).delete()
+        data = self.sync().data["data"]
+        self.assertEqual([project["id"] for project in data["upserts"]["projects"]], [self.project.id])
+        self.assertEqual(data["upserts"]["tasks"], [])
+        self.assertNotIn(hidden.id, data["deletes"]["tasks"])
+        self.assertNotIn(gone_id, data["deletes"]["tasks"])
+        self.assertEqual(data["deletes"]["tasks"], [])
+        self.assertEqual(data["deletes"]["projects"], [])
+        self.assertEqual(data["cursor"], current_cursor())
+
+    def test_rows_moved_out_of_a_visible_project_are_dropped(self):
+        other = Project.objects.create(name="Other Project", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+        cursor = self.sync().data["data"]["cursor"]
+        self.task.project = other
+        self.task.save()
+        milestone = Milestone.objects.create(project=self.project, name="Moved", created_by=self.admin)
+        cursor = self.sync(since=cursor).data["data"]["cursor"]
+        admin_token = add_role_claims(AccessToken.for_user(self.admin), self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {admin_token}")
+        self.client.put("/api/milestones/bulk/", [{"id": milestone.id, "project": other.id}], format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {add_role_claims(AccessToken.for_user(self.member), self.member)}")
+        data = self.sync(since=cursor).data["data"]
+        self.assertEqual(data["deletes"]["milestones"], [milestone.id])
+        data = self.sync().data["data"]
+        self.assertEqual(data["upserts"]["tasks"], [])
+        self.assertEqual(data["deletes"]["tasks"], [self.task.id])
+
+    def test_removed_member_is_told_to_drop_the_project(self):
+        self.project.members.add(self.member)
+        cursor = self.sync().data["data"]["cursor"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.remove(self.member)
+        data = self.sync(since=cursor).data["data"]
+        self.assertEqual(data["upserts"]["projects"], [])
+        self.assertEqual(data["deletes"]["projects"], [self.project.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.add(self.member)
+        cursor = self.sync(since=data["cursor"]).data["data"]["cursor"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.assigned_projects.clear()
+        data = self.sync(since=cursor).data["data"]
+        self.assertEqual(data["deletes"]["projects"], [self.project.id])
+        # Later writes to the project are no longer sent.
+        Task.objects.create(project=self.project, name="After Removal", created_by=self.admin)
+        data = self.sync(since=data["cursor"]).data["data"]
+        self.assertEqual((data["upserts"]["tasks"], data["deletes"]["tasks"]), ([], []))
+
+    def test_recent_gap_holds_back_later_entries(self):
+        seq = ChangeLog.objects.order_by("-seq").first().seq
+        ChangeLog.objects.create(seq=seq + 2, model="task", object_id=self.task.id, project_id=self.project.id)
+        response = self.sync(since=seq)
+        self.assertEqual(response.data["data"]["upserts"]["tasks"], [])
+        self.assertEqual(response.data["data"]["cursor"], seq)
+        self.assertIsNotNone(response.data["pagination"]["next"])
+        ChangeLog.objects.filter(seq=seq + 2).update(created_at=timezone.now() - timedelta(minutes=1))
+        response = self.sync(since=seq)
+        self.assertEqual(response.data["data"]["cursor"], seq + 2)
+
+    def test_project_filter_moves_the_cursor_past_other_projects(self):
+        other = Project.objects.create(name="Other Project", owner=self.admin, created_by=self.admin)
+        Task.objects.create(project=other, name="Other Task", created_by=self.admin)
+        task = Task.objects.create(project=self.project, name="Own Task", created_by=self.admin)
+        Task.objects.create(project=other, name="Later Task", created_by=self.admin)
+        entries, cursor, has_more = read_changes(self.cursor, 10, [self.project.id])
+        self.assertEqual([(entry["model"], entry["object_id"]) for entry in entries], [("task", task.id)])
+        self.assertEqual(cursor, current_cursor())
+        self.assertFalse(has_more)
+        entries, cursor, has_more = read_changes(cursor, 10, [self.project.id])
+        self.assertEqual((entries, cursor, has_more), ([], current_cursor(), False))
+
+    def test_gap_in_another_project_holds_back_later_entries(self):
+        seq = ChangeLog.objects.order_by("-seq").first().seq
+        ChangeLog.objects.create(seq=seq + 2, model="task", object_id=self.task.id, project_id=self.project.id + 1)
+        ChangeLog.objects.create(seq=seq + 3, model="task", object_id=self.task.id, project_id=self.project.id)
+        self.assertEqual(read_changes(seq, 10, [self.project.id]), ([], seq, True))
+
+    @override_settings(CHANGE_FEED_RETENTION_DAYS=0)
+    def test_pruned_cursor_is_gone(self):
+        Task.objects.create(project=self.project, name="Late Task", created_by=self.admin)
+        ChangeLog.objects.filter(seq__lte=self.cursor).update(created_at=timezone.now() - timedelta(days=1))
+        ChangeLog.objects.filter(seq__gt=self.cursor).update(created_at=timezone.now() + timedelta(days=1))
+        expired = ChangeLog.objects.filter(seq__lte=self.cursor).count()
+        self.assertEqual(prune_change_log(), expired)
+        self.assertEqual(self.sync().status_code, status.HTTP_200_OK)
+        response = self.sync(since=self.cursor - 1)
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(response.data["data"]["cursor"], self.cursor + 1)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.sync(since="abc").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.sync(since=-1).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,302 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api.models import User, Project, Task, Milestone, Notification, SentReminder, EmailFailure, Status, ChangeModels, Reminders
+from api import reminders
+from api.notifications import collect, notify
+from api.ratelimit import TokenBucket
+from api.tasks import EMAIL_SENDING_KEY, idempotency_key, rate_limit_buckets, rate_limit_wait, send_email, send_notification_digests, send_due_reminders
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationDigestTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(email="alice@example.com", username="alice", password="password", role="MEMBER")
+        self.bob = User.objects.create_user(email="bob@example.com", username="bob", password="password", role="MEMBER")
+
+    def notification(self, user, subject):
+        return Notification(user=user, subject=subject, body=f"{subject} body")
+
+    @mock.patch("api.notifications.send_notification_digests.apply_async")
+    def test_notify_schedules_one_digest_per_window(self, apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify([self.notification(self.alice, "first")])
+        with self.captureOnCommitCallbacks(execute=True):
+            notify([self.notification(self.alice, "second"), self.notification(self.bob, "third")])
+        apply_async.assert_called_once()
+        self.assertEqual(Notification.objects.count(), 3)
+
+    @mock.patch("api.notifications.send_notification_digests.apply_async")
+    def test_digest_coalesces_per_user(self, apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(
+                [
+                    self.notification(self.alice, "first"),
+                    self.notification(self.alice, "second"),
+                    self.notification(self.bob, "third"),
+                ]
+            )
+        stats = send_notification_digests(batch_size=1)
+        self.assertEqual(stats, {"batches": 2, "emails": 2, "notifications": 3, "deferred": 0, "retried": 0})
+        self.assertEqual(len(mail.outbox), 2)
+        alice_mail = next(message for message in mail.outbox if message.to == ["alice@example.com"])
+        self.assertEqual(alice_mail.subject, "You have 2 new notifications.")
+        self.assertIn("second body", alice_mail.body)
+        bob_mail = next(message for message in mail.outbox if message.to == ["bob@example.com"])
+        self.assertEqual(bob_mail.subject, "third")
+        self.assertFalse(Notification.objects.filter(emailed_at__isnull=True).exists())
+
+        self.assertEqual(send_notification_digests()["emails"], 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class FlakyBackend(locmem.EmailBackend):
+    # Stands in for an SMTP server that drops the first `failures` sends.
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, EMAIL_BACKEND="api.tests.tests_tasks.FlakyBackend", EMAIL_MAX_RETRIES=2)
+class EmailDeliveryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        FlakyBackend.failures = 0
+        self.alice = User.objects.create_user(email="alice@example.com", username="alice", password="password", role="MEMBER")
+        self.notifications = Notification.objects.bulk_create(
+            [Notification(user=self.alice, subject=f"subject {i}", body="body", emailed_at=timezone.now()) for i in range(2)]
+        )
+        self.ids = [notification.id for notification in self.notifications]
+
+    def test_retries_until_sent(self):
+        FlakyBackend.failures = 2
+        self.assertEqual(send_email.apply((self.ids,)).get(), "sent")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(EmailFailure.objects.exists())
+
+    def test_gives_up_into_dead_letters(self):
+        FlakyBackend.failures = 10
+        self.assertEqual(send_email.apply((self.ids,)).get(), "failed")
+        self.assertEqual(mail.outbox, [])
+        failure = EmailFailure.objects.get()
+        self.assertEqual((failure.user, failure.notification_ids, failure.attempts), (self.alice, self.ids, 3))
+        self.assertIn("SMTPServerDisconnected", failure.error)
+
+    def test_same_notifications_are_sent_once(self):
+        self.assertEqual(send_email.apply((self.ids,)).get(), "sent")
+        self.assertEqual(send_email.apply((list(reversed(self.ids)),)).get(), "duplicate")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(send_email.apply((self.ids[:1],)).get(), "sent")
+        self.assertNotEqual(mail.outbox[0].extra_headers["Message-ID"], mail.outbox[1].extra_headers["Message-ID"])
+
+    @mock.patch("api.tasks.send_email.apply_async")
+    def test_digest_hands_failed_sends_to_send_email(self, apply_async):
+        Notification.objects.update(emailed_at=None)
+        FlakyBackend.failures = 1
+        stats = send_notification_digests()
+        self.assertEqual((stats["emails"], stats["retried"]), (0, 1))
+        self.assertEqual(mail.outbox, [])
+        args, kwargs = apply_async.call_args
+        self.assertEqual(args, ((self.ids,), {"failures": 1, "charged": True}))
+        self.assertGreater(kwargs["countdown"], 0)
+        self.assertFalse(Notification.objects.filter(emailed_at__isnull=True).exists())
+
+    @override_settings(EMAIL_RECIPIENT_RATE_BURST=1)
+    def test_digest_defers_rate_limited_recipients(self):
+        Notification.objects.update(emailed_at=None)
+        self.assertEqual(send_notification_digests()["emails"], 1)
+        Notification.objects.create(user=self.alice, subject="later", body="body")
+        self.assertEqual(send_notification_digests()["deferred"], 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue(Notification.objects.filter(emailed_at__isnull=True).exists())
+
+    def test_send_that_dies_is_left_to_a_redelivery(self):
+        with mock.patch("api.tasks.EmailMessage.send", side_effect=RuntimeError("worker lost")):
+            with self.assertRaises(RuntimeError):
+                send_email.apply((self.ids,)).get()
+        # While the send could still be in progress, a redelivery waits.
+        with mock.patch.object(send_email, "retry", side_effect=RuntimeError("retried")):
+            with self.assertRaisesMessage(RuntimeError, "retried"):
+                send_email.apply((self.ids,)).get()
+        self.assertEqual(mail.outbox, [])
+        cache.delete(EMAIL_SENDING_KEY.format(key=idempotency_key(self.ids)))
+        self.assertEqual(send_email.apply((self.ids,)).get(), "sent")
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_RECIPIENT_RATE_BURST=2, EMAIL_RATE_LIMIT=0.01, EMAIL_RATE_BURST=1)
+    def test_recipient_token_is_refunded_when_the_global_limit_defers(self):
+        self.assertEqual(rate_limit_wait("alice@example.com"), 0)
+        self.assertGreater(rate_limit_wait("alice@example.com"), 1)
+        recipient, _ = rate_limit_buckets("alice@example.com")
+        self.assertEqual(recipient.take(), 0)
+
+    @override_settings(EMAIL_RECIPIENT_RATE_BURST=1)
+    def test_digest_refunds_recipients_claimed_by_another_run(self):
+        Notification.objects.update(emailed_at=None)
+        with mock.patch("api.tasks.claim", return_value={}):
+            self.assertEqual(send_notification_digests()["emails"], 0)
+        self.assertEqual(send_notification_digests()["emails"], 1)
+
+    @override_settings(EMAIL_RECIPIENT_RATE_BURST=1)
+    def test_charged_sends_do_not_take_tokens_again(self):
+        self.assertEqual(rate_limit_wait("alice@example.com"), 0)
+        self.assertEqual(send_email.apply((self.ids,), {"failures": 1, "charged": True}).get(), "sent")
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_RECIPIENT_RATE_BURST=1)
+    def test_failed_sends_are_retried_without_taking_tokens_again(self):
+        FlakyBackend.failures = 1
+        self.assertEqual(send_email.apply((self.ids,)).get(), "sent")
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_token_bucket_waits_out_a_held_lock(self):
+        bucket = TokenBucket("test", rate=1, capacity=1)
+        cache.add(f"{bucket.key}:lock", 1)
+        with mock.patch("api.ratelimit.time.sleep", side_effect=lambda seconds: cache.delete(f"{bucket.key}:lock")) as sleep:
+            self.assertEqual(bucket.take(), 0)
+        sleep.assert_called_once()
+        self.assertGreater(bucket.take(), 0.5)
+
+    @mock.patch("api.ratelimit.time.time")
+    def test_token_bucket_refills(self, now):
+        now.return_value = 1000.0
+        bucket = TokenBucket("test", rate=2, capacity=2)
+        self.assertEqual([bucket.take(), bucket.take()], [0, 0])
+        self.assertAlmostEqual(bucket.take(), 0.5)
+        now.return_value = 1000.5
+        self.assertEqual(bucket.take(), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationDispatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.project = Project.objects.create(name="Project", owner=self.admin, created_by=self.admin)
+
+    def create_tasks(self, count):
+        for i in range(count):
+            Task.objects.create(project=self.project, name=f"Task {i}", assigned_to=self.admin, created_by=self.admin)
+
+    @mock.patch("api.notifications.send_notification_digests.apply_async")
+    def test_collected_notifications_are_written_once_on_commit(self, apply_async):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with collect():
+                self.create_tasks(3)
+            self.assertFalse(Notification.objects.exists())
+        notification_callbacks = [c for c in callbacks if c.__module__ == "api.notifications"]
+        with self.assertNumQueries(1):
+            for callback in notification_callbacks:
+                callback()
+        self.assertEqual(Notification.objects.count(), 3)
+        apply_async.assert_called_once()
+
+    @mock.patch("api.notifications.send_notification_digests.apply_async")
+    def test_collect_drops_notifications_of_rolled_back_blocks(self, apply_async):
+        # As when a view turns a failed atomic block into a 400 response.
+        with self.captureOnCommitCallbacks(execute=True):
+            with collect():
+                self.create_tasks(1)
+                try:
+                    with transaction.atomic():
+                        Task.objects.create(project=self.project, name="Rolled back", assigned_to=self.admin, created_by=self.admin)
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(list(Notification.objects.values_list("body", flat=True)), [f"Hi admin, A new task 'Task 0' has been assigned to you by admin."])
+
+    @mock.patch("api.notifications.send_notification_digests.apply_async")
+    def test_rolled_back_writes_do_not_notify(self, apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.create_tasks(1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(Notification.objects.exists())
+        apply_async.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_CACHES, REMINDER_DUE_SOON_DAYS=1, REMINDER_OVERDUE_DAYS=7)
+class DueReminderTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.project = Project.objects.create(name="Project", owner=self.admin, created_by=self.admin)
+        self.today = timezone.localdate()
+
+    def task(self, name, days, **fields):
+        fields.setdefault("assigned_to", self.member)
+        return Task.objects.create(project=self.project, name=name, due_date=self.today + timedelta(days=days), created_by=self.admin, **fields)
+
+    def run_reminders(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return send_due_reminders(batch_size=2)
+
+    @mock.patch("api.notifications.send_notification_digests.apply_async")
+    def test_reminds_each_due_item_once(self, apply_async):
+        self.task("Overdue", -2)
+        due_soon = self.task("Due tomorrow", 1)
+        self.task("Due later", 10)
+        self.task("Long overdue", -30)
+        self.task("Done", -1, status=Status.COMPLETED)
+        self.task("Unassigned", 0, assigned_to=None)
+        Milestone.objects.create(project=self.project, name="Launch", due_date=self.today, assigned_to=self.member, created_by=self.admin)
+        Milestone.objects.create(project=self.project, name="Kickoff", due_date=self.today, assigned_to=self.member, is_achieved=True, created_by=self.admin)
+        Notification.objects.all().delete()
+
+        stats = self.run_reminders()
+        self.assertEqual((stats["scanned"], stats["sent"], stats["chunks"]), (3, 3, 2))
+        self.assertCountEqual(
+            Notification.objects.values_list("subject", flat=True),
+            ["Task overdue.", "Task due soon.", "Milestone due soon."],
+        )
+        self.assertEqual(self.run_reminders()["sent"], 0)
+        self.assertEqual(Notification.objects.count(), 3)
+
+        # A new due date is a new reminder.
+        due_soon.due_date = self.today
+        due_soon.save()
+        Notification.objects.all().delete()
+        self.assertEqual(self.run_reminders()["sent"], 1)
+        self.assertIn(f"is due on {self.today:%Y-%m-%d}", Notification.objects.get().body)
+
+    @mock.patch("api.notifications.send_notification_digests.apply_async")
+    def test_prunes_reminders_before_the_window(self, apply_async):
+        task = self.task("Old", -2)
+        self.run_reminders()
+        SentReminder.objects.update(due_date=self.today - timedelta(days=8))
+        self.assertEqual(self.run_reminders()["pruned"], 1)
+        self.assertEqual(SentReminder.objects.get().object_id, task.id)
+
+    @mock.patch("api.notifications.send_notification_digests.apply_async")
+    def test_reminders_recorded_by_another_run_are_not_sent_again(self, apply_async):
+        task = self.task("Overdue", -2)
+        Notification.objects.all().delete()
+        sent_keys = reminders.sent_keys
+
+        def record_after_reading(kind, ids):
+            # An overlapping run records the reminder once this one has looked.
+            keys = sent_keys(kind, ids)
+            SentReminder.objects.create(kind=ChangeModels.TASK, object_id=task.id, user=self.member, reminder=Reminders.OVERDUE, due_date=task.due_date)
+            return keys
+
+        with mock.patch("api.reminders.sent_keys", record_after_reading):
+            self.assertEqual(self.run_reminders()["sent"], 0)
+        self.assertFalse(Notification.objects.exists())
@@ -1,7 +1,17 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import override_settings
 from rest_framework.test import APITestCase, APIRequestFactory
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from api import visibility
+from api.cache import get_versions, visibility_scope
 from api.views import ProjectView
-from api.models import Project, User
+from api.visibility import VISIBLE_PROJECTS_KEY
+from api.models import Project, User, Task, Status
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 
 class ProjectViewTest(APITestCase):
@@ -39,3 +49,186 @@ class ProjectViewTest(APITestCase):
         response = ProjectView.as_view()(request)
         print(response)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TaskListPaginationTest(APITestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.project = Project.objects.create(name="Paged Project", owner=self.admin, created_by=self.admin)
+        self.other_project = Project.objects.create(name="Other Project", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+        Task.objects.bulk_create(
+            [
+                Task(
+                    project=self.project if i % 2 else self.other_project,
+                    name=f"Task {i}",
+                    assigned_to=self.member if i % 2 else None,
+                    status=Status.COMPLETED if i % 3 == 0 else Status.IN_PROGRESS,
+                    due_date=date(2024, 1, 1) + timedelta(days=i),
+                    created_by=self.admin,
+                )
+                for i in range(12)
+            ]
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.member)}")
+
+    def test_cursor_pagination_walks_all_rows(self):
+        seen = []
+        url = "/api/tasks/?page_size=5"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["data"]), 5)
+            seen.extend(row["id"] for row in response.data["data"])
+            url = response.data["pagination"]["next"]
+        # Members only see the tasks of their projects.
+        self.assertEqual(seen, list(Task.objects.filter(project=self.project).order_by("id").values_list("id", flat=True)))
+
+    def test_filters(self):
+        response = self.client.get(
+            "/api/tasks/",
+            {"project": self.project.id, "status": Status.IN_PROGRESS, "due_date_from": "2024-01-04"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = Task.objects.filter(
+            project=self.project, status=Status.IN_PROGRESS, due_date__gte=date(2024, 1, 4)
+        )
+        self.assertEqual({row["id"] for row in response.data["data"]}, set(expected.values_list("id", flat=True)))
+
+    def test_invalid_filter(self):
+        response = self.client.get("/api/tasks/", {"status": "DONE"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get("/api/milestones/", {"is_achieved": "maybe"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProjectDetailTest(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.project = Project.objects.create(name="Detail Project", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+        for i in range(5):
+            Task.objects.create(project=self.project, name=f"Detail Task {i}", assigned_to=self.member, created_by=self.admin)
+        self.url = f"/api/projects/{self.project.id}/"
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.member)}")
+
+    def test_nested_detail_uses_bounded_queries(self):
+        # User, visible projects, project, members, tasks with assignees,
+        # milestones.
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data["data"]
+        self.assertEqual(data["member_details"][0]["username"], "member")
+        self.assertEqual(len(data["tasks"]), 5)
+        self.assertEqual(data["tasks"][0]["assigned_user"], "member")
+        self.assertEqual(data["milestones"], [])
+
+    def test_field_selection(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(f"{self.url}?fields=id,name,tasks&task_fields=id,status")
+        self.assertCountEqual(response.data["data"], ["id", "name", "tasks"])
+        self.assertEqual(list(response.data["data"]["tasks"][0]), ["id", "status"])
+        response = self.client.get(f"{self.url}?fields=id,secret")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_etag_returns_not_modified_until_a_change(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(project=self.project).first().save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_member_changes_change_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.assigned_projects.add(self.project)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_missing_project(self):
+        response = self.client.get("/api/projects/999/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MemberScopingTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@example.com", username="admin", password="password", role="ADMIN")
+        self.member = User.objects.create_user(email="member@example.com", username="member", password="password", role="MEMBER")
+        self.other = User.objects.create_user(email="other@example.com", username="other", password="password", role="MEMBER")
+        self.project = Project.objects.create(name="Member Project", owner=self.admin, created_by=self.admin)
+        self.hidden = Project.objects.create(name="Hidden Project", owner=self.admin, created_by=self.admin)
+        self.project.members.add(self.member)
+        self.hidden.members.add(self.other)
+        Task.objects.create(project=self.project, name="Member Task", created_by=self.admin)
+        Task.objects.create(project=self.hidden, name="Hidden Task", created_by=self.admin)
+        self.login(self.member)
+
+    def login(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+    def names(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["name"] for row in response.data["data"]]
+
+    def test_lists_only_show_member_projects(self):
+        self.assertEqual(self.names("/api/projects/"), ["Member Project"])
+        self.assertEqual(self.names("/api/tasks/"), ["Member Task"])
+        self.assertEqual(self.names("/api/async/tasks/"), ["Member Task"])
+        # The same URL is cached separately for a member of other projects.
+        self.login(self.other)
+        self.assertEqual(self.names("/api/tasks/"), ["Hidden Task"])
+        self.assertEqual(self.client.get(f"/api/projects/{self.project.id}/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_membership_changes_reach_cached_lists(self):
+        etag = self.client.get("/api/tasks/")["ETag"]
+        self.assertEqual(self.client.get(f"/api/projects/{self.hidden.id}/").status_code, status.HTTP_404_NOT_FOUND)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hidden.members.add(self.member)
+        self.assertEqual(self.client.get(f"/api/projects/{self.hidden.id}/").status_code, status.HTTP_200_OK)
+        response = self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["name"] for row in response.data["data"]], ["Member Task", "Hidden Task"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.assigned_projects.clear()
+        self.assertEqual(self.names("/api/projects/"), [])
+
+    def test_stale_visible_projects_do_not_leak_into_shared_pages(self):
+        # The member's cached ids lag behind a membership they just gained,
+        # as if read before the change committed.
+        self.hidden.members.add(self.member)
+        [version] = get_versions([visibility_scope(self.member.id)])
+        cache.set(VISIBLE_PROJECTS_KEY.format(user_id=self.member.id, version=version), [self.project.id])
+        self.assertEqual(self.names("/api/tasks/"), ["Member Task"])
+        # A member of only the first project shares that cached page.
+        third = User.objects.create_user(email="third@example.com", username="third", password="password", role="MEMBER")
+        self.project.members.add(third)
+        self.login(third)
+        self.assertEqual(self.names("/api/tasks/"), ["Member Task"])
+
+    def test_ids_read_before_a_membership_change_are_not_kept(self):
+        member_project_ids = visibility.member_project_ids
+
+        def join_after_reading(user):
+            read = list(member_project_ids(user).values_list("project_id", flat=True))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.hidden.members.add(self.member)
+            return Project.members.through.objects.filter(user_id=user.id, project_id__in=read).values("project_id")
+
+        with mock.patch("api.visibility.member_project_ids", join_after_reading):
+            self.assertEqual(visibility.visible_project_ids(self.member), [self.project.id])
+        self.assertEqual(visibility.visible_project_ids(self.member), sorted([self.project.id, self.hidden.id]))
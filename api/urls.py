@@ -3,13 +3,60 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from api.views import ProjectView, TaskView, MilestoneView, AssignTasks
+from api.views import (
+    ProjectView,
+    ProjectStatsView,
+    ProjectDetailView,
+    ProjectExportView,
+    TaskExportView,
+    MilestoneExportView,
+    TaskView,
+    MilestoneView,
+    AssignTasks,
+    TaskBulkView,
+    MilestoneBulkView,
+    SyncView,
+    SearchView,
+    NotificationView,
+    UnreadNotificationCountView,
+    MetricsView,
+)
+from api.async_views import (
+    AsyncProjectView,
+    AsyncTaskView,
+    AsyncMilestoneView,
+    AsyncAssignTasks,
+)
 
 urlpatterns = [
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("projects/", ProjectView.as_view(), name="projects"),
+    path("projects/stats/", ProjectStatsView.as_view(), name="project_stats"),
+    path("projects/<int:pk>/", ProjectDetailView.as_view(), name="project_detail"),
+    path("projects/export/", ProjectExportView.as_view(), name="projects_export"),
     path("tasks/", TaskView.as_view(), name="tasks"),
+    path("tasks/export/", TaskExportView.as_view(), name="tasks_export"),
     path("milestones/", MilestoneView.as_view(), name="milestones"),
+    path(
+        "milestones/export/",
+        MilestoneExportView.as_view(),
+        name="milestones_export",
+    ),
     path("assign-task/", AssignTasks.as_view(), name="assign_task"),
+    path("tasks/bulk/", TaskBulkView.as_view(), name="tasks_bulk"),
+    path("milestones/bulk/", MilestoneBulkView.as_view(), name="milestones_bulk"),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("notifications/", NotificationView.as_view(), name="notifications"),
+    path(
+        "notifications/unread-count/",
+        UnreadNotificationCountView.as_view(),
+        name="notifications_unread_count",
+    ),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("async/projects/", AsyncProjectView.as_view(), name="async_projects"),
+    path("async/tasks/", AsyncTaskView.as_view(), name="async_tasks"),
+    path("async/milestones/", AsyncMilestoneView.as_view(), name="async_milestones"),
+    path("async/assign-task/", AsyncAssignTasks.as_view(), name="async_assign_task"),
 ]
@@ -1,7 +1,9 @@
 from rest_framework.response import Response
 
 
-def custom_response(data={}, message="", status=200):
+def custom_response(data={}, message="", status=200, pagination=None):
     response = {"data": data, "message": message, "status": status}
+    if pagination is not None:
+        response["pagination"] = pagination
 
     return Response(data=response, status=status)
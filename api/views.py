@@ -1,40 +1,190 @@
+import secrets
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from django.db.models import (
+    Case,
+    Exists,
+    OuterRef,
+    Prefetch,
+    Value,
+    When,
+)
+from django.db.models.lookups import Exact
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
 from api.utils import custom_response
-from api.models import Project, Task, Milestone, UserRoles, User
-from api.serializers import ProjectSerializer, TaskSerializer, MilestoneSerializer
+from api.authentication import ClaimsJWTAuthentication
+from api.filters import (
+    filter_projects,
+    filter_tasks,
+    filter_milestones,
+    filter_notifications,
+    filter_project_summaries,
+    fields_param,
+    sync_params,
+    search_params,
+)
+from api.pagination import paginate
+from api.exports import export_format_param, export_response
+from api.conditional import (
+    list_validators,
+    inbox_etag,
+    aggregate_etag,
+    project_etag,
+    etag_matches,
+    not_modified_since,
+    not_modified,
+    set_validators,
+)
+from api.changefeed import (
+    CursorExpired,
+    log_changes,
+    log_moves,
+    collect_changes,
+    current_cursor,
+    read_changes,
+)
+from api.search import (
+    INDEXED_FIELDS,
+    index_objects,
+    collect_index_changes,
+    get_backend as get_search_backend,
+    search_terms,
+)
+from api.visibility import (
+    scope_projects,
+    scope_project_rows,
+    visible_project_ids,
+    visibility_key,
+    is_scoped,
+)
+from api.replicas import replica_reads
+from api.summaries import (
+    SUMMARY_COLUMNS,
+    record_changes,
+    batch_changes,
+    lock_states,
+    overdue_counts,
+)
+from api.cache import (
+    ENDPOINT_SCOPES,
+    cached_payload,
+    bump_versions,
+    collect_version_bumps,
+    project_scopes,
+    get_unread_count,
+)
+from api.bulk import (
+    get_items,
+    get_ids,
+    preload_related,
+    load_memberships,
+    taken_names,
+    results_status,
+)
+from api.notifications import (
+    task_notification,
+    milestone_notification,
+    notify,
+    mark_read,
+)
+from api.models import (
+    Project,
+    Task,
+    Milestone,
+    UserRoles,
+    User,
+    ProjectSummary,
+    ChangeModels,
+    Notification as NotificationModel,
+)
+from api.serializers import (
+    ProjectSerializer,
+    ProjectDetailSerializer,
+    TaskSerializer,
+    MilestoneSerializer,
+    TaskBulkSerializer,
+    MilestoneBulkSerializer,
+    NotificationSerializer,
+    ProjectSummarySerializer,
+)
 from api.api_permission import permit_if_role_in
-from django.core.cache import cache
+from api.metrics import registry as metrics_registry, serializer_timer
+
+
+def list_response(view, endpoint, request, message):
+    # Membership is read from the primary: it is cached for much longer than
+    # the replica can lag. The page is scoped by the same ids that key it, so
+    # members who share a cached page can see everything on it.
+    project_ids = visible_project_ids(request.user)
+    scope = visibility_key(project_ids)
+    # The versions are read before replica_reads() looks for recent writes,
+    # which are marked before versions are bumped, so a payload built from
+    # the replica is never stored under a version newer than its data.
+    versions, etag, last_modified = list_validators(endpoint, request, scope)
+    with replica_reads(request.user, ENDPOINT_SCOPES[endpoint]):
+        if etag is None:
+            etag = aggregate_etag(view.get_queryset(request, project_ids), request)
+        if etag_matches(request, etag) or not_modified_since(request, last_modified):
+            return not_modified(etag, last_modified)
+        payload = cached_payload(
+            endpoint,
+            request,
+            lambda: view.get_list_payload(request, project_ids),
+            scope,
+            versions,
+        )
+    response = custom_response(
+        data=payload["data"],
+        message=message,
+        status=status.HTTP_200_OK,
+        pagination=payload["pagination"],
+    )
+    return set_validators(response, etag, last_modified)
 
 
 class ProjectView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    list_fields = ["id", "name", "description", "owner", "member_details"]
+
+    def get_queryset(self, request, project_ids=None):
+        return scope_projects(
+            filter_projects(Project.objects.all(), request.query_params),
+            request.user,
+            project_ids,
+        )
+
+    def get_list_payload(self, request, project_ids=None):
+        queryset = self.get_queryset(request, project_ids)
+        if settings.API_FAST_SERIALIZATION:
+            queryset = ProjectSerializer.values_queryset(queryset, self.list_fields)
+            page, pagination = paginate(queryset, request, view=self)
+            with serializer_timer():
+                data = ProjectSerializer.values_data(page, self.list_fields)
+        else:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "members", queryset=User.objects.only("id", "username", "email")
+                )
+            )
+            page, pagination = paginate(queryset, request, view=self)
+            with serializer_timer():
+                data = ProjectSerializer(page, many=True, fields=self.list_fields).data
+        return {"data": data, "pagination": pagination}
 
     @permit_if_role_in([UserRoles.MEMBER])
     def get(self, request, *args, **kwargs):
         try:
-            if cache.get("projects"):
-                queryset = cache.get("projects")
-            else:
-                queryset = (
-                    Project.objects.select_related("owner", "created_by")
-                    .prefetch_related("members")
-                    .all()
-                )
-                cache.set("projects", queryset, timeout=None)
-            serializer = ProjectSerializer(
-                queryset,
-                many=True,
-                fields=["id", "name", "description", "owner", "member_details"],
-            )
-            return custom_response(
-                data=serializer.data,
-                message="Showing all the Projects.",
-                status=status.HTTP_200_OK,
-            )
+            return list_response(self, "projects", request, "Showing all the Projects.")
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
 
@@ -47,7 +197,6 @@ class ProjectView(APIView):
             serializer = ProjectSerializer(data=data)
             if serializer.is_valid():
                 serializer.save()
-                cache.delete("projects")
                 return custom_response(
                     message="Project created successfully.",
                     status=status.HTTP_201_CREATED,
@@ -112,36 +261,156 @@ class ProjectView(APIView):
             return custom_response(str(e), status=status.HTTP_400_BAD_REQUEST)
 
 
-class TaskView(APIView):
+class ProjectDetailView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    detail_fields = [
+        "id",
+        "name",
+        "description",
+        "owner",
+        "created_by",
+        "member_details",
+        "tasks",
+        "milestones",
+    ]
+    task_fields = [
+        "id",
+        "name",
+        "description",
+        "status",
+        "due_date",
+        "assigned_to",
+        "assigned_user",
+    ]
+    milestone_fields = [
+        "id",
+        "name",
+        "description",
+        "due_date",
+        "is_achieved",
+        "assigned_to",
+    ]
+
+    def get_queryset(self, fields, task_fields, milestone_fields):
+        # At most one query per relation: the project, its members, its tasks
+        # (joined to their assignee) and its milestones.
+        prefetches = []
+        if {"members", "member_details"} & set(fields):
+            prefetches.append(
+                Prefetch(
+                    "members", queryset=User.objects.only("id", "username", "email")
+                )
+            )
+        if "tasks" in fields:
+            tasks = Task.objects.order_by("id")
+            if "assigned_user" in task_fields:
+                tasks = tasks.select_related("assigned_to")
+            prefetches.append(Prefetch("tasks", queryset=tasks))
+        if "milestones" in fields:
+            prefetches.append(
+                Prefetch("milestones", queryset=Milestone.objects.order_by("id"))
+            )
+        return Project.objects.prefetch_related(*prefetches)
 
     @permit_if_role_in([UserRoles.MEMBER])
-    def get(self, request, *args, **kwargs):
+    def get(self, request, pk, *args, **kwargs):
         try:
-            if cache.get("tasks"):
-                queryset = cache.get("tasks")
-            else:
-                queryset = Task.objects.select_related(
-                    "project", "assigned_to", "created_by"
-                ).all()
-            serializer = TaskSerializer(
-                queryset,
-                many=True,
-                fields=[
-                    "id",
-                    "project_name",
-                    "name",
-                    "description",
-                    "assigned_user",
-                    "status",
-                ],
-            )
+            project_ids = visible_project_ids(request.user)
+            if project_ids is not None and pk not in project_ids:
+                raise Project.DoesNotExist()
+            # Tagged before choosing the database, as in list_response().
+            etag = project_etag(pk, request)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            with replica_reads(request.user, project_scopes([pk]) + ["user"]):
+                params = request.query_params
+                fields = fields_param(
+                    params,
+                    "fields",
+                    ProjectDetailSerializer.field_order(),
+                    self.detail_fields,
+                )
+                task_fields = fields_param(
+                    params,
+                    "task_fields",
+                    TaskSerializer.field_order(),
+                    self.task_fields,
+                )
+                milestone_fields = fields_param(
+                    params,
+                    "milestone_fields",
+                    MilestoneSerializer.field_order(),
+                    self.milestone_fields,
+                )
+                project = scope_projects(
+                    self.get_queryset(fields, task_fields, milestone_fields),
+                    request.user,
+                ).get(pk=pk)
+                with serializer_timer():
+                    data = ProjectDetailSerializer(
+                        project,
+                        fields=fields,
+                        context={
+                            "task_fields": task_fields,
+                            "milestone_fields": milestone_fields,
+                        },
+                    ).data
+                response = custom_response(
+                    data=data, message="Showing the project.", status=status.HTTP_200_OK
+                )
+            return set_validators(response, etag)
+        except Project.DoesNotExist:
             return custom_response(
-                data=serializer.data,
-                message="Showing all the Tasks.",
-                status=status.HTTP_200_OK,
+                message="No project with given id.", status=status.HTTP_404_NOT_FOUND
             )
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    list_fields = [
+        "id",
+        "project_name",
+        "name",
+        "description",
+        "assigned_user",
+        "status",
+    ]
+
+    def get_queryset(self, request, project_ids=None):
+        return scope_project_rows(
+            filter_tasks(Task.objects.all(), request.query_params),
+            request.user,
+            project_ids,
+        )
+
+    def get_list_payload(self, request, project_ids=None):
+        queryset = self.get_queryset(request, project_ids)
+        if settings.API_FAST_SERIALIZATION:
+            queryset = TaskSerializer.values_queryset(queryset, self.list_fields)
+            page, pagination = paginate(queryset, request, view=self)
+            with serializer_timer():
+                data = TaskSerializer.values_data(page, self.list_fields)
+        else:
+            queryset = queryset.select_related("project", "assigned_to")
+            page, pagination = paginate(queryset, request, view=self)
+            with serializer_timer():
+                data = TaskSerializer(page, many=True, fields=self.list_fields).data
+        return {"data": data, "pagination": pagination}
+
+    @permit_if_role_in([UserRoles.MEMBER])
+    def get(self, request, *args, **kwargs):
+        try:
+            return list_response(self, "tasks", request, "Showing all the Tasks.")
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
 
@@ -153,7 +422,6 @@ class TaskView(APIView):
             serializer = TaskSerializer(data=data)
             if serializer.is_valid():
                 serializer.save()
-                cache.delete("tasks")
                 return custom_response(
                     message="Task created successfully.",
                     status=status.HTTP_201_CREATED,
@@ -216,31 +484,48 @@ class TaskView(APIView):
 
 class MilestoneView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    list_fields = [
+        "id",
+        "name",
+        "description",
+        "due_date",
+        "project_name",
+        "is_achieved",
+    ]
+
+    def get_queryset(self, request, project_ids=None):
+        return scope_project_rows(
+            filter_milestones(Milestone.objects.all(), request.query_params),
+            request.user,
+            project_ids,
+        )
+
+    def get_list_payload(self, request, project_ids=None):
+        queryset = self.get_queryset(request, project_ids)
+        if settings.API_FAST_SERIALIZATION:
+            queryset = MilestoneSerializer.values_queryset(queryset, self.list_fields)
+            page, pagination = paginate(queryset, request, view=self)
+            with serializer_timer():
+                data = MilestoneSerializer.values_data(page, self.list_fields)
+        else:
+            queryset = queryset.select_related("project")
+            page, pagination = paginate(queryset, request, view=self)
+            with serializer_timer():
+                data = MilestoneSerializer(
+                    page, many=True, fields=self.list_fields
+                ).data
+        return {"data": data, "pagination": pagination}
 
     @permit_if_role_in([UserRoles.MEMBER])
     def get(self, request, *args, **kwargs):
         try:
-            queryset = Milestone.objects.select_related(
-                "project", "assigned_to", "created_by"
-            ).all()
-            serializer = MilestoneSerializer(
-                queryset,
-                many=True,
-                fields=[
-                    "id",
-                    "name",
-                    "description",
-                    "due_date",
-                    "project_name",
-                    "is_achieved",
-                ],
-            )
-            return custom_response(
-                data=serializer.data,
-                message="Showing all the milestones.",
-                status=status.HTTP_200_OK,
+            return list_response(
+                self, "milestones", request, "Showing all the milestones."
             )
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
 
@@ -314,39 +599,786 @@ class MilestoneView(APIView):
             return custom_response(str(e), status=status.HTTP_400_BAD_REQUEST)
 
 
+class ProjectStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    @permit_if_role_in([UserRoles.ADMIN, UserRoles.MANAGER])
+    def get(self, request, *args, **kwargs):
+        try:
+            queryset = filter_project_summaries(
+                ProjectSummary.objects.select_related("project").only(
+                    "project__name", *SUMMARY_COLUMNS
+                ),
+                request.query_params,
+            )
+            page, pagination = paginate(
+                queryset, request, view=self, ordering="project_id"
+            )
+            context = {
+                "overdue": overdue_counts([summary.project_id for summary in page])
+            }
+            return custom_response(
+                data=ProjectSummarySerializer(page, many=True, context=context).data,
+                message="Showing project stats.",
+                status=status.HTTP_200_OK,
+                pagination=pagination,
+            )
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class ExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    list_view = None
+    serializer_class = None
+    export_fields = []
+    filename = ""
+
+    @permit_if_role_in([UserRoles.ADMIN, UserRoles.MANAGER])
+    def get(self, request, *args, **kwargs):
+        try:
+            params = request.query_params
+            export_format = export_format_param(params)
+            fields = fields_param(
+                params, "fields", self.export_fields, self.export_fields
+            )
+            return export_response(
+                self.serializer_class,
+                self.list_view().get_queryset(request),
+                fields,
+                export_format,
+                self.filename,
+            )
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class ProjectExportView(ExportView):
+    list_view = ProjectView
+    serializer_class = ProjectSerializer
+    export_fields = [
+        "id",
+        "name",
+        "description",
+        "owner",
+        "created_by",
+        "member_details",
+        "updated_at",
+    ]
+    filename = "projects"
+
+
+class TaskExportView(ExportView):
+    list_view = TaskView
+    serializer_class = TaskSerializer
+    export_fields = [
+        "id",
+        "project",
+        "project_name",
+        "name",
+        "description",
+        "status",
+        "due_date",
+        "assigned_to",
+        "assigned_user",
+        "created_by",
+        "updated_at",
+    ]
+    filename = "tasks"
+
+
+class MilestoneExportView(ExportView):
+    list_view = MilestoneView
+    serializer_class = MilestoneSerializer
+    export_fields = [
+        "id",
+        "project",
+        "project_name",
+        "name",
+        "description",
+        "due_date",
+        "is_achieved",
+        "assigned_to",
+        "created_by",
+        "updated_at",
+    ]
+    filename = "milestones"
+
+
 class AssignTasks(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def assign(self, targets):
+        """
+        Assign each task in targets ({task_id: user_id}) to its user where the
+        user is a member of the task's project. Returns the requested tasks
+        that exist (with their assignee and creator) and the ids of those
+        that were assigned.
+        """
+        user_for_task = Case(
+            *[
+                When(Exact(OuterRef("pk"), task_id), then=Value(user_id))
+                for task_id, user_id in targets.items()
+            ]
+        )
+        is_member = Exists(
+            Project.members.through.objects.filter(
+                project_id=OuterRef("project_id"), user_id=user_for_task
+            )
+        )
+        with transaction.atomic():
+            # The rows are locked until commit, so the ones selected here are
+            # exactly the ones the UPDATE assigns.
+            assigned_ids = set(
+                Task.objects.select_for_update()
+                .filter(pk__in=targets)
+                .filter(is_member)
+                .values_list("pk", flat=True)
+            )
+            if assigned_ids:
+                Task.objects.filter(pk__in=assigned_ids).update(
+                    assigned_to_id=Case(
+                        *[
+                            When(pk=task_id, then=Value(targets[task_id]))
+                            for task_id in assigned_ids
+                        ]
+                    ),
+                    updated_at=timezone.now(),
+                )
+            tasks = Task.objects.select_related("assigned_to", "created_by").in_bulk(
+                targets
+            )
+            assigned = [task for task in tasks.values() if task.pk in assigned_ids]
+            # The UPDATE bypasses post_save, so record what its signals would.
+            log_changes(assigned)
+            notify(
+                task_notification(task, created=False, update_fields=["assigned_to"])
+                for task in assigned
+            )
+        if assigned:
+            bump_versions("task", *project_scopes(task.project_id for task in assigned))
+        return tasks, {task.pk for task in assigned}
+
+    def assign_many(self, items):
+        items = get_items(items)
+        task_ids = get_ids(item.get("task") for item in items)
+        user_ids = get_ids(item.get("assigned_to") for item in items)
+        targets = {}
+        duplicates = set()
+        for index, task_id in enumerate(task_ids):
+            if task_id in targets:
+                duplicates.add(index)
+            else:
+                targets[task_id] = user_ids[index]
+        tasks, assigned = self.assign(targets)
+        # Only failed assignments need to tell a missing user from a non-member.
+        missing = {user_ids[index] for index, task_id in enumerate(task_ids)}
+        missing -= {targets[task_id] for task_id in assigned}
+        if missing:
+            missing -= set(
+                User.objects.filter(pk__in=missing).values_list("pk", flat=True)
+            )
+        results = []
+        for index, (task_id, user_id) in enumerate(zip(task_ids, user_ids)):
+            if index in duplicates:
+                results.append(
+                    {
+                        "index": index,
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": "The task appears more than once in this request.",
+                    }
+                )
+            elif task_id not in tasks:
+                results.append(
+                    {
+                        "index": index,
+                        "status": status.HTTP_404_NOT_FOUND,
+                        "errors": "No task with given id.",
+                    }
+                )
+            elif task_id in assigned:
+                results.append(
+                    {"index": index, "status": status.HTTP_200_OK, "id": task_id}
+                )
+            elif user_id in missing:
+                results.append(
+                    {
+                        "index": index,
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": "No user with given id.",
+                    }
+                )
+            else:
+                results.append(
+                    {
+                        "index": index,
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": "The user is not assigned to the project that belongs this task.",
+                    }
+                )
+        return results
+
+    def put_many(self, items):
+        results = self.assign_many(items)
+        assigned = sum(result["status"] == status.HTTP_200_OK for result in results)
+        return custom_response(
+            data=results,
+            message=f"Assigned {assigned} of {len(results)} tasks.",
+            status=results_status(results, status.HTTP_200_OK),
+        )
+
+    def put_one(self, data):
+        task_id = data.get("task")
+        if not task_id:
+            return custom_response(
+                message="id is required.", status=status.HTTP_400_BAD_REQUEST
+            )
+        [result] = self.assign_many(
+            [{"task": task_id, "assigned_to": data.get("assigned_to")}]
+        )
+        if result["status"] == status.HTTP_200_OK:
+            return custom_response(
+                message="Task assigned successfully.", status=status.HTTP_200_OK
+            )
+        return custom_response(message=result["errors"], status=result["status"])
 
     @permit_if_role_in([UserRoles.ADMIN, UserRoles.MANAGER])
     def put(self, request, *args, **kwargs):
         try:
             data = request.data
-            task_id = data.get("task")
-            if task_id:
-                instance = Task.objects.select_related(
-                    "project", "assigned_to", "created_by"
-                ).get(pk=task_id)
-                assigned_projets = User.objects.get(
-                    pk=data.get("assigned_to")
-                ).assigned_projects.all()
-                if instance.project in assigned_projets:
-                    instance.assigned_to_id = data.get("assigned_to")
-                    instance.save(update_fields=["assigned_to"])
-                    return custom_response(
-                        message="Task assigned successfully.", status=status.HTTP_200_OK
-                    )
-                else:
-                    return custom_response(
-                        message="The user is not assigned to the project that belongs this task.",
-                        status=status.HTTP_400_BAD_REQUEST,
+            if isinstance(data, list):
+                return self.put_many(data)
+            return self.put_one(data)
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class BulkWriteView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+    model = None
+    serializer_class = None
+    cache_scope = None
+    select_related = ()
+
+    def get_memberships(self, items, instances=None):
+        return None
+
+    def build_notification(self, instance, created):
+        return None
+
+    def validate_items(self, items, context, taken, instances=None):
+        results = {}
+        valid = []
+        seen = set()
+        for index, item in enumerate(items):
+            instance = None
+            if instances is not None:
+                instance = instances.get(item.get("id"))
+                if instance is None:
+                    results[index] = {
+                        "index": index,
+                        "status": status.HTTP_404_NOT_FOUND,
+                        "errors": "No object with given id.",
+                    }
+                    continue
+            serializer = self.serializer_class(
+                instance=instance,
+                data=item,
+                partial=instance is not None,
+                context=context,
+            )
+            if not serializer.is_valid():
+                results[index] = {
+                    "index": index,
+                    "status": status.HTTP_400_BAD_REQUEST,
+                    "errors": serializer.errors,
+                }
+                continue
+            name = serializer.validated_data.get("name")
+            if name is not None and (name in taken or name in seen):
+                results[index] = {
+                    "index": index,
+                    "status": status.HTTP_400_BAD_REQUEST,
+                    "errors": {"name": ["An object with this name already exists."]},
+                }
+                continue
+            if name is not None:
+                seen.add(name)
+            valid.append((index, serializer))
+        return results, valid
+
+    @permit_if_role_in([UserRoles.ADMIN])
+    def post(self, request, *args, **kwargs):
+        try:
+            items = get_items(request.data)
+            for item in items:
+                item["created_by"] = request.user.id
+            context = {
+                "preloaded": preload_related(self.serializer_class, items),
+                "memberships": self.get_memberships(items),
+            }
+            taken = taken_names(self.model, [item.get("name") for item in items])
+            results, valid = self.validate_items(items, context, taken)
+            instances = [
+                self.model(**serializer.validated_data) for _, serializer in valid
+            ]
+            with transaction.atomic():
+                self.model.objects.bulk_create(instances)
+                record_changes(instances)
+                log_changes(instances)
+                index_objects(instances)
+                notify(
+                    self.build_notification(instance, created=True)
+                    for instance in instances
+                )
+            if instances:
+                bump_versions(
+                    self.cache_scope,
+                    *project_scopes(instance.project_id for instance in instances),
+                )
+            for (index, _), instance in zip(valid, instances):
+                results[index] = {
+                    "index": index,
+                    "status": status.HTTP_201_CREATED,
+                    "id": instance.id,
+                }
+            results = [results[index] for index in range(len(items))]
+            return custom_response(
+                data=results,
+                message=f"Created {len(instances)} of {len(items)} items.",
+                status=results_status(results, status.HTTP_201_CREATED),
+            )
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+    @permit_if_role_in([UserRoles.ADMIN, UserRoles.MANAGER])
+    def put(self, request, *args, **kwargs):
+        try:
+            items = get_items(request.data)
+            ids = get_ids(item.get("id") for item in items)
+            if len(set(ids)) != len(ids):
+                raise ValidationError("Each id may only appear once.")
+            existing = self.model.objects.select_related(*self.select_related).in_bulk(
+                ids
+            )
+            context = {
+                "preloaded": preload_related(self.serializer_class, items),
+                "memberships": self.get_memberships(items, existing),
+            }
+            taken = taken_names(
+                self.model, [item.get("name") for item in items], exclude_ids=ids
+            )
+            results, valid = self.validate_items(items, context, taken, existing)
+            instances = []
+            fields = set()
+            project_ids = [serializer.instance.project_id for _, serializer in valid]
+            now = timezone.now()
+            for _, serializer in valid:
+                for attr, value in serializer.validated_data.items():
+                    setattr(serializer.instance, attr, value)
+                    fields.add(attr)
+                # bulk_update() skips auto_now, so stamp the rows here.
+                serializer.instance.updated_at = now
+                instances.append(serializer.instance)
+            with transaction.atomic():
+                if fields:
+                    lock_states(instances)
+                    self.model.objects.bulk_update(
+                        instances, list(fields) + ["updated_at"]
                     )
+                    record_changes(instances)
+                    log_changes(instances)
+                    log_moves(zip(instances, project_ids))
+                    if INDEXED_FIELDS & fields:
+                        index_objects(instances)
+                notify(
+                    self.build_notification(instance, created=False)
+                    for instance in instances
+                )
+            if instances:
+                project_ids.extend(instance.project_id for instance in instances)
+                bump_versions(self.cache_scope, *project_scopes(project_ids))
+            for index, serializer in valid:
+                results[index] = {
+                    "index": index,
+                    "status": status.HTTP_200_OK,
+                    "id": serializer.instance.id,
+                }
+            results = [results[index] for index in range(len(items))]
             return custom_response(
-                message="id is required.", status=status.HTTP_400_BAD_REQUEST
+                data=results,
+                message=f"Updated {len(instances)} of {len(items)} items.",
+                status=results_status(results, status.HTTP_200_OK),
             )
-        except Task.DoesNotExist:
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+    @permit_if_role_in([UserRoles.ADMIN])
+    def delete(self, request, *args, **kwargs):
+        try:
+            ids = get_ids(request.query_params.get("ids", ""))
+            with (
+                transaction.atomic(),
+                batch_changes(),
+                collect_changes(),
+                collect_index_changes(),
+                collect_version_bumps(),
+            ):
+                existing = set(
+                    self.model.objects.filter(pk__in=ids).values_list("pk", flat=True)
+                )
+                self.model.objects.filter(pk__in=existing).delete()
+            results = [
+                {
+                    "id": pk,
+                    "status": (
+                        status.HTTP_204_NO_CONTENT
+                        if pk in existing
+                        else status.HTTP_404_NOT_FOUND
+                    ),
+                }
+                for pk in ids
+            ]
             return custom_response(
-                message="No task with given id.", status=status.HTTP_404_NOT_FOUND
+                data=results,
+                message=f"Deleted {len(existing)} of {len(ids)} items.",
+                status=results_status(results, status.HTTP_200_OK),
+            )
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskBulkView(BulkWriteView):
+    model = Task
+    serializer_class = TaskBulkSerializer
+    cache_scope = "task"
+    select_related = ("assigned_to",)
+
+    def get_memberships(self, items, instances=None):
+        pairs = []
+        for item in items:
+            project_id = item.get("project")
+            if project_id is None and instances is not None:
+                instance = instances.get(item.get("id"))
+                project_id = instance.project_id if instance else None
+            try:
+                pairs.append((int(project_id), int(item["assigned_to"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return load_memberships(pairs)
+
+    def build_notification(self, instance, created):
+        return task_notification(instance, created)
+
+
+class MilestoneBulkView(BulkWriteView):
+    model = Milestone
+    serializer_class = MilestoneBulkSerializer
+    cache_scope = "milestone"
+    select_related = ("assigned_to",)
+
+    def build_notification(self, instance, created):
+        return milestone_notification(instance, created)
+
+
+class SyncView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    page_size = 500
+    max_page_size = 2000
+    # Related names are left out: a renamed project or user is not a change
+    # to the tasks that point at it.
+    sync_models = {
+        ChangeModels.PROJECT: (
+            "projects",
+            Project,
+            ProjectSerializer,
+            [
+                "id",
+                "name",
+                "description",
+                "owner",
+                "created_by",
+                "member_details",
+                "updated_at",
+            ],
+        ),
+        ChangeModels.TASK: (
+            "tasks",
+            Task,
+            TaskSerializer,
+            [
+                "id",
+                "project",
+                "name",
+                "description",
+                "status",
+                "due_date",
+                "assigned_to",
+                "created_by",
+                "updated_at",
+            ],
+        ),
+        ChangeModels.MILESTONE: (
+            "milestones",
+            Milestone,
+            MilestoneSerializer,
+            [
+                "id",
+                "project",
+                "name",
+                "description",
+                "due_date",
+                "is_achieved",
+                "assigned_to",
+                "created_by",
+                "updated_at",
+            ],
+        ),
+    }
+
+    def get_changes(self, entries, user, project_ids):
+        upserts = {}
+        deletes = {}
+        for model, (
+            key,
+            model_class,
+            serializer_class,
+            fields,
+        ) in self.sync_models.items():
+            ids = [
+                entry["object_id"]
+                for entry in entries
+                if entry["model"] == model and not entry["deleted"]
+            ]
+            queryset = model_class.objects.filter(pk__in=ids).order_by("id")
+            if model == ChangeModels.PROJECT:
+                queryset = scope_projects(queryset, user, project_ids)
+            else:
+                queryset = scope_project_rows(queryset, user, project_ids)
+            upserts[key] = (
+                serializer_class.values_data(
+                    serializer_class.values_queryset(queryset, fields), fields
+                )
+                if ids
+                else []
+            )
+            # Changed rows that are gone, or that the user can no longer see
+            # (moved to another project, or the user removed from it), are
+            # sent as deletes. Entries are only read for the user's projects
+            # and removals, so these are rows they could see; a deleted row's
+            # own tombstone may follow later.
+            gone = set(ids) - {row["id"] for row in upserts[key]}
+            deletes[key] = sorted(
+                gone
+                | {
+                    entry["object_id"]
+                    for entry in entries
+                    if entry["model"] == model and entry["deleted"]
+                }
+            )
+        return upserts, deletes
+
+    @permit_if_role_in([UserRoles.MEMBER])
+    def get(self, request, *args, **kwargs):
+        try:
+            since, page_size = sync_params(
+                request.query_params, self.page_size, self.max_page_size
+            )
+            if since is None:
+                # Read the cursor before loading the lists, then sync from it.
+                return custom_response(
+                    data={"cursor": current_cursor()},
+                    message="Load the full lists, then sync from this cursor.",
+                    status=status.HTTP_200_OK,
+                )
+            project_ids = visible_project_ids(request.user)
+            entries, cursor, has_more = read_changes(
+                since, page_size, project_ids, request.user.id
+            )
+            upserts, deletes = self.get_changes(entries, request.user, project_ids)
+            next_link = None
+            if has_more:
+                next_link = replace_query_param(
+                    request.build_absolute_uri(), "since", cursor
+                )
+            return custom_response(
+                data={
+                    "cursor": cursor,
+                    "upserts": upserts,
+                    "deletes": deletes,
+                },
+                message="Showing changes since the cursor.",
+                status=status.HTTP_200_OK,
+                pagination={"next": next_link, "page_size": page_size},
+            )
+        except CursorExpired:
+            return custom_response(
+                data={"cursor": current_cursor()},
+                message="The cursor has expired; load the full lists again, then sync from this cursor.",
+                status=status.HTTP_410_GONE,
+            )
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class SearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    page_size = 20
+    max_page_size = 100
+
+    @permit_if_role_in([UserRoles.ADMIN, UserRoles.MANAGER, UserRoles.MEMBER])
+    def get(self, request, *args, **kwargs):
+        try:
+            params = search_params(
+                request.query_params,
+                ChangeModels.values,
+                self.page_size,
+                self.max_page_size,
+            )
+            page_size = params["page_size"]
+            results = []
+            terms = search_terms(params["query"])
+            if terms:
+                # Members only find what belongs to projects they are in.
+                results = get_search_backend().search(
+                    terms,
+                    limit=page_size + 1,
+                    offset=(params["page"] - 1) * page_size,
+                    kinds=params["kinds"],
+                    project_id=params["project"],
+                    member_id=request.user.id if is_scoped(request.user) else None,
+                )
+            next_link = None
+            if len(results) > page_size:
+                next_link = replace_query_param(
+                    request.build_absolute_uri(), "page", params["page"] + 1
+                )
+            return custom_response(
+                data=results[:page_size],
+                message="Showing the best matches first.",
+                status=status.HTTP_200_OK,
+                pagination={"next": next_link, "page_size": page_size},
+            )
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class NotificationView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+    list_fields = ["id", "subject", "body", "created_at", "is_read"]
+
+    @permit_if_role_in([UserRoles.ADMIN, UserRoles.MANAGER, UserRoles.MEMBER])
+    def get(self, request, *args, **kwargs):
+        try:
+            queryset = filter_notifications(
+                NotificationModel.objects.filter(user_id=request.user.id),
+                request.query_params,
+            )
+            etag = inbox_etag(request.user.id, queryset, request)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            page, pagination = paginate(
+                queryset, request, view=self, ordering=("-created_at", "-id")
+            )
+            serializer = NotificationSerializer(
+                page, many=True, fields=self.list_fields
+            )
+            response = custom_response(
+                data=serializer.data,
+                message="Showing your notifications.",
+                status=status.HTTP_200_OK,
+                pagination=pagination,
+            )
+            return set_validators(response, etag)
+        except ValidationError as e:
+            return custom_response(message=e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+    @permit_if_role_in([UserRoles.ADMIN, UserRoles.MANAGER, UserRoles.MEMBER])
+    def put(self, request, *args, **kwargs):
+        try:
+            up_to = request.data.get("up_to")
+            if up_to is None:
+                return custom_response(
+                    message="up_to is required.", status=status.HTTP_400_BAD_REQUEST
+                )
+            count = mark_read(request.user.id, int(up_to))
+            return custom_response(
+                data={
+                    "marked_read": count,
+                    "unread_count": get_unread_count(request.user.id),
+                },
+                message="Notifications marked as read.",
+                status=status.HTTP_200_OK,
+            )
+        except (TypeError, ValueError):
+            return custom_response(
+                message="up_to must be a notification id.",
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class UnreadNotificationCountView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    @permit_if_role_in([UserRoles.ADMIN, UserRoles.MANAGER, UserRoles.MEMBER])
+    def get(self, request, *args, **kwargs):
+        try:
+            return custom_response(
+                data={"unread_count": get_unread_count(request.user.id)},
+                message="Showing your unread notification count.",
+                status=status.HTTP_200_OK,
             )
         except Exception as e:
             return custom_response(message=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class MetricsView(APIView):
+    permission_classes = []
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        token = settings.API_METRICS_TOKEN
+        if token:
+            allowed = secrets.compare_digest(
+                request.headers.get("Authorization", ""), f"Bearer {token}"
+            )
+        else:
+            # Without a token the metrics are only served in development.
+            allowed = settings.DEBUG
+        if not allowed:
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        return HttpResponse(
+            metrics_registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -0,0 +1,103 @@
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from api.cache import get_versions, aget_versions, bump_visibility, visibility_scope
+from api.models import Project, UserRoles
+
+logger = logging.getLogger(__name__)
+
+VISIBLE_PROJECTS_KEY = "api:visible_projects:{user_id}:{version}"
+
+
+def is_scoped(user):
+    # Members only see the projects they belong to and what is in them.
+    return user.role == UserRoles.MEMBER
+
+
+def member_project_ids(user):
+    return Project.members.through.objects.filter(user_id=user.id).values("project_id")
+
+
+def scope_projects(queryset, user, project_ids=None):
+    # project_ids, from visible_project_ids(), scopes the rows to exactly the
+    # projects a cached payload is keyed by; without it the membership is read
+    # in the same query.
+    if not is_scoped(user):
+        return queryset
+    if project_ids is None:
+        project_ids = member_project_ids(user)
+    return queryset.filter(pk__in=project_ids)
+
+
+def scope_project_rows(queryset, user, project_ids=None):
+    # Tasks and milestones, through their project's membership.
+    if not is_scoped(user):
+        return queryset
+    if project_ids is None:
+        project_ids = member_project_ids(user)
+    return queryset.filter(project_id__in=project_ids)
+
+
+def visible_project_ids(user):
+    """
+    Return the sorted ids of the projects the user can see, or None when they
+    can see every project. Cached per user under a version bumped when their
+    memberships change, so ids read before a change are stored where no
+    later read looks.
+    """
+    if not is_scoped(user):
+        return None
+    try:
+        [version] = get_versions([visibility_scope(user.id)])
+        key = VISIBLE_PROJECTS_KEY.format(user_id=user.id, version=version)
+        project_ids = cache.get(key)
+    except Exception as e:
+        logger.warning("Cache unavailable, loading visible projects: %s", e)
+        project_ids = None
+        key = None
+    if project_ids is None:
+        project_ids = sorted(
+            member_project_ids(user).values_list("project_id", flat=True)
+        )
+        if key is not None:
+            cache.add(key, project_ids, timeout=settings.VISIBLE_PROJECTS_TIMEOUT)
+    return project_ids
+
+
+async def avisible_project_ids(user):
+    if not is_scoped(user):
+        return None
+    try:
+        [version] = await aget_versions([visibility_scope(user.id)])
+        key = VISIBLE_PROJECTS_KEY.format(user_id=user.id, version=version)
+        project_ids = await cache.aget(key)
+    except Exception as e:
+        logger.warning("Cache unavailable, loading visible projects: %s", e)
+        project_ids = None
+        key = None
+    if project_ids is None:
+        project_ids = sorted(
+            [
+                project_id
+                async for project_id in member_project_ids(user).values_list(
+                    "project_id", flat=True
+                )
+            ]
+        )
+        if key is not None:
+            await cache.aadd(
+                key, project_ids, timeout=settings.VISIBLE_PROJECTS_TIMEOUT
+            )
+    return project_ids
+
+
+def visibility_key(project_ids):
+    # Part of the payload cache key and list ETags, so members who see the
+    # same projects share cached pages.
+    if project_ids is None:
+        return "all"
+    return "projects:" + ",".join(str(project_id) for project_id in project_ids)
+
+
+def forget_visible_projects(user_ids):
+    bump_visibility(user_ids)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -41,10 +42,10 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework_simplejwt",
     "api",
-    
 ]
 
 MIDDLEWARE = [
+    "api.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -53,6 +54,8 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "api.middleware.ReplicaMiddleware",
+    "api.middleware.NotificationMiddleware",
 ]
 
 ROOT_URLCONF = "project_management_system.urls"
@@ -79,12 +82,68 @@ WSGI_APPLICATION = "project_management_system.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DATABASE_ENGINE picks the profile: sqlite3 for local deployments or
+# postgresql for production.
+DATABASE_ENGINE = os.environ.get("DATABASE_ENGINE", "sqlite3")
+# Seconds a connection is reused across requests before it is closed; 0
+# reconnects on every request.
+DATABASE_CONN_MAX_AGE = int(os.environ.get("DATABASE_CONN_MAX_AGE", 600))
+
+if DATABASE_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DATABASE_NAME", "project_management_system"),
+            "USER": os.environ.get("DATABASE_USER", ""),
+            "PASSWORD": os.environ.get("DATABASE_PASSWORD", ""),
+            "HOST": os.environ.get("DATABASE_HOST", ""),
+            "PORT": os.environ.get("DATABASE_PORT", ""),
+            "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+            # A reused connection is pinged once per request, so a restarted
+            # server costs a reconnect instead of a failed request.
+            "CONN_HEALTH_CHECKS": True,
+            # Set DATABASE_POOLER=pgbouncer when HOST/PORT point at PgBouncer in
+            # transaction mode, where server-side cursors do not survive.
+            "DISABLE_SERVER_SIDE_CURSORS": os.environ.get("DATABASE_POOLER")
+            == "pgbouncer",
+        }
     }
-}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DATABASE_NAME", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+            "OPTIONS": {
+                # Seconds a writer waits for the lock (busy_timeout) before
+                # failing with "database is locked".
+                "timeout": float(os.environ.get("SQLITE_BUSY_TIMEOUT", 20)),
+            },
+        }
+    }
+# DATABASE_REPLICA_NAME (and DATABASE_REPLICA_HOST/PORT, defaulting to the
+# primary's) adds a read replica of the same engine. List and detail reads
+# go to it unless the user, or anyone touching what they read, wrote within
+# REPLICA_LAG_SECONDS. Locally, point it at a copy of the SQLite file.
+DATABASE_REPLICA_ALIAS = "replica"
+if os.environ.get("DATABASE_REPLICA_NAME"):
+    DATABASES[DATABASE_REPLICA_ALIAS] = {
+        **DATABASES["default"],
+        "NAME": os.environ["DATABASE_REPLICA_NAME"],
+        "HOST": os.environ.get(
+            "DATABASE_REPLICA_HOST", DATABASES["default"].get("HOST", "")
+        ),
+        "PORT": os.environ.get(
+            "DATABASE_REPLICA_PORT", DATABASES["default"].get("PORT", "")
+        ),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["api.replicas.ReplicaRouter"]
+REPLICA_LAG_SECONDS = int(os.environ.get("REPLICA_LAG_SECONDS", 5))
+# Set on every new SQLite connection. WAL lets readers carry on while a
+# writer commits, and NORMAL only syncs at checkpoints, which is safe in WAL.
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
 
 
 # Password validation
@@ -129,25 +188,88 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "api.User"
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+    "DEFAULT_AUTHENTICATION_CLASSES": ("api.authentication.ClaimsJWTAuthentication",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "TOKEN_OBTAIN_SERIALIZER": "api.serializers.RoleTokenObtainPairSerializer",
 }
+# How long a process trusts its own copy of "has this user's role changed".
+AUTH_USER_STATE_LOCAL_TTL = 5
+# Users whose state each process keeps; the least recently seen are dropped.
+AUTH_USER_STATE_LOCAL_SIZE = 10000
 
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_HOST_USER = "from email"
 EMAIL_HOST_PASSWORD = "app password"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Use django.core.mail.backends.filebased.EmailBackend or
+# django.core.mail.backends.console.EmailBackend to test locally.
+EMAIL_BACKEND = os.environ.get(
+    "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_FILE_PATH = os.environ.get("EMAIL_FILE_PATH", BASE_DIR / "sent_emails")
+# Token buckets shared by all workers: EMAIL_RATE_LIMIT messages per second
+# overall, and EMAIL_RECIPIENT_RATE_LIMIT per hour to any one address.
+EMAIL_RATE_LIMIT = 10
+EMAIL_RATE_BURST = 50
+EMAIL_RECIPIENT_RATE_LIMIT = 12
+EMAIL_RECIPIENT_RATE_BURST = 5
+# Failed sends are retried after EMAIL_RETRY_BACKOFF seconds, doubling up to
+# EMAIL_RETRY_BACKOFF_MAX, then recorded as an api.models.EmailFailure.
+EMAIL_MAX_RETRIES = 6
+EMAIL_RETRY_BACKOFF = 30
+EMAIL_RETRY_BACKOFF_MAX = 60 * 60
+EMAIL_IDEMPOTENCY_TIMEOUT = 60 * 60 * 24
+# How long a send in progress holds off duplicates of it; longer than any
+# SMTP exchange should take.
+EMAIL_SENDING_TIMEOUT = 60 * 5
+
+NOTIFICATION_DIGEST_WINDOW = 60
+NOTIFICATION_DIGEST_BATCH_SIZE = 500
+NOTIFICATION_RETENTION_DAYS = 90
+NOTIFICATION_PRUNE_BATCH_SIZE = 1000
+UNREAD_COUNT_TIMEOUT = 60 * 60 * 24
+VISIBLE_PROJECTS_TIMEOUT = 60 * 60 * 24
+# Assignees are reminded of open tasks and milestones due within the next
+# REMINDER_DUE_SOON_DAYS, and once of those that fell overdue in the last
+# REMINDER_OVERDUE_DAYS.
+REMINDER_DUE_SOON_DAYS = 1
+REMINDER_OVERDUE_DAYS = 7
+REMINDER_BATCH_SIZE = 2000
 
 CELERY_BROKER_URL = "redis://localhost:6379"
+CELERY_BEAT_SCHEDULE = {
+    # Safety net for notifications whose scheduled digest was lost.
+    "send-notification-digests": {
+        "task": "api.tasks.send_notification_digests",
+        "schedule": timedelta(minutes=5),
+    },
+    "prune-notifications": {
+        "task": "api.tasks.prune_notifications",
+        "schedule": timedelta(days=1),
+    },
+    "prune-change-log": {
+        "task": "api.tasks.prune_change_log",
+        "schedule": timedelta(days=1),
+    },
+    "send-due-reminders": {
+        "task": "api.tasks.send_due_reminders",
+        "schedule": timedelta(days=1),
+    },
+    "repair-project-summaries": {
+        "task": "api.tasks.repair_project_summaries",
+        "schedule": timedelta(days=1),
+    },
+}
 
 CACHES = {
     "default": {
@@ -155,3 +277,26 @@ CACHES = {
         "LOCATION": "redis://localhost:6379",
     }
 }
+
+API_CACHE_TIMEOUT = 300
+API_FAST_SERIALIZATION = True
+# Rows fetched per round trip and written per chunk by the export endpoints.
+API_EXPORT_CHUNK_SIZE = 2000
+# Dotted path of the search backend; by default chosen from the database vendor.
+API_SEARCH_BACKEND = None
+
+# Sync clients holding a cursor older than the retention get 410 and reload.
+CHANGE_FEED_RETENTION_DAYS = 30
+CHANGE_FEED_PRUNE_BATCH_SIZE = 5000
+# How long a gap in the sequence is treated as a transaction still committing.
+CHANGE_FEED_SETTLE_SECONDS = 5
+
+API_METRICS_ENABLED = os.environ.get("API_METRICS_ENABLED", "true").lower() == "true"
+# Requests slower than this are logged with their query count and time; 0
+# disables the log. API_SLOW_REQUEST_SQL=true also keeps every request's SQL
+# text so the log can include the statements.
+API_SLOW_REQUEST_MS = int(os.environ.get("API_SLOW_REQUEST_MS", "500"))
+API_SLOW_REQUEST_SQL = os.environ.get("API_SLOW_REQUEST_SQL", "false").lower() == "true"
+# /api/metrics/ requires "Authorization: Bearer <token>"; without a token it
+# is only served when DEBUG is on.
+API_METRICS_TOKEN = os.environ.get("API_METRICS_TOKEN", "")